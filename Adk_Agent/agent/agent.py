@@ -1,3 +1,4 @@
+import os
 from google.adk.agents.llm_agent import Agent
 from ..tools.revenue_tools import revenue_health
 from ..tools.crm_tools import customer_health
@@ -6,11 +7,24 @@ from ..tools.inventory_tools import inventory_health
 from ..tools.preferences_tools import get_preferences_tool, set_preferences_tool
 from ..tools.insights_tools import recent_insights_tool
 from ..tools.monitoring_tools import monitoring_snapshot_tool, active_risks_tool, check_risks_tool
+from ..tools.overview_tools import business_overview
+
+# MODEL=fake swaps in the offline scripted backend (agent/fake_model.py)
+MODEL = os.getenv("MODEL", "gemini-2.5-flash")
+
+
+def _build_model():
+    if MODEL.startswith("fake"):
+        from .fake_model import FakeLlm
+        return FakeLlm(model=MODEL)
+    return MODEL
+
 
 root_agent = Agent(
-    model="gemini-2.5-flash",
+    model=_build_model(),
     name="AgenticBusinessIntelligenceCopilot",
     tools=[
+        business_overview,
         revenue_health,
         customer_health,
         finance_health,
@@ -35,6 +49,7 @@ CRITICAL RULES:
 BEHAVIOR:
 - Determine which business domain the question relates to.
 - Use the appropriate tool(s) to get facts.
+- For broad or multi-domain questions, call business_overview once instead of each domain tool.
 - For overall health checks, use the monitoring_snapshot_tool.
 - For risk reviews, use active_risks_tool.
 - Explain insights naturally, like a human analyst.
@@ -0,0 +1,84 @@
+"""
+Offline fake model backend for the ADK agent.
+Routes each question to tools by keyword (deterministically), then answers
+with a scripted summary once the tool results are in, so the full agent path
+(runner pool, tools, memory, streaming) can be exercised and load tested
+without network access or API keys. Select it with MODEL=fake; per-call
+latency comes from FAKE_MODEL_LATENCY_MS.
+"""
+import asyncio
+import os
+from typing import AsyncGenerator, List, Sequence, Tuple
+
+from google.adk.models.base_llm import BaseLlm
+from google.adk.models.llm_request import LlmRequest
+from google.adk.models.llm_response import LlmResponse
+from google.genai import types
+
+FAKE_MODEL_LATENCY_MS = float(os.getenv("FAKE_MODEL_LATENCY_MS", "200"))
+
+# (question keywords, tool name fragment); the first matching route wins
+DEFAULT_ROUTES: Sequence[Tuple[Tuple[str, ...], str]] = (
+    (("risk", "alert"), "active_risks"),
+    (("revenue", "sales"), "revenue_health"),
+    (("customer", "churn", "segment"), "customer_health"),
+    (("finance", "invoice", "cash", "payment"), "finance_health"),
+    (("inventory", "stock", "sku"), "inventory_health"),
+    (("insight", "history"), "recent_insights"),
+)
+FALLBACK_TOOL = "business_overview"
+
+
+class FakeLlm(BaseLlm):
+    """Deterministic scripted model: one round of tool calls, then a text answer."""
+
+    model: str = "fake"
+    latency_ms: float = FAKE_MODEL_LATENCY_MS
+    chunk_words: int = 4
+
+    @classmethod
+    def supported_models(cls) -> List[str]:
+        return [r"fake.*"]
+
+    def _route(self, question: str, tool_names: Sequence[str]) -> List[str]:
+        question = question.lower()
+        fragment = FALLBACK_TOOL
+        for keywords, tool in DEFAULT_ROUTES:
+            if any(k in question for k in keywords):
+                fragment = tool
+                break
+        return [name for name in tool_names if fragment in name][:1]
+
+    @staticmethod
+    def _current_turn(contents: List[types.Content]) -> Tuple[str, List[str]]:
+        """Return (latest user question, names of tools already answered in this turn)."""
+        answered = []
+        for content in reversed(contents):
+            for part in content.parts or []:
+                if part.function_response is not None:
+                    answered.append(part.function_response.name)
+                elif content.role == "user" and part.text:
+                    return part.text, answered[::-1]
+        return "", answered[::-1]
+
+    async def generate_content_async(
+        self, llm_request: LlmRequest, stream: bool = False
+    ) -> AsyncGenerator[LlmResponse, None]:
+        if self.latency_ms:
+            await asyncio.sleep(self.latency_ms / 1000)
+
+        question, answered = self._current_turn(llm_request.contents)
+        if not answered:
+            calls = self._route(question, list(llm_request.tools_dict))
+            if calls:
+                parts = [types.Part(function_call=types.FunctionCall(name=name, args={})) for name in calls]
+                yield LlmResponse(content=types.Content(role="model", parts=parts))
+                return
+
+        text = f"Scripted answer to \"{question}\" based on {', '.join(answered) or 'no tools'}."
+        if stream:
+            words = text.split(" ")
+            for i in range(0, len(words), self.chunk_words):
+                chunk = " ".join(words[i:i + self.chunk_words]) + " "
+                yield LlmResponse(content=types.Content(role="model", parts=[types.Part(text=chunk)]), partial=True)
+        yield LlmResponse(content=types.Content(role="model", parts=[types.Part(text=text)]))
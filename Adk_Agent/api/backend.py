@@ -3,7 +3,8 @@ Backend API Layer for Monitoring Dashboard and Risks
 Exposes HTTP endpoints independent of the chat agent.
 Uses Flask for simplicity.
 """
-from flask import Flask, jsonify, request
+from flask import Flask, Response, jsonify, request
+import json
 from flask_cors import CORS
 import sys
 from pathlib import Path
@@ -11,19 +12,55 @@ from pathlib import Path
 # Add parent to path for imports
 sys.path.insert(0, str(Path(__file__).parent.parent.parent))
 
-from Adk_Agent.services.monitoring_engine import compute_monitoring_snapshot, get_average_order_value
+from Adk_Agent.services.monitoring_engine import get_average_order_value
+from Adk_Agent.services.snapshot_cache import get_monitoring_snapshot, snapshot_cache_stats
+from Adk_Agent.services.tool_cache import tool_cache_stats
+from Adk_Agent.services.metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, instrument_flask, render_metrics
+from Adk_Agent.services.risk_store import decode_cursor
 from Adk_Agent.services.risk_engine import (
     generate_risks_from_monitoring,
     store_risks,
     get_active_risks,
-    get_historical_risks,
-    get_all_risks,
+    get_risks_page,
+    iter_risks,
     resolve_risk,
     auto_resolve_stale_risks
 )
 
 app = Flask(__name__)
 CORS(app)  # Enable CORS for frontend
+instrument_flask(app)  # per-route latency histograms for /metrics
+
+MAX_PAGE_SIZE = 1000
+
+
+def _risk_query_args():
+    """Filters and pagination parameters from the query string."""
+    return {
+        "risk_type": request.args.get("risk_type"),
+        "severity": request.args.get("severity"),
+        "since": request.args.get("since"),
+        "until": request.args.get("until"),
+    }
+
+
+def _page_args():
+    """
+    Pagination parameters from the query string. Like the FastAPI routes, an
+    invalid or out-of-range `limit` or an undecodable `cursor` is an error
+    (ValueError, answered with 400) rather than silently replaced.
+    """
+    raw_limit = request.args.get("limit", "100")
+    try:
+        limit = int(raw_limit)
+    except ValueError:
+        raise ValueError(f"Invalid limit: {raw_limit}") from None
+    if not 1 <= limit <= MAX_PAGE_SIZE:
+        raise ValueError(f"limit must be between 1 and {MAX_PAGE_SIZE}")
+    cursor = request.args.get("cursor")
+    if cursor is not None:
+        decode_cursor(cursor)
+    return {"cursor": cursor, "limit": limit}
 
 
 @app.route("/api/monitoring", methods=["GET"])
@@ -33,12 +70,18 @@ def monitoring_endpoint():
     No LLM involved - pure deterministic KPIs.
     """
     try:
-        snapshot = compute_monitoring_snapshot()
+        snapshot = get_monitoring_snapshot()
         return jsonify(snapshot), 200
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 
+@app.route("/api/monitoring/cache", methods=["GET"])
+def monitoring_cache_endpoint():
+    """Returns snapshot cache hit/miss counters and snapshot age, plus agent tool cache counters."""
+    return jsonify({**snapshot_cache_stats(), "tools": tool_cache_stats()}), 200
+
+
 @app.route("/api/risks/active", methods=["GET"])
 def active_risks_endpoint():
     """Returns all active risks."""
@@ -51,24 +94,36 @@ def active_risks_endpoint():
 
 @app.route("/api/risks/historical", methods=["GET"])
 def historical_risks_endpoint():
-    """Returns all resolved/historical risks."""
+    """Returns resolved/historical risks, paginated newest first."""
     try:
-        risks = get_historical_risks()
-        return jsonify({"risks": risks, "count": len(risks)}), 200
+        page = get_risks_page(status="RESOLVED", **_risk_query_args(), **_page_args())
+        return jsonify(page), 200
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 
 @app.route("/api/risks/all", methods=["GET"])
 def all_risks_endpoint():
-    """Returns all risks (active + historical)."""
+    """Returns all risks (active + historical), paginated newest first."""
     try:
-        risks = get_all_risks()
-        return jsonify({"risks": risks, "count": len(risks)}), 200
+        page = get_risks_page(status=request.args.get("status"), **_risk_query_args(), **_page_args())
+        return jsonify(page), 200
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 
+@app.route("/api/risks/export", methods=["GET"])
+def export_risks_endpoint():
+    """Streams all matching risks as NDJSON."""
+    risks = iter_risks(status=request.args.get("status"), **_risk_query_args())
+    lines = (json.dumps(r, default=str) + "\n" for r in risks)
+    return Response(lines, mimetype="application/x-ndjson")
+
+
 @app.route("/api/risks/generate", methods=["POST"])
 def generate_risks_endpoint():
     """
@@ -76,9 +131,8 @@ def generate_risks_endpoint():
     Stores generated risks.
     """
     try:
-        snapshot = compute_monitoring_snapshot()
-        new_risks = generate_risks_from_monitoring(snapshot)
-        store_risks(new_risks)
+        snapshot = get_monitoring_snapshot()
+        new_risks = store_risks(generate_risks_from_monitoring(snapshot))
         return jsonify({
             "message": f"Generated {len(new_risks)} new risks",
             "risks": new_risks
@@ -124,16 +178,25 @@ def health_check():
     return jsonify({"status": "healthy", "service": "BI Copilot Backend"}), 200
 
 
+@app.route("/metrics", methods=["GET"])
+def metrics_endpoint():
+    """Prometheus scrape endpoint: route latency histograms, in-flight requests and data/cache/store gauges."""
+    return Response(render_metrics(), content_type=METRICS_CONTENT_TYPE)
+
+
 if __name__ == "__main__":
     print("Starting BI Copilot Backend API on http://localhost:5000")
     print("Endpoints:")
     print("  GET  /api/monitoring        - Dashboard KPIs")
+    print("  GET  /api/monitoring/cache  - Snapshot cache stats")
     print("  GET  /api/risks/active      - Active risks")
     print("  GET  /api/risks/historical  - Historical risks")
-    print("  GET  /api/risks/all         - All risks")
+    print("  GET  /api/risks/all         - All risks (paginated)")
+    print("  GET  /api/risks/export      - All risks as NDJSON")
     print("  POST /api/risks/generate    - Generate risks from current state")
     print("  POST /api/risks/resolve/:id - Resolve a risk")
     print("  POST /api/risks/auto-resolve- Auto-resolve stale risks")
     print("  GET  /api/metrics/aov       - Average order value")
     print("  GET  /api/health            - Health check")
+    print("  GET  /metrics               - Prometheus metrics")
     app.run(host="0.0.0.0", port=5000, debug=True)
@@ -2,34 +2,74 @@
 FastAPI Backend for Agentic BI Copilot
 Orchestration and delivery layer for frontend consumption.
 """
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request, WebSocket, WebSocketDisconnect, Depends, Query
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
 from pydantic import BaseModel
 from typing import Optional, List, Dict, Any
+from contextlib import asynccontextmanager
+import asyncio
+import json
+import logging
 import sys
 from pathlib import Path
 
 # Add parent to path for imports
 sys.path.insert(0, str(Path(__file__).parent.parent.parent))
 
-from Adk_Agent.services.monitoring_engine import compute_monitoring_snapshot, get_average_order_value
+from Adk_Agent.services.monitoring_engine import get_average_order_value
+from Adk_Agent.services.snapshot_cache import get_monitoring_snapshot, snapshot_cache, snapshot_cache_stats
 from Adk_Agent.services.risk_engine import (
     generate_risks_from_monitoring,
     store_risks,
     get_active_risks,
-    get_historical_risks,
-    get_all_risks,
+    get_risks_page,
+    iter_risks,
     resolve_risk,
     auto_resolve_stale_risks
 )
-from Adk_Agent.services.memory import log_insight, recent_insights, get_preferences
-from Adk_Agent.services.visualization import create_agent_response
+from Adk_Agent.services.session_store import session_store
+from Adk_Agent.services.tool_cache import tool_cache_stats
+from Adk_Agent.services.tool_output import tool_output_stats
+from Adk_Agent.services.agent_pool import agent_pool
+from Adk_Agent.services.executors import data_executor, executor_stats, ExecutorSaturated
+from Adk_Agent.services.scheduler import scheduler, SCHEDULER_ENABLED
+from Adk_Agent.services.live_updates import hub, format_sse
+from Adk_Agent.services.tracing import TraceMiddleware, tracing_stats
+from Adk_Agent.data_access.compact import id_codecs
+from Adk_Agent.data_access.incremental import ingest_incoming
+from Adk_Agent.data_access.registry import registry
+from Adk_Agent.data_access.rollups import ALL
+from Adk_Agent.data_access.schema import SCHEMAS
+from Adk_Agent.services.metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, MetricsMiddleware, gauge, render_metrics
+
+STREAM_HEARTBEAT_SECONDS = 15
+
+logger = logging.getLogger(__name__)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Start the monitoring scheduler and agent runner pool with the app and stop them on shutdown."""
+    hub.attach_loop(asyncio.get_running_loop())
+    snapshot_cache.add_listener(hub.on_snapshot)
+    if SCHEDULER_ENABLED:
+        scheduler.start()
+    try:
+        agent_pool.start()
+    except ImportError as e:
+        logger.warning("Agent runner pool not started: %s", e)
+    yield
+    scheduler.stop()
+    agent_pool.stop()
+    data_executor.shutdown(wait=False)
 
 
 app = FastAPI(
     title="Agentic BI Copilot API",
     description="FastAPI backend for Business Intelligence Copilot with AI agent",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # CORS configuration
@@ -40,6 +80,23 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+# Root span per request (no-op unless TRACE_EXPORTER is console or file)
+app.add_middleware(TraceMiddleware)
+app.add_middleware(MetricsMiddleware)
+
+
+@app.exception_handler(ExecutorSaturated)
+async def executor_saturated_handler(request: Request, exc: ExecutorSaturated):
+    """Shed load with 503 when a worker pool queue is full."""
+    return JSONResponse(status_code=503, content={"detail": str(exc)}, headers={"Retry-After": "1"})
+
+
+async def _cached_snapshot():
+    """Serve a fresh cached snapshot inline; otherwise compute it on the data pool."""
+    snapshot = snapshot_cache.get_if_fresh()
+    if snapshot is None:
+        snapshot = await data_executor.run(get_monitoring_snapshot)
+    return snapshot
 
 
 # ========================
@@ -64,6 +121,21 @@ class MonitoringOverviewResponse(BaseModel):
 class RisksResponse(BaseModel):
     active_risks: List[Dict[str, Any]]
     historical_risks: List[Dict[str, Any]]
+    next_cursor: Optional[str] = None
+    active_next_cursor: Optional[str] = None  # set when more than MAX_PAGE_SIZE risks are active
+
+
+MAX_PAGE_SIZE = 1000
+
+
+def risk_filters(
+    risk_type: Optional[str] = None,
+    severity: Optional[str] = None,
+    since: Optional[str] = Query(None, description="Inclusive ISO timestamp lower bound"),
+    until: Optional[str] = Query(None, description="Exclusive ISO timestamp upper bound"),
+) -> Dict[str, Any]:
+    """Risk filters shared by the paginated and export endpoints."""
+    return {"risk_type": risk_type, "severity": severity, "since": since, "until": until}
 
 
 # ========================
@@ -77,46 +149,90 @@ async def agent_query(request: AgentQueryRequest):
     
     Passes user question to the agent, which invokes tools and generates
     natural language response with optional visualization specs.
+    Runs on the shared runner pool; requests with the same session_id
+    continue the same ADK conversation.
     """
     try:
-        # Lazy import to avoid circular dependencies
-        from Adk_Agent.agent.agent import root_agent
-        from Adk_Agent.services.visualization import should_visualize
-        
-        question = request.question
-        
-        # Invoke the agent
-        # Note: ADK agent returns response via its run method
-        # For now, we'll provide a wrapper that calls the agent
-        # and formats the response appropriately
-        
-        # Call the agent (this will use tools internally)
-        response = root_agent.run(question)
-        
-        # Extract text response
-        if hasattr(response, 'text'):
-            text_response = response.text
-        elif isinstance(response, str):
-            text_response = response
-        else:
-            text_response = str(response)
-        
-        # For MVP, we'll return text-only response
-        # Advanced: Parse agent's tool usage to generate visualization specs
-        result = create_agent_response(text=text_response)
-        
-        # Log the interaction to memory
-        log_insight("conversation", {
-            "question": question,
-            "response_preview": text_response[:200] if len(text_response) > 200 else text_response
-        })
-        
+        result = await agent_pool.run(request.question, request.session_id)
         return AgentQueryResponse(**result)
-        
+    except ExecutorSaturated:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Agent query failed: {str(e)}")
 
 
+@app.post("/agent/query/stream")
+async def agent_query_stream(request: AgentQueryRequest):
+    """
+    Streaming variant of /agent/query (server-sent events).
+    Emits `tool_call` / `tool_result` progress events and `token` events with
+    partial answer text while the agent runs, then a `done` event with the
+    same payload as /agent/query (text + visuals). Failures end the stream
+    with an `error` event.
+    """
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue = asyncio.Queue()
+
+    def emit(name: str, data: Dict[str, Any]):
+        # Called from the runner pool thread
+        loop.call_soon_threadsafe(queue.put_nowait, (name, json.dumps(data, default=str)))
+
+    # Admission happens here so a saturated pool is a 503, not a broken stream
+    future = agent_pool.submit(request.question, request.session_id, emit)
+    future.add_done_callback(lambda _: queue.put_nowait(None))
+
+    async def events():
+        while True:
+            try:
+                event = await asyncio.wait_for(queue.get(), STREAM_HEARTBEAT_SECONDS)
+            except asyncio.TimeoutError:
+                yield ": keep-alive\n\n"
+                continue
+            if event is None:
+                break
+            yield format_sse(event)
+        if future.exception() is not None:
+            detail = json.dumps({"detail": f"Agent query failed: {future.exception()}"})
+            yield format_sse(("error", detail))
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@app.get("/agent/pool")
+async def agent_pool_stats():
+    """Runner pool queue depth, admission rejections, wait/run times and per-slot sessions."""
+    return agent_pool.stats()
+
+
+@app.get("/agent/tools/stats")
+async def agent_tool_stats():
+    """Estimated tool output tokens before/after compaction, and tool result cache counters."""
+    return {"output": tool_output_stats(), "cache": tool_cache_stats()}
+
+
+@app.get("/agent/sessions/{session_id}")
+async def agent_session(session_id: str, limit: int = 10):
+    """
+    Retrieve the conversation memory of one session: recent insights,
+    session preferences and agent session state.
+    """
+    session = session_store.get(session_id, create=False)
+    if session is None:
+        raise HTTPException(status_code=404, detail=f"Session {session_id} not found")
+    return {
+        "session_id": session.session_id,
+        "insights": list(reversed(session.insights))[:limit],
+        "preferences": session.preferences,
+        "state": session.state,
+        "created_at": session.created_at,
+        "updated_at": session.updated_at,
+    }
+
+
 # ========================
 # MONITORING DASHBOARD ENDPOINT
 # ========================
@@ -130,7 +246,7 @@ async def monitoring_overview():
     Designed for periodic refresh in frontend.
     """
     try:
-        snapshot = compute_monitoring_snapshot()
+        snapshot = await _cached_snapshot()
         
         # Extract summary metrics
         summary = {
@@ -150,30 +266,120 @@ async def monitoring_overview():
             signals=signals
         )
         
+    except ExecutorSaturated:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Monitoring failed: {str(e)}")
 
 
+@app.get("/monitoring/stream")
+async def monitoring_stream(request: Request):
+    """
+    Server-sent events feed for the dashboard.
+    Sends the full snapshot on connect, then `delta` events with only the
+    changed metric/status fields and `risks` events with new/resolved risks.
+    A `snapshot` event is re-sent if the client falls behind.
+    """
+    sub = hub.subscribe()
+
+    async def events():
+        try:
+            snapshot = await _cached_snapshot()
+            yield format_sse(("snapshot", json.dumps(snapshot, default=str)))
+            while not await request.is_disconnected():
+                event = await sub.next(timeout=STREAM_HEARTBEAT_SECONDS)
+                if event is None:
+                    yield ": keep-alive\n\n"
+                elif event[0] == "resync":
+                    snapshot = await _cached_snapshot()
+                    yield format_sse(("snapshot", json.dumps(snapshot, default=str)))
+                else:
+                    yield format_sse(event)
+        finally:
+            sub.close()
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@app.websocket("/monitoring/ws")
+async def monitoring_websocket(websocket: WebSocket):
+    """WebSocket variant of /monitoring/stream; messages are {"event": ..., "data": ...}."""
+    await websocket.accept()
+    sub = hub.subscribe()
+    try:
+        snapshot = await _cached_snapshot()
+        await websocket.send_text(json.dumps({"event": "snapshot", "data": snapshot}, default=str))
+        while True:
+            event = await sub.next(timeout=STREAM_HEARTBEAT_SECONDS)
+            if event is None:
+                await websocket.send_text('{"event": "keep-alive", "data": {}}')
+            elif event[0] == "resync":
+                snapshot = await _cached_snapshot()
+                await websocket.send_text(json.dumps({"event": "snapshot", "data": snapshot}, default=str))
+            else:
+                name, payload = event
+                await websocket.send_text(f'{{"event": "{name}", "data": {payload}}}')
+    except WebSocketDisconnect:
+        pass
+    finally:
+        sub.close()
+
+
+@app.get("/monitoring/stream/stats")
+async def monitoring_stream_stats():
+    """Connected streaming clients and dropped-event counters."""
+    return hub.stats()
+
+
+@app.get("/monitoring/cache")
+async def monitoring_cache_stats():
+    """Snapshot cache hit/miss counters and age of the cached snapshot, plus agent tool cache counters."""
+    return {**snapshot_cache_stats(), "tools": tool_cache_stats()}
+
+
 # ========================
 # RISKS ENDPOINT
 # ========================
 
 @app.get("/risks", response_model=RisksResponse)
-async def get_risks():
+async def get_risks(
+    filters: Dict[str, Any] = Depends(risk_filters),
+    cursor: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE),
+    active_cursor: Optional[str] = None,
+):
     """
     Retrieve active and historical business risks.
     
     Powers the Risks page with severity, timestamps, and status.
+    Historical risks are paginated newest first; pass `next_cursor` back as
+    `cursor` to fetch the next page. Active risks come in pages of
+    MAX_PAGE_SIZE; when more are active, pass `active_next_cursor` back as
+    `active_cursor`.
     """
     try:
-        active = get_active_risks()
-        historical = get_historical_risks()
+        active = await data_executor.run(
+            get_risks_page, status="ACTIVE", cursor=active_cursor, limit=MAX_PAGE_SIZE, **filters
+        )
+        historical = await data_executor.run(
+            get_risks_page, status="RESOLVED", cursor=cursor, limit=limit, **filters
+        )
         
         return RisksResponse(
-            active_risks=active,
-            historical_risks=historical
+            active_risks=active["risks"],
+            historical_risks=historical["risks"],
+            next_cursor=historical["next_cursor"],
+            active_next_cursor=active["next_cursor"],
         )
         
+    except ExecutorSaturated:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Risks retrieval failed: {str(e)}")
 
@@ -186,7 +392,9 @@ async def get_risks():
 async def legacy_monitoring():
     """Legacy endpoint - full monitoring snapshot."""
     try:
-        return compute_monitoring_snapshot()
+        return await _cached_snapshot()
+    except ExecutorSaturated:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -195,43 +403,72 @@ async def legacy_monitoring():
 async def legacy_active_risks():
     """Legacy endpoint - active risks only."""
     try:
-        risks = get_active_risks()
+        risks = await data_executor.run(get_active_risks)
         return {"risks": risks, "count": len(risks)}
+    except ExecutorSaturated:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @app.get("/api/risks/historical")
-async def legacy_historical_risks():
-    """Legacy endpoint - historical risks."""
+async def legacy_historical_risks(
+    filters: Dict[str, Any] = Depends(risk_filters),
+    cursor: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE),
+):
+    """Legacy endpoint - historical risks (paginated, newest first)."""
     try:
-        risks = get_historical_risks()
-        return {"risks": risks, "count": len(risks)}
+        return await data_executor.run(get_risks_page, status="RESOLVED", cursor=cursor, limit=limit, **filters)
+    except ExecutorSaturated:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @app.get("/api/risks/all")
-async def legacy_all_risks():
-    """Legacy endpoint - all risks."""
+async def legacy_all_risks(
+    filters: Dict[str, Any] = Depends(risk_filters),
+    status: Optional[str] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE),
+):
+    """Legacy endpoint - all risks (paginated, newest first)."""
     try:
-        risks = get_all_risks()
-        return {"risks": risks, "count": len(risks)}
+        return await data_executor.run(get_risks_page, status=status, cursor=cursor, limit=limit, **filters)
+    except ExecutorSaturated:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.get("/api/risks/export")
+async def export_risks(filters: Dict[str, Any] = Depends(risk_filters), status: Optional[str] = None):
+    """Bulk export of matching risks as NDJSON, streamed in bounded batches."""
+    def lines():
+        for risk in iter_risks(status=status, **filters):
+            yield json.dumps(risk, default=str) + "\n"
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+
 @app.post("/api/risks/generate")
 async def legacy_generate_risks():
     """Legacy endpoint - generate risks from monitoring."""
     try:
-        snapshot = compute_monitoring_snapshot()
-        new_risks = generate_risks_from_monitoring(snapshot)
-        store_risks(new_risks)
+        snapshot = await _cached_snapshot()
+        new_risks = await data_executor.run(store_risks, generate_risks_from_monitoring(snapshot))
+        hub.on_risks(new_risks, [])
         return {
             "message": f"Generated {len(new_risks)} new risks",
             "risks": new_risks
         }
+    except ExecutorSaturated:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -240,8 +477,10 @@ async def legacy_generate_risks():
 async def legacy_resolve_risk(risk_id: str):
     """Legacy endpoint - resolve a risk."""
     try:
-        resolve_risk(risk_id)
+        await data_executor.run(resolve_risk, risk_id)
         return {"message": f"Risk {risk_id} resolved"}
+    except ExecutorSaturated:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -250,8 +489,11 @@ async def legacy_resolve_risk(risk_id: str):
 async def legacy_auto_resolve():
     """Legacy endpoint - auto-resolve stale risks."""
     try:
-        auto_resolve_stale_risks()
+        resolved = await data_executor.run(auto_resolve_stale_risks)
+        hub.on_risks([], resolved)
         return {"message": "Stale risks auto-resolved"}
+    except ExecutorSaturated:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -260,12 +502,124 @@ async def legacy_auto_resolve():
 async def legacy_aov():
     """Legacy endpoint - average order value."""
     try:
-        aov = get_average_order_value()
+        aov = await data_executor.run(get_average_order_value)
         return {"average_order_value": round(aov, 2)}
+    except ExecutorSaturated:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.get("/api/executors")
+async def executor_metrics():
+    """Queue depth, wait and run times of the data executor and the agent runner pool."""
+    return {**executor_stats(), "agent": agent_pool.stats()}
+
+
+@app.get("/api/datasets/memory")
+async def dataset_memory():
+    """Per-table memory report of the cached frames (dtype and bytes per column, saving over raw) and ID codecs."""
+    return {
+        "tables": registry.memory_report(),
+        "id_codecs": {name: codec.stats() for name, codec in id_codecs.items()},
+    }
+
+
+@app.get("/api/datasets/quality")
+async def dataset_quality():
+    """
+    Data-quality report of each source table's latest ingestion: rows in/out,
+    rows dropped by null policy, unparseable values, filled nulls, missing or
+    unexpected columns and duplicate keys.
+    """
+    def load_sources():
+        for name in SCHEMAS:
+            registry.ensure(name)
+        return registry.quality_report()
+
+    try:
+        return await data_executor.run(load_sources)
+    except ExecutorSaturated:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+ROLLUP_TABLES = ("invoices", "orders")
+
+
+@app.get("/api/rollups/{table}")
+async def dataset_rollup(
+    table: str,
+    dimension: str = Query(ALL, description="all, or a dimension: segment, region (orders also: channel)"),
+    days: int = Query(30, ge=1, le=3660, description="Days back from the latest day in the rollup"),
+):
+    """Materialized daily rollup of invoices or orders, overall or per dimension member."""
+    if table not in ROLLUP_TABLES:
+        raise HTTPException(status_code=404, detail=f"No rollup for table {table}")
+
+    def read_rollup():
+        rollup = registry.aggregate(table, "rollup")
+        if dimension != ALL and dimension not in rollup.dimensions():
+            raise HTTPException(status_code=404, detail=f"Unknown dimension {dimension} for {table}")
+        rows = rollup.recent(days, dimension)
+        rows["date"] = rows["date"].dt.strftime("%Y-%m-%d")
+        return {
+            "table": table,
+            "dimension": dimension,
+            "dimensions": rollup.dimensions(),
+            "rows": rows.to_dict("records"),
+        }
+
+    try:
+        return await data_executor.run(read_rollup)
+    except (HTTPException, ExecutorSaturated):
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.get("/api/ingest")
+async def ingest_status():
+    """Watermark, delta segments and incremental ingestion totals of each append-only table."""
+    try:
+        return await data_executor.run(registry.watermarks)
+    except ExecutorSaturated:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.post("/api/ingest")
+async def ingest_pending():
+    """Append the files waiting in the incremental drop folder (data/incoming/<table>/) now."""
+    try:
+        return {"tables": await data_executor.run(ingest_incoming)}
+    except ExecutorSaturated:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.get("/api/tracing")
+async def tracing_status():
+    """Trace exporter in use, exported trace count and spans dropped after their trace closed."""
+    return tracing_stats()
+
+
+@app.get("/api/scheduler")
+async def scheduler_status():
+    """Background scheduler state and last run of each job."""
+    return scheduler.stats()
+
+
+@app.post("/api/scheduler/trigger")
+async def scheduler_trigger():
+    """Recompute the snapshot and risks now instead of waiting for the next cycle."""
+    scheduler.trigger()
+    return {"message": "Scheduler triggered"}
+
+
 @app.get("/api/health")
 async def health_check():
     """Health check endpoint."""
@@ -277,6 +631,20 @@ async def health_check():
     }
 
 
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Prometheus scrape endpoint: route latency histograms, in-flight requests, data/cache/store gauges and worker pools."""
+    pools = {**executor_stats(), "agent": agent_pool.stats()}
+    extra = gauge("copilot_executor_queue_depth", "Tasks waiting in each worker pool.",
+                  [({"pool": name}, stats["queue_depth"]) for name, stats in pools.items()])
+    extra += gauge("copilot_executor_active", "Tasks running in each worker pool.",
+                   [({"pool": name}, stats["active"]) for name, stats in pools.items()])
+    extra += gauge("copilot_executor_rejected_total", "Tasks rejected with 503 by each worker pool.",
+                   [({"pool": name}, stats["rejected"]) for name, stats in pools.items()], kind="counter")
+    body = await data_executor.run(render_metrics, extra)
+    return PlainTextResponse(body, media_type=METRICS_CONTENT_TYPE)
+
+
 @app.get("/")
 async def root():
     """Root endpoint with API info."""
@@ -287,7 +655,8 @@ async def root():
             "agent": "POST /agent/query",
             "monitoring": "GET /monitoring/overview",
             "risks": "GET /risks",
-            "health": "GET /api/health"
+            "health": "GET /api/health",
+            "metrics": "GET /metrics"
         },
         "docs": "/docs"
     }
@@ -301,6 +670,7 @@ if __name__ == "__main__":
     print("   GET  /monitoring/overview  - Business health dashboard")
     print("   GET  /risks                - Active and historical risks")
     print("   GET  /api/health           - Health check")
+    print("   GET  /metrics              - Prometheus metrics")
     print("   GET  /docs                 - Interactive API documentation")
     print("\n🌐 Server running on http://localhost:8001")
     
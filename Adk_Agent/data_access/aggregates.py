@@ -0,0 +1,148 @@
+"""
+Incremental aggregators.
+An aggregator is fed every validated (and compacted) chunk of a table while it
+is being ingested and keeps only running totals, so KPIs over tables that are
+larger than memory never need the full frame. DatasetSpec.aggregators names the
+factories the registry runs for each table; results are read back with
+registry.aggregate(table, name). Persistent aggregators can be saved as a frame
+and restored, which lets a warm start skip replaying the table, and retract()
+takes rows back out when incremental ingestion replaces them.
+"""
+from typing import Any, Dict, Optional
+
+import pandas as pd
+from pandas.api.types import is_integer_dtype
+
+from .compact import COMPACT_ENABLED, codec_for
+
+
+class Aggregator:
+    """Running aggregate over the chunks of one table."""
+
+    persistent = False  # implements state()/restore()
+
+    def update(self, chunk: pd.DataFrame):
+        raise NotImplementedError
+
+    def retract(self, chunk: pd.DataFrame):
+        """Undo update() for rows that are being replaced by a newer version."""
+        raise NotImplementedError
+
+    def result(self) -> Any:
+        raise NotImplementedError
+
+    def state(self) -> Optional[pd.DataFrame]:
+        """Flat frame restore() rebuilds this aggregator from (persistent aggregators only)."""
+        return None
+
+    def restore(self, state: pd.DataFrame):
+        raise NotImplementedError
+
+
+def _add(total: pd.Series, part: pd.Series) -> pd.Series:
+    """Sum two keyed series (keys missing on one side count as zero)."""
+    if total.empty:
+        return part
+    return total.add(part, fill_value=0)
+
+
+class SpendAggregator(Aggregator):
+    """Total `amount` per `key` (e.g. invoice spend per customer); rows without a key are skipped."""
+
+    persistent = True
+
+    def __init__(self, key: str = "customer_id", amount: str = "invoice_amount"):
+        self.key, self.amount = key, amount
+        self.spend = pd.Series(dtype="float64")
+
+    def update(self, chunk: pd.DataFrame):
+        if chunk.empty:
+            return
+        self.spend = _add(self.spend, chunk[self.amount].astype("float64").groupby(chunk[self.key]).sum())
+
+    def retract(self, chunk: pd.DataFrame):
+        if chunk.empty:
+            return
+        self.spend = _add(self.spend, -chunk[self.amount].astype("float64").groupby(chunk[self.key]).sum())
+        self.spend = self.spend[self.spend != 0]
+
+    def result(self) -> pd.Series:
+        return self.spend
+
+    def state(self) -> pd.DataFrame:
+        keys = pd.Series(self.spend.index)
+        if is_integer_dtype(keys):
+            # Codes of irregular IDs are process-local, so the state keeps the ID strings
+            keys = codec_for(self.key).decode(keys)
+        return pd.DataFrame({"key": keys.astype("string").to_numpy(), "amount": self.spend.to_numpy()})
+
+    def restore(self, state: pd.DataFrame):
+        keys = state["key"].astype("string")
+        if COMPACT_ENABLED:
+            keys = codec_for(self.key).encode(keys)
+        self.spend = pd.Series(state["amount"].astype("float64").to_numpy(), index=pd.Index(keys))
+
+
+def _decode_key(column: str, value) -> Optional[str]:
+    if value is None:
+        return None
+    if isinstance(value, str):
+        return value
+    return codec_for(column).decode(pd.Series([value])).iloc[0]
+
+
+class WatermarkAggregator(Aggregator):
+    """
+    Incremental-ingestion watermark: the latest `date_column` value and the
+    highest `key` ingested so far, plus the current row count. Keys compare as
+    their integer codes (the number in CUST00042) or, uncompacted, as strings.
+    Watermarks only move forward; retract() just adjusts the row count.
+    """
+
+    persistent = True
+
+    def __init__(self, date_column: str, key: str):
+        self.date_column, self.key = date_column, key
+        self.date: Optional[pd.Timestamp] = None
+        self.max_key = None  # in the frame's representation (code or string)
+        self.rows = 0
+
+    def update(self, chunk: pd.DataFrame):
+        self.rows += len(chunk)
+        latest = chunk[self.date_column].max() if not chunk.empty else None
+        if pd.notna(latest) and (self.date is None or latest > self.date):
+            self.date = latest
+        keys = chunk[self.key].dropna()
+        if not keys.empty:
+            top = keys.max()
+            top = top.item() if hasattr(top, "item") else top
+            if self.max_key is None or top > self.max_key:
+                self.max_key = top
+
+    def retract(self, chunk: pd.DataFrame):
+        self.rows -= len(chunk)
+
+    def result(self) -> Dict[str, Any]:
+        return {
+            "date": self.date,
+            "key": self.max_key,
+            "key_id": _decode_key(self.key, self.max_key),
+            "rows": self.rows,
+        }
+
+    def state(self) -> pd.DataFrame:
+        return pd.DataFrame({
+            "date": pd.Series([self.date], dtype="datetime64[us]"),
+            "key": pd.Series([_decode_key(self.key, self.max_key)], dtype="string"),
+            "rows": [self.rows],
+        })
+
+    def restore(self, state: pd.DataFrame):
+        row = state.iloc[0]
+        self.date = None if pd.isna(row["date"]) else row["date"]
+        self.rows = int(row["rows"])
+        key = None if pd.isna(row["key"]) else str(row["key"])
+        if key is not None and COMPACT_ENABLED:
+            key = codec_for(self.key).encode(pd.Series([key])).iloc[0]
+            key = key.item() if hasattr(key, "item") else key
+        self.max_key = key
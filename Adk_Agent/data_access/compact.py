@@ -0,0 +1,206 @@
+"""
+Compact table representation.
+Shrinks normalized frames before the registry caches them:
+- low-cardinality text columns (segment, region, status, ...) become categoricals
+- ID columns become integers through one IdCodec per column name, so a
+  customer_id has the same code in customers, invoices and orders
+- integer-valued numeric columns are downcast to the smallest integer dtype
+Float columns stay float64 so money totals keep their precision. Frames that
+leave the data layer as records go through decode_ids() first. Set
+DATASET_COMPACT=0 to keep the raw dtypes.
+"""
+import os
+import threading
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import (
+    is_bool_dtype, is_float_dtype, is_integer_dtype, is_numeric_dtype, union_categoricals,
+)
+
+COMPACT_ENABLED = os.getenv("DATASET_COMPACT", "1") != "0"
+
+CATEGORICAL_COLUMNS = (
+    "segment", "industry", "region", "status", "payment_status", "order_status", "sales_channel", "category",
+)
+ID_COLUMNS = ("customer_id", "invoice_id", "order_id", "product_id")
+
+_ID_PATTERN = r"^(\D*)(\d+)$"
+
+
+class IdCodec:
+    """
+    Integer encoding for one ID column. IDs shaped like the dominant
+    PREFIX + zero-padded number (CUST00042) encode to that number (42) and
+    decode without a stored lookup; any other value gets a negative code from
+    an append-only dictionary. Codes never change once assigned.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.prefix: Optional[str] = None
+        self.width = 0
+        self._irregular: List[str] = []
+        self._codes: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def _learn_pattern(self, prefixes: pd.Series, digits: pd.Series):
+        if self.prefix is not None or prefixes.empty:
+            return
+        shapes = (prefixes + "|" + digits.str.len().astype(str)).value_counts()
+        prefix, width = shapes.index[0].rsplit("|", 1)
+        self.prefix, self.width = prefix, int(width)
+
+    def _is_regular(self, prefixes: pd.Series, digits: pd.Series) -> pd.Series:
+        if self.prefix is None:
+            return pd.Series(False, index=prefixes.index)
+        lengths = digits.str.len()
+        # Longer numbers without a leading zero still round-trip through zfill
+        fits = (lengths == self.width) | ((lengths > self.width) & ~digits.str.startswith("0"))
+        return ((prefixes == self.prefix) & fits).fillna(False).astype(bool)
+
+    def encode(self, values: pd.Series) -> pd.Series:
+        """Codes for `values` (NA stays NA), downcast to the smallest integer dtype."""
+        text = values.astype("string")
+        parts = text.str.extract(_ID_PATTERN)
+        with self._lock:
+            matched = parts.dropna()
+            self._learn_pattern(matched[0], matched[1])
+            regular = self._is_regular(parts[0], parts[1])
+            codes = pd.Series(np.zeros(len(text), dtype=np.int64), index=values.index)
+            codes[regular] = parts.loc[regular, 1].astype(np.int64).to_numpy()
+            irregular = ~regular & text.notna()
+            for value in text[irregular].unique():
+                if value not in self._codes:
+                    self._irregular.append(value)
+                    self._codes[value] = -len(self._irregular)
+            codes[irregular] = text[irregular].map(self._codes).astype(np.int64).to_numpy()
+        missing = text.isna()
+        if missing.any():
+            codes = codes.astype("Int64")
+            codes[missing] = pd.NA
+        return pd.to_numeric(codes, downcast="integer")
+
+    def decode(self, codes: pd.Series) -> pd.Series:
+        """Original ID strings for `codes` (object dtype, None for NA)."""
+        out = pd.Series([None] * len(codes), index=codes.index, dtype=object)
+        present = codes.dropna().astype(np.int64)
+        regular = present[present >= 0]
+        if not regular.empty:
+            out[regular.index] = (self.prefix + regular.astype(str).str.zfill(self.width)).to_numpy()
+        with self._lock:
+            for index, code in present[present < 0].items():
+                out[index] = self._irregular[-code - 1]
+        return out
+
+    def code_for(self, value: str) -> Optional[int]:
+        """Code of a single ID, or None when it has never been encoded."""
+        text = pd.Series([value], dtype="string")
+        parts = text.str.extract(_ID_PATTERN)
+        if bool(self._is_regular(parts[0], parts[1]).iloc[0]):
+            return int(parts.iloc[0, 1])
+        return self._codes.get(value)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"prefix": self.prefix, "width": self.width, "dictionary_entries": len(self._irregular)}
+
+
+id_codecs: Dict[str, IdCodec] = {name: IdCodec(name) for name in ID_COLUMNS}
+_codecs_lock = threading.Lock()
+
+
+def codec_for(column: str) -> IdCodec:
+    """The shared codec for an ID column, created on first use."""
+    with _codecs_lock:
+        if column not in id_codecs:
+            id_codecs[column] = IdCodec(column)
+        return id_codecs[column]
+
+
+def _downcast(series: pd.Series) -> pd.Series:
+    if is_bool_dtype(series) or not is_numeric_dtype(series):
+        return series
+    if is_integer_dtype(series):
+        return pd.to_numeric(series, downcast="integer")
+    if is_float_dtype(series) and series.notna().all() and (series % 1 == 0).all():
+        return pd.to_numeric(series.astype(np.int64), downcast="integer")
+    return series
+
+
+def compact_frame(
+    df: pd.DataFrame, categorical: Iterable[str] = CATEGORICAL_COLUMNS, ids: Iterable[str] = ID_COLUMNS
+) -> pd.DataFrame:
+    """
+    Return `df` with categorical, integer-coded ID and downcast numeric
+    columns. `categorical` and `ids` name the columns to convert (a table's
+    schema supplies them; the defaults cover the known business columns).
+    """
+    if not COMPACT_ENABLED:
+        return df
+    categorical, ids = set(categorical), set(ids)
+    df = df.copy(deep=False)
+    for column in df.columns:
+        series = df[column]
+        if column in ids:
+            if not is_integer_dtype(series):
+                df[column] = codec_for(column).encode(series)
+        elif column in categorical:
+            if not isinstance(series.dtype, pd.CategoricalDtype):
+                df[column] = series.astype("category")
+        else:
+            df[column] = _downcast(series)
+    return df
+
+
+def concat_compact(frames: List[pd.DataFrame]) -> pd.DataFrame:
+    """
+    Concatenate compacted chunks of one table. Categorical columns are
+    re-coded over the union of their categories (plain concat would fall back
+    to object) and numeric columns are downcast again over the whole result.
+    With compaction disabled, integer-valued float columns (chunks are parsed
+    to float64) are restored to int64, as a whole-sheet read would infer them.
+    """
+    if not COMPACT_ENABLED:
+        df = frames[0] if len(frames) == 1 else pd.concat(frames, ignore_index=True)
+        return df.assign(**{
+            c: df[c].astype(np.int64) for c in df.columns
+            if len(df) and is_float_dtype(df[c]) and df[c].notna().all() and (df[c] % 1 == 0).all()
+        })
+    if len(frames) == 1:
+        return compact_frame(frames[0], categorical=(), ids=())
+    frames = [f.copy(deep=False) for f in frames]
+    for column in frames[0].columns:
+        dtypes = [f[column].dtype for f in frames]
+        if all(isinstance(d, pd.CategoricalDtype) for d in dtypes):
+            union = union_categoricals([f[column] for f in frames]).categories
+            for f in frames:
+                f[column] = f[column].cat.set_categories(union)
+    return compact_frame(pd.concat(frames, ignore_index=True), categorical=(), ids=())
+
+
+def decode_ids(df: pd.DataFrame) -> pd.DataFrame:
+    """Copy of `df` with integer-coded ID columns turned back into strings (for records leaving the data layer)."""
+    coded = [c for c in df.columns if c in id_codecs and is_integer_dtype(df[c])]
+    if not coded:
+        return df
+    df = df.copy(deep=False)
+    for column in coded:
+        df[column] = id_codecs[column].decode(df[column])
+    return df
+
+
+def memory_report(df: pd.DataFrame, raw_bytes: Optional[int] = None) -> Dict[str, Any]:
+    """Deep memory use of `df` per column, with the saving versus `raw_bytes` when known."""
+    usage = df.memory_usage(deep=True, index=False)
+    total = int(usage.sum())
+    report = {
+        "rows": len(df),
+        "bytes": total,
+        "bytes_per_row": round(total / len(df), 1) if len(df) else 0.0,
+        "columns": {c: {"dtype": str(df[c].dtype), "bytes": int(usage[c])} for c in df.columns},
+    }
+    if raw_bytes is not None:
+        report["raw_bytes"] = raw_bytes
+        report["reduction_pct"] = round((1 - total / raw_bytes) * 100, 1) if raw_bytes else 0.0
+    return report
@@ -0,0 +1,33 @@
+"""
+Columnar on-disk cache for the XLSX datasets.
+Each workbook is parsed once and stored as Parquet in a `.cache` folder next to
+the source (written by streaming.py). The cache file name carries the source
+mtime/size stamp, so any change to the workbook triggers a rebuild on the next
+load, and a `variant` (the schema fingerprint) so a change in the parsing rules
+does too.
+"""
+import os
+from pathlib import Path
+
+CACHE_DIRNAME = ".cache"
+CACHE_ENABLED = os.getenv("DATASET_CACHE", "1").lower() not in ("0", "false", "no")
+
+
+def source_stamp(path: Path) -> str:
+    """Return a cheap version stamp for a source file (mtime + size)."""
+    stat = Path(path).stat()
+    return f"{stat.st_mtime_ns:x}-{stat.st_size:x}"
+
+
+def cache_path(path: Path, stamp: str, variant: str = "") -> Path:
+    """Return the Parquet cache location for a source file at a given stamp."""
+    path = Path(path)
+    suffix = f".{variant}" if variant else ""
+    return path.parent / CACHE_DIRNAME / f"{path.stem}.{stamp}{suffix}.parquet"
+
+
+def drop_stale(path: Path, target: Path):
+    """Remove cached copies of `path` other than `target`."""
+    for stale in target.parent.glob(f"{Path(path).stem}.*.parquet"):
+        if stale != target:
+            stale.unlink(missing_ok=True)
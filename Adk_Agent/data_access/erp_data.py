@@ -1,38 +1,38 @@
-import pandas as pd
-from datetime import datetime, timedelta
-from ..services.path_utils import get_data_dir
+from datetime import timedelta
+from .registry import get_aggregate, get_rollup
+from ..services.tracing import traced
 
-DATA_DIR = get_data_dir()
 
+def _daily_invoices():
+    """Per-day invoice rollup (revenue, counts, overdue amounts, payment terms)."""
+    return get_rollup("invoices").daily()
 
-def _load_customers():
-    path = DATA_DIR / "crm_customers_20000.xlsx"
-    if not path.exists():
-        return pd.DataFrame({"customer_id": [], "customer_name": [], "segment": [], "last_order_date": [], "lifetime_value": []})
-    df = pd.read_excel(path)
-    df["last_order_date"] = pd.to_datetime(df.get("last_order_date"), errors="coerce")
-    df["lifetime_value"] = pd.to_numeric(df.get("lifetime_value"), errors="coerce").fillna(0)
-    return df
 
+def weekly_revenue(daily):
+    """Revenue of the last 7 days (from the latest invoice day) and the weekly run-rate of that window."""
+    week_start = daily.index.max() - timedelta(days=7)
+    recent_window = daily.loc[daily.index >= week_start, "revenue"]
+    last_week_revenue = recent_window.sum()
+    weekly_avg = last_week_revenue if recent_window.empty else recent_window.mean() * 7
+    return last_week_revenue, weekly_avg
 
-def _load_invoices():
-    path = DATA_DIR / "erp_invoices_22000.xlsx"
-    if not path.exists():
-        return pd.DataFrame({"invoice_date": [], "invoice_amount": [], "payment_status": [], "due_date": []})
-    df = pd.read_excel(path)
-    df["invoice_date"] = pd.to_datetime(df.get("invoice_date"), errors="coerce")
-    df["due_date"] = pd.to_datetime(df.get("due_date"), errors="coerce")
-    df["invoice_amount"] = pd.to_numeric(df.get("invoice_amount"), errors="coerce").fillna(0)
-    df = df.dropna(subset=["invoice_date"])
-    return df
+
+def payment_terms(daily):
+    """Average payment-term days, overdue invoice count and overdue amount over all days."""
+    count = daily["term_days_count"].sum()
+    return {
+        "avg_days_to_payment": float(round(daily["term_days_total"].sum() / count if count else 0.0, 2)),
+        "overdue_invoices": int(daily["overdue_count"].sum()),
+        "overdue_amount": float(round(daily["overdue_amount"].sum(), 2)),
+    }
 
 
+@traced()
 def compute_finance_kpis():
     """Compute finance and payment health metrics using invoice data."""
-    customers_df = _load_customers()
-    invoices_df = _load_invoices()
+    daily = _daily_invoices()
 
-    if invoices_df.empty:
+    if daily.empty:
         return {
             "total_spend": 0.0,
             "avg_spend_per_customer": 0.0,
@@ -40,25 +40,10 @@ def compute_finance_kpis():
             "weekly_cash_flow_avg": 0.0,
         }
 
-    total_invoice_amount = invoices_df["invoice_amount"].sum()
-    spend_per_customer = invoices_df.groupby("customer_id")["invoice_amount"].sum()
+    total_invoice_amount = daily["revenue"].sum()
+    spend_per_customer = get_aggregate("invoices", "spend")
     avg_spend_per_customer = spend_per_customer.mean() if not spend_per_customer.empty else 0.0
-
-    most_recent_date = invoices_df["invoice_date"].max()
-    week_start = most_recent_date - timedelta(days=7)
-    last_week_revenue = invoices_df[invoices_df["invoice_date"] >= week_start]["invoice_amount"].sum()
-
-    recent_window = invoices_df[invoices_df["invoice_date"] >= week_start]
-    if recent_window.empty:
-        weekly_avg = last_week_revenue
-    else:
-        daily_avg = (
-            recent_window
-            .groupby(recent_window["invoice_date"].dt.date)["invoice_amount"]
-            .sum()
-            .mean()
-        )
-        weekly_avg = daily_avg * 7
+    last_week_revenue, weekly_avg = weekly_revenue(daily)
 
     return {
         "total_spend": float(round(total_invoice_amount, 2)),
@@ -77,21 +62,10 @@ def detect_finance_anomaly(kpis):
     return {"is_anomaly": is_anomaly, "severity": severity}
 
 
+@traced()
 def payment_cycle_health():
     """Return payment cycle metrics derived from invoice terms."""
-    invoices_df = _load_invoices()
-    if invoices_df.empty:
+    daily = _daily_invoices()
+    if daily.empty:
         return {"avg_days_to_payment": 0.0, "overdue_invoices": 0, "overdue_amount": 0.0}
-
-    term_days = (invoices_df["due_date"] - invoices_df["invoice_date"]).dt.days
-    avg_days = term_days[term_days >= 0].mean() if not term_days.empty else 0.0
-
-    overdue_mask = invoices_df["payment_status"].str.contains("Overdue", case=False, na=False)
-    overdue_df = invoices_df[overdue_mask]
-    overdue_amount = overdue_df["invoice_amount"].sum() if not overdue_df.empty else 0.0
-
-    return {
-        "avg_days_to_payment": float(round(avg_days or 0.0, 2)),
-        "overdue_invoices": int(len(overdue_df)),
-        "overdue_amount": float(round(overdue_amount, 2)),
-    }
+    return payment_terms(daily)
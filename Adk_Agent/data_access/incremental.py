@@ -0,0 +1,276 @@
+"""
+Incremental append-only ingestion.
+New invoices and orders arrive as files in a drop folder (data/incoming/<table>/,
+XLSX or CSV) or from a DataConnector. Instead of re-reading the whole source,
+each batch is validated by the table schema and compared with the table's
+watermark (latest date and highest id ingested, see WatermarkAggregator):
+- rows with an id past the watermark are new
+- rows with a known-range id dated within INGEST_LOOKBACK_DAYS of the watermark
+  are looked up in the stored table and kept only if they are new or changed
+- older rows are assumed unchanged (append-only contract) and skipped
+Kept rows are written as a delta segment on top of the current version of the
+source file (data/.deltas/) and the table's aggregators are updated by the
+delta - changed rows are retracted at their stored values first - so refresh
+cost follows the change volume, not the table size. A new version of the
+source file itself is a full re-ingest that drops the deltas of the old one.
+"""
+import logging
+import os
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+import pandas as pd
+
+from .aggregates import Aggregator, WatermarkAggregator
+from .compact import compact_frame
+from .dataset_cache import CACHE_ENABLED, cache_path, source_stamp
+from .schema import CATEGORY, ID, TableSchema, merge_reports
+from .streaming import CSV_SUFFIXES, ROWS_METADATA_KEY, XLSX_SUFFIXES, iter_source_chunks, validate_chunks
+
+logger = logging.getLogger(__name__)
+
+INCREMENTAL_ENABLED = os.getenv("INGEST_INCREMENTAL", "1").lower() not in ("0", "false", "no")
+LOOKBACK_DAYS = int(os.getenv("INGEST_LOOKBACK_DAYS", "7"))
+DROP_DIR = os.getenv("INGEST_DROP_DIR")  # defaults to <data dir>/incoming
+
+DELTAS_DIRNAME = ".deltas"
+DROP_DIRNAME = "incoming"
+PROCESSED_DIRNAME = "processed"
+FAILED_DIRNAME = "failed"
+
+
+class DeltaStore:
+    """Append-only Parquet segments of incrementally ingested rows, per version of a source file."""
+
+    def __init__(self, root: Path):
+        self.root = Path(root)
+
+    def segments(self, source: Path, base_stamp: str) -> List[Path]:
+        """Segments written on top of `source` at `base_stamp`, oldest first."""
+        if not self.root.exists():
+            return []
+        return sorted(self.root.glob(f"{Path(source).stem}.{base_stamp}.*.parquet"))
+
+    def write(self, source: Path, base_stamp: str, chunk: pd.DataFrame, rows_after: int) -> Path:
+        """Atomically add a segment holding the validated rows of `chunk`."""
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        sequence = len(self.segments(source, base_stamp)) + 1
+        target = self.root / f"{Path(source).stem}.{base_stamp}.{sequence:06d}.parquet"
+        self.root.mkdir(parents=True, exist_ok=True)
+        table = pa.Table.from_pandas(chunk, preserve_index=False)
+        metadata = dict(table.schema.metadata or {})
+        metadata[ROWS_METADATA_KEY.encode()] = str(rows_after).encode()
+        tmp = target.with_name(f"{target.name}.{os.getpid()}.tmp")
+        pq.write_table(table.replace_schema_metadata(metadata), tmp)
+        os.replace(tmp, target)
+        return target
+
+    def drop_stale(self, source: Path, base_stamp: str):
+        """Remove segments written on top of other versions of `source`."""
+        if not self.root.exists():
+            return
+        current = f"{Path(source).stem}.{base_stamp}."
+        for segment in self.root.glob(f"{Path(source).stem}.*.parquet"):
+            if not segment.name.startswith(current):
+                segment.unlink(missing_ok=True)
+
+
+@dataclass
+class AppendResult:
+    """Outcome of one incremental append."""
+    new: int = 0
+    changed: int = 0
+    unchanged: int = 0
+    skipped: int = 0  # older than the watermark window
+    segments: List[Path] = field(default_factory=list)
+    added: List[pd.DataFrame] = field(default_factory=list)  # compacted new and changed rows
+    replaced: List[pd.Series] = field(default_factory=list)  # compact keys of the changed rows
+    quality: Optional[Dict[str, Any]] = None
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "new": self.new,
+            "changed": self.changed,
+            "unchanged": self.unchanged,
+            "skipped": self.skipped,
+            "segments": [s.name for s in self.segments],
+            "dropped_rows": sum((self.quality or {}).get("dropped_rows", {}).values()),
+        }
+
+
+def stored_rows(
+    source: Path, schema: TableSchema, segments: Sequence[Path], keys: Sequence[str]
+) -> pd.DataFrame:
+    """Latest stored (validated) version of each of `keys`, read from the source cache and delta segments."""
+    import pyarrow.parquet as pq
+
+    keys = list(keys)
+    found: List[pd.DataFrame] = []
+    base = cache_path(source, source_stamp(source), schema.fingerprint) if Path(source).exists() else None
+    if base is not None and CACHE_ENABLED and base.exists():
+        found.append(pq.read_table(base, filters=[(schema.key, "in", keys)]).to_pandas())
+    elif base is not None:
+        # No Parquet cache: scan the source itself
+        for chunk in validate_chunks(iter_source_chunks(source), schema, []):
+            found.append(chunk[chunk[schema.key].isin(keys)])
+    for segment in segments:
+        found.append(pq.read_table(segment, filters=[(schema.key, "in", keys)]).to_pandas())
+    found = [f for f in found if not f.empty]
+    if not found:
+        return schema.empty_frame()
+    return pd.concat(found, ignore_index=True).drop_duplicates(schema.key, keep="last")
+
+
+def _same_rows(incoming: pd.DataFrame, stored: pd.DataFrame, schema: TableSchema) -> pd.Series:
+    """Per incoming row: True when the stored version of its key has identical schema columns."""
+    columns = [c for c in schema.column_names if c != schema.key]
+    stored = stored.set_index(schema.key).reindex(incoming[schema.key])
+    left = incoming[columns].astype("string").fillna("<NA>").to_numpy()
+    right = stored[columns].astype("string").fillna("<NA>").to_numpy()
+    return pd.Series((left == right).all(axis=1), index=incoming.index)
+
+
+def append_rows(
+    source: Path,
+    schema: TableSchema,
+    raw_chunks: Iterable[pd.DataFrame],
+    aggregators: Dict[str, Aggregator],
+    store: DeltaStore,
+    base_stamp: str,
+    rows: int,
+    lookback_days: int = LOOKBACK_DAYS,
+) -> AppendResult:
+    """
+    Validate `raw_chunks`, keep the rows that are new or changed relative to
+    the watermark and the stored table, write them as delta segments and
+    update `aggregators` by the delta. `rows` is the table's current row count.
+    """
+    watermark: WatermarkAggregator = aggregators["watermark"]
+    key, date_column = watermark.key, watermark.date_column
+    categorical, ids = schema.names_of(CATEGORY), schema.names_of(ID)
+    result = AppendResult()
+    reports: List[Dict[str, Any]] = []
+
+    for chunk in validate_chunks(raw_chunks, schema, reports):
+        chunk = chunk[schema.column_names]
+        chunk = chunk[~(chunk[key].duplicated(keep="last") & chunk[key].notna())].reset_index(drop=True)
+        if chunk.empty:
+            continue
+        compacted = compact_frame(chunk, categorical=categorical, ids=ids)
+        keys, dates = compacted[key], chunk[date_column]
+
+        state = watermark.result()
+        if state["key"] is None:
+            new = pd.Series(True, index=chunk.index)
+            recheck = ~new
+        else:
+            known_range = (keys <= state["key"]).fillna(False).astype(bool)
+            window_start = state["date"] - pd.Timedelta(days=lookback_days)
+            in_window = (dates >= window_start).fillna(False).astype(bool)
+            new = ~known_range & keys.notna()
+            new |= keys.isna() & (dates > state["date"]).fillna(False).astype(bool)
+            recheck = known_range & in_window
+
+        changed = pd.Series(False, index=chunk.index)
+        if recheck.any():
+            stored = stored_rows(source, schema, store.segments(source, base_stamp), chunk.loc[recheck, key].tolist())
+            exists = recheck & chunk[key].isin(stored[key])
+            same = pd.Series(False, index=chunk.index)
+            if exists.any():
+                same[exists] = _same_rows(chunk[exists], stored, schema)
+            new |= recheck & ~exists
+            changed = exists & ~same
+            result.unchanged += int(same.sum())
+            if changed.any():
+                old = stored.set_index(key).loc[chunk.loc[changed, key]].reset_index()
+                old = compact_frame(old[schema.column_names], categorical=categorical, ids=ids)
+                for aggregator in aggregators.values():
+                    aggregator.retract(old)
+                result.replaced.append(compacted.loc[changed, key])
+
+        keep = new | changed
+        result.skipped += int((~keep & ~recheck).sum())
+        result.new += int(new.sum())
+        result.changed += int(changed.sum())
+        if not keep.any():
+            continue
+        rows += int(new.sum())
+        result.segments.append(store.write(source, base_stamp, chunk[keep], rows_after=rows))
+        added = compacted[keep]
+        for aggregator in aggregators.values():
+            aggregator.update(added)
+        result.added.append(added)
+
+    if reports:
+        result.quality = merge_reports(reports)
+    return result
+
+
+def drop_dir(data_dir: Path) -> Path:
+    return Path(DROP_DIR) if DROP_DIR else Path(data_dir) / DROP_DIRNAME
+
+
+def pending_files(data_dir: Path, table: str) -> List[Path]:
+    """Files waiting in the drop folder of `table`, oldest first."""
+    folder = drop_dir(data_dir) / table
+    if not folder.is_dir():
+        return []
+    files = [
+        f for f in folder.iterdir()
+        if f.is_file() and f.suffix.lower() in XLSX_SUFFIXES + CSV_SUFFIXES and not f.name.startswith((".", "~$"))
+    ]
+    return sorted(files, key=lambda f: (f.stat().st_mtime_ns, f.name))
+
+
+def _archive(path: Path, folder: str):
+    target = path.parent / folder / path.name
+    target.parent.mkdir(exist_ok=True)
+    os.replace(path, target)
+
+
+def ingest_incoming(tables: Optional[Sequence[str]] = None) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    Append every pending drop-folder file to its table. Files move to
+    `processed/` once applied, or to `failed/` (with the error logged).
+    """
+    from .registry import registry  # imported lazily: the registry imports this module
+
+    results: Dict[str, List[Dict[str, Any]]] = {}
+    for name in tables or registry.incremental_tables():
+        for path in pending_files(registry.data_dir, name):
+            try:
+                summary = registry.append(name, iter_source_chunks(path), origin=path.name)
+            except Exception as e:
+                logger.exception("Incremental ingest of %s into %s failed", path.name, name)
+                _archive(path, FAILED_DIRNAME)
+                summary = {"error": str(e)}
+            else:
+                _archive(path, PROCESSED_DIRNAME)
+            results.setdefault(name, []).append({"file": path.name, **summary})
+    return results
+
+
+def has_pending(tables: Optional[Sequence[str]] = None) -> bool:
+    from .registry import registry
+
+    return any(pending_files(registry.data_dir, name) for name in tables or registry.incremental_tables())
+
+
+def ingest_connector(connector, tables: Optional[Sequence[str]] = None) -> Dict[str, Dict[str, Any]]:
+    """
+    Append the records a DataConnector returns (`fetch_<table>()`) to each
+    table; rows already ingested are skipped by the watermark comparison.
+    """
+    from .registry import registry
+
+    results: Dict[str, Dict[str, Any]] = {}
+    for name in tables or registry.incremental_tables():
+        fetch = getattr(connector, f"fetch_{name}", None)
+        records = fetch() if fetch is not None else None
+        if not records:
+            continue
+        results[name] = registry.append(name, [pd.DataFrame(records)], origin=type(connector).__name__)
+    return results
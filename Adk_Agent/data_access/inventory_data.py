@@ -1,34 +1,18 @@
-import pandas as pd
-from datetime import datetime
-from ..services.path_utils import get_data_dir
-
-DATA_DIR = get_data_dir()
+from .compact import decode_ids
+from .registry import get_dataset, get_rollup
+from ..services.tracing import traced
 
 
 def _load_orders():
-    """Load order history from the larger orders XLSX."""
-    path = DATA_DIR / "orders_25000.xlsx"
-    if not path.exists():
-        return pd.DataFrame({"date": [], "order_count": []})
-    df = pd.read_excel(path)
-    df["order_date"] = pd.to_datetime(df.get("order_date"), errors="coerce")
-    df = df.dropna(subset=["order_date"])
-    daily = df.groupby(df["order_date"].dt.date).size().reset_index(name="order_count")
-    daily.rename(columns={"order_date": "date"}, inplace=True)
-    daily["date"] = pd.to_datetime(daily["date"])
-    return daily.sort_values("date")
+    """Daily order counts from the orders rollup."""
+    return get_rollup("orders").daily()
 
 
 def _load_products():
-    path = DATA_DIR / "inventory_products_3000.xlsx"
-    if not path.exists():
-        return pd.DataFrame({"product_id": [], "stock_level": [], "reorder_threshold": []})
-    df = pd.read_excel(path)
-    df["stock_level"] = pd.to_numeric(df.get("stock_level"), errors="coerce").fillna(0)
-    df["reorder_threshold"] = pd.to_numeric(df.get("reorder_threshold"), errors="coerce").fillna(0)
-    return df
+    return get_dataset("products")
 
 
+@traced()
 def compute_inventory_kpis():
     """
     Compute inventory health metrics from order velocity and current stock.
@@ -65,6 +49,7 @@ def detect_inventory_anomaly(kpis):
     return {"is_anomaly": is_anomaly, "severity": severity}
 
 
+@traced(rows=True)
 def low_stock_alerts():
     """Return low-stock products based on reorder thresholds from the XLSX."""
     products_df = _load_products()
@@ -76,7 +61,7 @@ def low_stock_alerts():
         return []
 
     alerts = []
-    for _, row in low.head(10).iterrows():  # cap to keep response concise
+    for _, row in decode_ids(low.head(10)).iterrows():  # cap to keep response concise
         alerts.append({
             "sku": row.get("product_id"),
             "current_qty": float(row.get("stock_level", 0)),
@@ -0,0 +1,95 @@
+import pandas as pd
+from datetime import datetime
+from .compact import decode_ids
+from .registry import get_dataset, get_rollup
+from ..services.tracing import traced
+from .revenue_data import detect_revenue_anomaly
+from .erp_data import detect_finance_anomaly, payment_terms, weekly_revenue
+from .inventory_data import detect_inventory_anomaly
+
+
+def _pct_change(current, previous):
+    return ((current - previous) / previous) * 100 if previous else 0.0
+
+
+@traced()
+def compute_business_overview(inactive_days=30, top_n=3):
+    """
+    Compute revenue, customer, finance and inventory KPIs in one pass.
+    Each shared frame is fetched once; revenue, finance and order velocity
+    read the daily rollups kept at ingestion. Values match the per-domain
+    functions in revenue_data/crm_data/erp_data/inventory_data.
+    """
+    daily = get_rollup("invoices").daily()
+    orders = get_rollup("orders").daily()
+    customers = get_dataset("customers")
+    products = get_dataset("products")
+
+    # Revenue + finance share the daily revenue series
+    revenue, finance = {}, {}
+    if daily.empty:
+        revenue_kpis = {"current_revenue": 0.0, "previous_revenue": 0.0, "revenue_change_pct": 0.0}
+        finance_kpis = {"revenue_last_week": 0.0, "weekly_cash_flow_avg": 0.0}
+        payment = {"avg_days_to_payment": 0.0, "overdue_invoices": 0, "overdue_amount": 0.0}
+    else:
+        current = float(daily["revenue"].iloc[-1]) if len(daily) >= 2 else 0.0
+        previous = float(daily["revenue"].iloc[-2]) if len(daily) >= 2 else 0.0
+        revenue_kpis = {
+            "current_revenue": round(current, 2),
+            "previous_revenue": round(previous, 2),
+            "revenue_change_pct": round(_pct_change(current, previous), 2),
+        }
+
+        last_week, weekly_avg = weekly_revenue(daily)
+        finance_kpis = {
+            "revenue_last_week": float(round(last_week, 2)),
+            "weekly_cash_flow_avg": float(round(weekly_avg, 2)),
+        }
+
+        payment = payment_terms(daily)
+
+    if len(orders) >= 2:
+        order_change_pct = _pct_change(float(orders["order_count"].iloc[-1]), float(orders["order_count"].iloc[-2]))
+    else:
+        order_change_pct = 0.0
+    revenue.update(revenue_kpis)
+    revenue["order_change_pct"] = round(order_change_pct, 2)
+    revenue["anomaly"] = detect_revenue_anomaly(revenue_kpis)
+
+    finance.update(finance_kpis)
+    finance.update(payment)
+    finance["anomaly"] = detect_finance_anomaly(finance_kpis)
+
+    # Customers
+    cutoff = datetime.now() - pd.Timedelta(days=inactive_days)
+    inactive = customers[customers["last_order_date"] < cutoff]
+    total = len(customers)
+    top = decode_ids(customers.nlargest(top_n, "lifetime_value"))
+    customer = {
+        "total_customers": total,
+        "inactive_count": len(inactive),
+        "churn_rate_pct": round(len(inactive) / total * 100, 2) if total else 0.0,
+        "inactive_by_segment": inactive["segment"].astype(object).fillna("Unknown").value_counts().to_dict(),
+        "top_customers": top[["customer_id", "customer_name", "lifetime_value"]].to_dict("records"),
+    }
+
+    # Inventory
+    if len(orders) < 2 or products.empty:
+        inventory_kpis = {"avg_order_count": 0.0, "inventory_turnover_rate": 0.0, "days_inventory": 0.0}
+    else:
+        avg_orders = orders["order_count"].mean()
+        avg_stock = products["stock_level"].mean() or 0.0
+        days_inventory = (avg_stock / avg_orders) if avg_orders > 0 else 0.0
+        turnover = ((avg_orders * 365) / avg_stock) if avg_stock > 0 else 0.0
+        inventory_kpis = {
+            "avg_order_count": float(round(avg_orders, 2)),
+            "inventory_turnover_rate": float(round(turnover, 2)),
+            "days_inventory": float(round(days_inventory, 2)),
+        }
+    low = products[products["stock_level"] <= products["reorder_threshold"]] if not products.empty else products
+    inventory = dict(inventory_kpis)
+    inventory["low_stock_count"] = int(len(low))
+    inventory["low_stock_skus"] = decode_ids(low.head(10))["product_id"].tolist() if not low.empty else []
+    inventory["anomaly"] = detect_inventory_anomaly(inventory_kpis)
+
+    return {"revenue": revenue, "customers": customer, "finance": finance, "inventory": inventory}
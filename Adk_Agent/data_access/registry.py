@@ -0,0 +1,337 @@
+"""
+Process-wide dataset registry.
+Loads and normalizes each business table once per data version and hands the
+same frame to every data_access module, so a full monitoring snapshot reads
+each source workbook a single time. Source tables are parsed by their
+TableSchema (schema.py) once per source version - the typed result and its
+data-quality report are what the Parquet cache stores - and kept in the
+compact representation from compact.py (categoricals, integer IDs, downcast
+numbers). Source tables are streamed in bounded chunks (streaming.py) through
+their aggregators; tables registered with retain=False keep only those
+aggregates in memory and are read back from the Parquet cache on demand.
+Invoices and orders are summarized into materialized daily rollups
+(rollups.py) that the KPI modules read instead of raw rows, and accept
+incremental appends (incremental.py) that update those rollups by delta.
+"""
+import hashlib
+import logging
+import threading
+import time
+from dataclasses import dataclass, field
+from functools import partial
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+import pandas as pd
+
+from ..services.path_utils import get_data_dir
+from ..services.metrics import DATASET_LOAD_SECONDS
+from ..services.tracing import start_span
+from .aggregates import Aggregator, SpendAggregator, WatermarkAggregator
+from .compact import concat_compact, memory_report
+from .dataset_cache import source_stamp
+from .incremental import DELTAS_DIRNAME, DeltaStore, append_rows
+from .rollups import DailyRollup, Rollup, column_dimension, customer_attribute, invoice_measures, order_measures
+from .schema import CUSTOMERS, INVOICES, ORDERS, PRODUCTS, TableSchema
+from .streaming import ingest_table, save_states
+
+logger = logging.getLogger(__name__)
+
+MISSING_STAMP = "missing"
+
+
+@dataclass
+class DatasetSpec:
+    """Describes one registered table."""
+    name: str
+    filename: str  # source workbook
+    schema: TableSchema  # typed ingestion contract
+    aggregators: Dict[str, Callable[[], Aggregator]] = field(default_factory=dict)  # fed chunk by chunk
+    retain: bool = True  # keep the full frame in memory; False keeps only the aggregates
+    depends: Tuple[str, ...] = ()  # tables the aggregators read (their changes trigger a re-ingest)
+
+
+class DatasetRegistry:
+    """Shared cache of normalized frames (and their aggregates) keyed by table name and source stamp."""
+
+    def __init__(self, data_dir: Path):
+        self.data_dir = Path(data_dir)
+        self._specs: Dict[str, DatasetSpec] = {}
+        self._frames: Dict[str, Tuple[str, Optional[pd.DataFrame]]] = {}  # frame is None when not retained
+        self._locks: Dict[str, threading.RLock] = {}
+        self.load_counts: Dict[str, int] = {}
+        self.load_seconds: Dict[str, float] = {}  # duration of the latest load
+        self.memory: Dict[str, Dict[str, Any]] = {}  # memory_report() of the cached frame
+        self.quality: Dict[str, Dict[str, Any]] = {}  # schema data-quality report per source table
+        self._aggregators: Dict[str, Dict[str, Aggregator]] = {}  # live aggregators of the latest ingestion
+        self.appends: Dict[str, Dict[str, Any]] = {}  # incremental ingestion totals per table
+
+    def register(self, spec: DatasetSpec):
+        self._specs[spec.name] = spec
+        self._locks[spec.name] = threading.RLock()
+        self.load_counts[spec.name] = 0
+
+    def names(self) -> List[str]:
+        return list(self._specs)
+
+    def path(self, name: str) -> Path:
+        return self.data_dir / self._specs[name].filename
+
+    @property
+    def deltas(self) -> DeltaStore:
+        return DeltaStore(self.data_dir / DELTAS_DIRNAME)
+
+    def incremental_tables(self) -> List[str]:
+        """Tables that accept incremental appends (those with a watermark aggregator)."""
+        return [name for name, spec in self._specs.items() if "watermark" in spec.aggregators]
+
+    def stamp(self, name: str) -> str:
+        """
+        Current version stamp of the source behind `name`, its delta segments
+        and the tables it depends on.
+        """
+        path = self.path(name)
+        spec = self._specs[name]
+        stamp = source_stamp(path) if path.exists() else MISSING_STAMP
+        if "watermark" in spec.aggregators and stamp != MISSING_STAMP:
+            segments = self.deltas.segments(path, stamp)
+            if segments:
+                stamp += f"~{len(segments)}"
+        depends = spec.depends
+        if depends:
+            stamp += "+" + "+".join(self.stamp(d) for d in depends)
+        return stamp
+
+    def version(self) -> str:
+        """Combined version of every source table; changes when any workbook changes."""
+        stamps = [f"{name}={self.stamp(name)}" for name in self._specs]
+        return hashlib.sha1("|".join(stamps).encode()).hexdigest()[:16]
+
+    def get(self, name: str) -> pd.DataFrame:
+        """
+        Return the normalized frame for `name`.
+        The result is a shallow copy of the shared frame: callers may add or
+        replace columns freely but must not mutate values in place.
+        """
+        with start_span("dataset.get", table=name) as span:
+            frame = self._ensure(name, span)[1]
+            if frame is None:
+                frame = self._materialize(self._specs[name])
+            span.set_attribute("rows", len(frame))
+            return frame.copy(deep=False)
+
+    def ensure(self, name: str):
+        """Ingest `name` if its source changed, without materializing tables that are not retained."""
+        self._ensure(name)
+
+    def aggregate(self, name: str, key: str) -> Any:
+        """Result of the `key` aggregator of `name`, reloading the table first when its source changed."""
+        with start_span("dataset.aggregate", table=name, aggregate=key):
+            self._ensure(name)
+            return self._aggregators[name][key].result()
+
+    def append(self, name: str, raw_chunks: Iterable[pd.DataFrame], origin: str = "") -> Dict[str, Any]:
+        """
+        Incrementally ingest `raw_chunks` (rows in the source layout) into
+        `name`: only rows that are new or changed relative to the table's
+        watermark are stored, as a delta segment, and the table's aggregators
+        are updated by the delta instead of re-reading the table.
+        """
+        spec = self._specs[name]
+        if "watermark" not in spec.aggregators:
+            raise ValueError(f"{name} does not accept incremental appends")
+        with start_span("dataset.append", table=name, origin=origin) as span, self._locks[name]:
+            started = time.perf_counter()
+            stamp, frame = self._ensure(name)
+            path = self.data_dir / spec.filename
+            aggregators = self._aggregators[name]
+            result = append_rows(
+                path, spec.schema, raw_chunks, aggregators, self.deltas, source_stamp(path), self.memory[name]["rows"]
+            )
+            if result.segments:
+                if frame is not None:
+                    replaced = pd.concat(result.replaced) if result.replaced else None
+                    kept = frame if replaced is None else frame[~frame[spec.schema.key].isin(replaced)]
+                    frame = concat_compact([kept] + result.added)
+                    self.memory[name] = memory_report(frame, self.memory[name].get("raw_bytes"))
+                else:
+                    self.memory[name]["rows"] += result.new
+                stamp = self.stamp(name)
+                self._frames[name] = (stamp, frame)
+                save_states(path, spec.schema, stamp, aggregators)
+            summary = result.summary()
+            summary["seconds"] = round(time.perf_counter() - started, 4)
+            totals = self.appends.setdefault(name, {"appends": 0, "new": 0, "changed": 0, "unchanged": 0, "skipped": 0})
+            totals["appends"] += 1
+            for kind in ("new", "changed", "unchanged", "skipped"):
+                totals[kind] += summary[kind]
+            totals["last"] = {"origin": origin, **summary}
+            span.set_attribute("rows", result.new + result.changed)
+            logger.info("Appended to %s from %s: %s", name, origin or "batch", summary)
+            return summary
+
+    def watermarks(self) -> Dict[str, Dict[str, Any]]:
+        """Current watermark and incremental ingestion totals of each incremental table."""
+        report = {}
+        for name in self.incremental_tables():
+            state = self.aggregate(name, "watermark")
+            path = self.path(name)
+            segments = self.deltas.segments(path, source_stamp(path)) if path.exists() else []
+            report[name] = {
+                "date": state["date"].isoformat() if state["date"] is not None else None,
+                "key": state["key_id"],
+                "rows": state["rows"],
+                "delta_segments": len(segments),
+                **self.appends.get(name, {}),
+            }
+        return report
+
+    def _ensure(self, name: str, span=None) -> Tuple[str, Optional[pd.DataFrame]]:
+        spec = self._specs[name]
+        stamp = self.stamp(name)
+        entry = self._frames.get(name)
+        if entry is None or entry[0] != stamp:
+            with self._locks[name]:
+                entry = self._frames.get(name)
+                if entry is None or entry[0] != stamp:
+                    started = time.perf_counter()
+                    entry = (stamp, self._load(spec, stamp))
+                    elapsed = time.perf_counter() - started
+                    self._frames[name] = entry
+                    self.load_counts[name] += 1
+                    self.load_seconds[name] = elapsed
+                    DATASET_LOAD_SECONDS.observe(elapsed, table=name)
+                    if span is not None:
+                        span.set_attribute("loaded", True)
+        return entry
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Per table: load count, latest load duration and cached row count."""
+        frames = dict(self._frames)
+        return {
+            name: {
+                "loads": self.load_counts[name],
+                "last_load_seconds": round(self.load_seconds.get(name, 0.0), 4),
+                "rows": self.memory[name]["rows"] if name in frames else None,
+                "bytes": self.memory[name]["bytes"] if name in self.memory else None,
+            }
+            for name in self._specs
+        }
+
+    def invalidate(self, name: Optional[str] = None):
+        """Drop cached frames (all of them when `name` is None)."""
+        if name is None:
+            self._frames.clear()
+        else:
+            self._frames.pop(name, None)
+
+    def memory_report(self) -> Dict[str, Dict[str, Any]]:
+        """Per-table memory use of the cached frames, with the saving over the raw normalized frame."""
+        return dict(self.memory)
+
+    def quality_report(self) -> Dict[str, Dict[str, Any]]:
+        """Data-quality report of the latest ingestion of each source table."""
+        return dict(self.quality)
+
+    def _load(self, spec: DatasetSpec, stamp: str) -> Optional[pd.DataFrame]:
+        path = self.data_dir / spec.filename
+        result = ingest_table(
+            path, spec.schema, spec.aggregators, retain=spec.retain, state_key=stamp, deltas=self._segments(spec)
+        )
+        self._record_quality(spec.name, result.quality)
+        self._aggregators[spec.name] = result.aggregators
+        if result.frame is None:
+            self.memory[spec.name] = {"rows": result.rows, "bytes": 0, "raw_bytes": result.raw_bytes,
+                                      "retained": False}
+        else:
+            self.memory[spec.name] = memory_report(result.frame, result.raw_bytes)
+        return result.frame
+
+    def _materialize(self, spec: DatasetSpec) -> pd.DataFrame:
+        """Full frame of a table that is not retained, replayed from the Parquet cache (not kept)."""
+        return ingest_table(self.data_dir / spec.filename, spec.schema, retain=True, deltas=self._segments(spec)).frame
+
+    def _segments(self, spec: DatasetSpec) -> List[Path]:
+        """Delta segments on top of the current source version (older versions' segments are dropped)."""
+        path = self.data_dir / spec.filename
+        if "watermark" not in spec.aggregators or not path.exists():
+            return []
+        base_stamp = source_stamp(path)
+        self.deltas.drop_stale(path, base_stamp)
+        return self.deltas.segments(path, base_stamp)
+
+    def _record_quality(self, name: str, report: Optional[Dict[str, Any]]):
+        if report is None:
+            return
+        self.quality[name] = report
+        issues = {k: report[k] for k in ("dropped_rows", "invalid_values", "missing_columns") if report.get(k)}
+        if issues:
+            logger.warning("Data quality issues in %s: %s", name, issues)
+
+
+def _customer_dimensions():
+    customers = registry.get("customers")
+    return {column: customer_attribute(customers, column) for column in ("segment", "region")}
+
+
+def _invoice_rollup() -> DailyRollup:
+    return DailyRollup("invoice_date", invoice_measures, _customer_dimensions())
+
+
+def _order_rollup() -> DailyRollup:
+    return DailyRollup(
+        "order_date", order_measures, {**_customer_dimensions(), "channel": column_dimension("sales_channel")}
+    )
+
+
+registry = DatasetRegistry(get_data_dir())
+registry.register(DatasetSpec(
+    name="customers",
+    filename="crm_customers_20000.xlsx",
+    schema=CUSTOMERS,
+))
+registry.register(DatasetSpec(
+    name="invoices",
+    filename="erp_invoices_22000.xlsx",
+    schema=INVOICES,
+    aggregators={
+        "rollup": _invoice_rollup,
+        "spend": SpendAggregator,
+        "watermark": partial(WatermarkAggregator, "invoice_date", "invoice_id"),
+    },
+    retain=False,  # KPIs read the aggregates; the full table is only replayed on demand
+    depends=("customers",),
+))
+registry.register(DatasetSpec(
+    name="orders",
+    filename="orders_25000.xlsx",
+    schema=ORDERS,
+    aggregators={"rollup": _order_rollup, "watermark": partial(WatermarkAggregator, "order_date", "order_id")},
+    retain=False,
+    depends=("customers",),
+))
+registry.register(DatasetSpec(
+    name="products",
+    filename="inventory_products_3000.xlsx",
+    schema=PRODUCTS,
+))
+
+
+def get_dataset(name: str) -> pd.DataFrame:
+    """Shortcut for `registry.get(name)`."""
+    return registry.get(name)
+
+
+def get_aggregate(name: str, key: str) -> Any:
+    """Shortcut for `registry.aggregate(name, key)`."""
+    return registry.aggregate(name, key)
+
+
+def get_rollup(name: str) -> Rollup:
+    """Daily rollup of a fact table (`invoices` or `orders`)."""
+    return registry.aggregate(name, "rollup")
+
+
+def data_version() -> str:
+    """Shortcut for `registry.version()`."""
+    return registry.version()
@@ -0,0 +1,219 @@
+"""
+Declarative schemas for the business tables.
+Each TableSchema lists its columns with a type, an explicit date format,
+whether the column must be present in the source and what to do with nulls
+(keep, fill with a default, or drop the row). apply() parses a raw frame with
+explicit parsers - no dtype or date-format inference - and returns the typed
+table together with a data-quality report (rows dropped and why, unparseable
+values, filled nulls, missing or unexpected columns, duplicate keys). The
+registry runs it once per source version - chunk by chunk when streaming, with
+merge_reports() combining the per-chunk reports - and caches the result, with
+the merged report in the Parquet file's key-value metadata (streaming.py).
+"""
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+import pandas as pd
+from pandas.api.types import is_bool_dtype, is_datetime64_any_dtype, is_numeric_dtype
+
+# Column kinds
+ID = "id"              # entity identifier (integer-coded by compact.py)
+TEXT = "text"          # free text
+CATEGORY = "category"  # low-cardinality label (categorical in compact.py)
+DATE = "date"
+NUMBER = "number"
+
+# Null policies
+KEEP = "keep"
+FILL = "fill"
+DROP = "drop"
+
+DEFAULT_DATE_FORMAT = "%Y-%m-%d"
+
+
+class SchemaError(ValueError):
+    """Raised when a source is missing a required column."""
+
+
+@dataclass(frozen=True)
+class Column:
+    name: str
+    kind: str
+    required: bool = False
+    nulls: str = KEEP
+    fill: Any = None
+    date_format: str = DEFAULT_DATE_FORMAT
+
+
+@dataclass(frozen=True)
+class TableSchema:
+    name: str
+    columns: Tuple[Column, ...]
+    key: Optional[str] = None  # expected-unique column, checked for duplicates
+    version: int = 2  # bump when parsing rules change so cached tables are rebuilt
+
+    @property
+    def column_names(self) -> List[str]:
+        return [c.name for c in self.columns]
+
+    def names_of(self, kind: str) -> List[str]:
+        return [c.name for c in self.columns if c.kind == kind]
+
+    @property
+    def fingerprint(self) -> str:
+        """Short tag identifying these parsing rules (used in cache file names)."""
+        return f"{self.name}-v{self.version}"
+
+    def empty_frame(self) -> pd.DataFrame:
+        """Typed zero-row table, used when the source file is missing."""
+        return pd.DataFrame({c.name: _empty_series(c, pd.RangeIndex(0)) for c in self.columns})
+
+    def apply(self, raw: pd.DataFrame) -> Tuple[pd.DataFrame, Dict[str, Any]]:
+        """Parse `raw` into the typed table and return it with its quality report."""
+        missing_required = [c.name for c in self.columns if c.required and c.name not in raw.columns]
+        if missing_required:
+            raise SchemaError(f"{self.name}: missing required columns {missing_required}")
+
+        report: Dict[str, Any] = {
+            "table": self.name,
+            "schema": self.fingerprint,
+            "rows_in": len(raw),
+            "missing_columns": [c.name for c in self.columns if c.name not in raw.columns],
+            "unexpected_columns": [c for c in raw.columns if c not in self.column_names],
+            "invalid_values": {},
+            "filled_nulls": {},
+            "dropped_rows": {},
+        }
+        df = raw.copy(deep=False)
+        keep = pd.Series(True, index=df.index)
+        for column in self.columns:
+            if column.name in df.columns:
+                parsed, invalid = _parse(df[column.name], column)
+            else:
+                parsed, invalid = _empty_series(column, index=df.index), 0
+            if invalid:
+                report["invalid_values"][column.name] = invalid
+            nulls = parsed.isna()
+            if column.nulls == FILL and nulls.any():
+                parsed = parsed.fillna(column.fill)
+                report["filled_nulls"][column.name] = int(nulls.sum())
+            elif column.nulls == DROP and nulls.any():
+                report["dropped_rows"][f"{column.name} is null"] = int((nulls & keep).sum())
+                keep &= ~nulls
+            df[column.name] = parsed
+
+        if not keep.all():
+            df = df[keep]
+        report["rows_out"] = len(df)
+        if self.key is not None and len(df):
+            report["duplicate_keys"] = int(df[self.key].duplicated().sum())
+        report["null_counts"] = {c: int(n) for c, n in df[self.column_names].isna().sum().items() if n}
+        return df, report
+
+
+def merge_reports(reports: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Combine the apply() reports of consecutive chunks of one table. Counts are
+    summed; duplicate_keys is left out because per-chunk counts miss keys
+    repeated across chunks (the caller checks keys over the whole table).
+    """
+    merged = {k: (dict(v) if isinstance(v, dict) else v) for k, v in reports[0].items() if k != "duplicate_keys"}
+    for report in reports[1:]:
+        merged["rows_in"] += report["rows_in"]
+        merged["rows_out"] += report["rows_out"]
+        for section in ("invalid_values", "filled_nulls", "dropped_rows", "null_counts"):
+            for key, count in report[section].items():
+                merged[section][key] = merged[section].get(key, 0) + count
+    return merged
+
+
+def _empty_series(column: Column, index: pd.Index) -> pd.Series:
+    """All-null series of the column's type (for columns absent from the source)."""
+    if column.kind == DATE:
+        return pd.Series(pd.NaT, index=index, dtype="datetime64[us]")
+    if column.kind == NUMBER:
+        return pd.Series(float("nan"), index=index, dtype="float64")
+    return pd.Series(pd.NA, index=index, dtype="string")
+
+
+def _parse(values: pd.Series, column: Column) -> Tuple[pd.Series, int]:
+    """
+    Parse one column with its explicit parser; returns (parsed, count of
+    unparseable non-null values). Output dtypes are fixed per kind
+    (datetime64[us], float64, string) so chunks of one table always agree.
+    """
+    if column.kind == DATE:
+        if is_datetime64_any_dtype(values):
+            return values.astype("datetime64[us]"), 0
+        parsed = pd.to_datetime(
+            values.astype("string").str.strip(), format=column.date_format, exact=False, errors="coerce"
+        ).astype("datetime64[us]")
+    elif column.kind == NUMBER:
+        if is_numeric_dtype(values) and not is_bool_dtype(values):
+            return values.astype("float64"), 0
+        parsed = pd.to_numeric(values.astype("string").str.strip(), errors="coerce").astype("float64")
+    else:
+        parsed = values.astype("string").str.strip()
+        parsed = parsed.mask(parsed == "")
+        return parsed, 0
+    invalid = int((parsed.isna() & values.notna()).sum())
+    return parsed, invalid
+
+
+CUSTOMERS = TableSchema(
+    name="customers",
+    key="customer_id",
+    columns=(
+        Column("customer_id", ID, required=True, nulls=DROP),
+        Column("customer_name", TEXT, required=True, nulls=DROP),
+        Column("segment", CATEGORY),
+        Column("industry", CATEGORY),
+        Column("region", CATEGORY),
+        Column("signup_date", DATE),
+        Column("last_order_date", DATE),
+        Column("status", CATEGORY),
+        Column("lifetime_value", NUMBER, nulls=FILL, fill=0),
+    ),
+)
+
+INVOICES = TableSchema(
+    name="invoices",
+    key="invoice_id",
+    columns=(
+        Column("invoice_id", ID, required=True),
+        Column("customer_id", ID),
+        Column("invoice_date", DATE, required=True, nulls=DROP),
+        Column("invoice_amount", NUMBER, required=True, nulls=FILL, fill=0),
+        Column("payment_status", CATEGORY),
+        Column("due_date", DATE),
+    ),
+)
+
+ORDERS = TableSchema(
+    name="orders",
+    key="order_id",
+    columns=(
+        Column("order_id", ID, required=True),
+        Column("customer_id", ID),
+        Column("order_date", DATE, required=True, nulls=DROP),
+        Column("order_value", NUMBER),
+        Column("order_status", CATEGORY),
+        Column("payment_status", CATEGORY),
+        Column("sales_channel", CATEGORY),
+    ),
+)
+
+PRODUCTS = TableSchema(
+    name="products",
+    key="product_id",
+    columns=(
+        Column("product_id", ID, required=True),
+        Column("product_name", TEXT),
+        Column("category", CATEGORY),
+        Column("stock_level", NUMBER, required=True, nulls=FILL, fill=0),
+        Column("reorder_threshold", NUMBER, required=True, nulls=FILL, fill=0),
+        Column("price", NUMBER),
+    ),
+)
+
+SCHEMAS: Dict[str, TableSchema] = {s.name: s for s in (CUSTOMERS, INVOICES, ORDERS, PRODUCTS)}
@@ -0,0 +1,390 @@
+"""
+Streaming table ingestion.
+Reads a source file in bounded row chunks - XLSX through openpyxl's read-only
+row iterator, CSV through pandas' chunked reader - so neither the workbook DOM
+nor the raw sheet is ever held in full. Each chunk is validated by the table
+schema, appended to the Parquet cache as a row group, compacted and fed to the
+table's aggregators, then dropped unless the table is retained in memory.
+Peak ingestion memory is set by INGEST_CHUNK_ROWS, not by the file size. A
+fresh cache is replayed batch by batch the same way, with the quality report
+read back from the file metadata. Persistent aggregators (rollups) are saved
+under .cache/aggregates keyed by the source stamp; when they are fresh and the
+table is not retained, a warm start restores them and reads no rows at all.
+Delta segments written by incremental ingestion (incremental.py) are replayed
+after the source, newest version of each key winning.
+"""
+import hashlib
+import json
+import logging
+import os
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence
+
+import pandas as pd
+
+from .aggregates import Aggregator
+from .compact import compact_frame, concat_compact
+from .dataset_cache import CACHE_DIRNAME, CACHE_ENABLED, cache_path, drop_stale, source_stamp
+from .schema import CATEGORY, ID, TableSchema, merge_reports
+
+logger = logging.getLogger(__name__)
+
+CHUNK_ROWS = max(1, int(os.getenv("INGEST_CHUNK_ROWS", "50000")))
+
+QUALITY_METADATA_KEY = "copilot.quality"
+RAW_BYTES_METADATA_KEY = "copilot.raw_bytes"
+ROWS_METADATA_KEY = "copilot.rows"
+AGGREGATES_DIRNAME = "aggregates"
+
+XLSX_SUFFIXES = (".xlsx", ".xlsm")
+CSV_SUFFIXES = (".csv", ".txt")
+
+
+def _records_frame(rows: List[tuple], columns: List[str]) -> pd.DataFrame:
+    width = len(columns)
+    rows = [row if len(row) == width else (tuple(row[:width]) + (None,) * (width - len(row))) for row in rows]
+    # Per-column types as openpyxl returned them (datetime cells stay datetimes)
+    return pd.DataFrame.from_records(rows, columns=columns).infer_objects()
+
+
+def iter_xlsx_chunks(path: Path, chunk_rows: int = CHUNK_ROWS) -> Iterator[pd.DataFrame]:
+    """Raw frames of at most `chunk_rows` rows from the first sheet, streamed in read-only mode."""
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        rows = workbook.worksheets[0].iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            yield pd.DataFrame()
+            return
+        columns = [str(c) if c is not None else f"Unnamed: {i}" for i, c in enumerate(header)]
+        batch: List[tuple] = []
+        yielded = False
+        for row in rows:
+            if all(value is None for value in row):
+                continue
+            batch.append(row)
+            if len(batch) >= chunk_rows:
+                yield _records_frame(batch, columns)
+                batch, yielded = [], True
+        if batch or not yielded:
+            yield _records_frame(batch, columns)
+    finally:
+        workbook.close()
+
+
+def iter_csv_chunks(path: Path, chunk_rows: int = CHUNK_ROWS) -> Iterator[pd.DataFrame]:
+    """Raw frames of at most `chunk_rows` rows, every value read as text for the schema to parse."""
+    yielded = False
+    with pd.read_csv(path, dtype=str, chunksize=chunk_rows) as reader:
+        for chunk in reader:
+            yielded = True
+            yield chunk
+    if not yielded:
+        yield pd.read_csv(path, dtype=str, nrows=0)
+
+
+def iter_source_chunks(path: Path, chunk_rows: int = CHUNK_ROWS) -> Iterator[pd.DataFrame]:
+    """Raw chunks of an XLSX or CSV source, picked by file suffix."""
+    suffix = Path(path).suffix.lower()
+    if suffix in XLSX_SUFFIXES:
+        return iter_xlsx_chunks(path, chunk_rows)
+    if suffix in CSV_SUFFIXES:
+        return iter_csv_chunks(path, chunk_rows)
+    raise ValueError(f"Unsupported source format: {path}")
+
+
+class _ChunkWriter:
+    """Writes validated chunks as Parquet row groups to a temp file, published atomically on close."""
+
+    def __init__(self, source: Path, target: Path):
+        import pyarrow.parquet as pq
+
+        self._pq = pq
+        self.source, self.target = source, target
+        self.tmp = target.with_name(f"{target.name}.{os.getpid()}.tmp")
+        self._writer = None
+
+    def write(self, chunk: pd.DataFrame):
+        import pyarrow as pa
+
+        if self._writer is None:
+            self.target.parent.mkdir(parents=True, exist_ok=True)
+            table = pa.Table.from_pandas(chunk, preserve_index=False)
+            self._writer = self._pq.ParquetWriter(self.tmp, table.schema)
+        else:
+            table = pa.Table.from_pandas(chunk, schema=self._writer.schema, preserve_index=False)
+        self._writer.write_table(table)
+
+    def close(self, quality: Dict[str, Any], raw_bytes: int):
+        self._writer.add_key_value_metadata({
+            QUALITY_METADATA_KEY: json.dumps(quality), RAW_BYTES_METADATA_KEY: str(raw_bytes),
+        })
+        self._writer.close()
+        os.replace(self.tmp, self.target)
+        drop_stale(self.source, self.target)
+
+    def abort(self):
+        try:
+            if self._writer is not None:
+                self._writer.close()
+        finally:
+            self.tmp.unlink(missing_ok=True)
+
+
+@dataclass
+class _CachedTable:
+    """A readable Parquet cache file with the ingestion metadata stored in it."""
+    parquet: Any
+    quality: Dict[str, Any]
+    raw_bytes: int
+
+    @property
+    def rows(self) -> int:
+        return self.parquet.metadata.num_rows
+
+    def chunks(self, chunk_rows: int) -> Iterator[pd.DataFrame]:
+        empty = True
+        for batch in self.parquet.iter_batches(batch_size=chunk_rows):
+            empty = False
+            yield batch.to_pandas()
+        if empty:
+            yield self.parquet.schema_arrow.empty_table().to_pandas()
+
+
+def _open_cache(target: Path) -> Optional[_CachedTable]:
+    """The cache file at `target`, or None when it is absent or unreadable."""
+    if not target.exists():
+        return None
+    try:
+        import pyarrow.parquet as pq
+
+        parquet = pq.ParquetFile(target)
+        metadata = parquet.metadata.metadata
+        return _CachedTable(
+            parquet=parquet,
+            quality=json.loads(metadata[QUALITY_METADATA_KEY.encode()]),
+            raw_bytes=int(metadata[RAW_BYTES_METADATA_KEY.encode()]),
+        )
+    except Exception:
+        return None  # unreadable cache file (or one written before streaming): rebuild it
+
+
+def _state_key(schema: TableSchema, stamp: str) -> str:
+    return f"{schema.fingerprint}|{stamp}"
+
+
+def _state_path(path: Path, state_key: str, name: str) -> Path:
+    digest = hashlib.sha1(state_key.encode()).hexdigest()[:16]
+    return path.parent / CACHE_DIRNAME / AGGREGATES_DIRNAME / f"{path.stem}.{digest}.{name}.parquet"
+
+
+def _restore_states(path: Path, state_key: str, running: Dict[str, Aggregator]) -> bool:
+    """Restore every aggregator from its saved state; False (nothing restored) unless all are fresh."""
+    paths = {name: _state_path(path, state_key, name) for name in running}
+    if not all(p.exists() for p in paths.values()):
+        return False
+    try:
+        states = {name: pd.read_parquet(p) for name, p in paths.items()}
+    except Exception:
+        return False
+    for name, state in states.items():
+        running[name].restore(state)
+    return True
+
+
+def save_states(path: Path, schema: TableSchema, stamp: str, running: Dict[str, Aggregator]):
+    """Best-effort save of every persistent aggregator at `stamp`, replacing states of older versions."""
+    path = Path(path)
+    if not CACHE_ENABLED:
+        return
+    state_key = _state_key(schema, stamp)
+    for name, aggregator in running.items():
+        if not aggregator.persistent:
+            continue
+        target = _state_path(path, state_key, name)
+        try:
+            target.parent.mkdir(parents=True, exist_ok=True)
+            tmp = target.with_name(f"{target.name}.{os.getpid()}.tmp")
+            aggregator.state().to_parquet(tmp, index=False)
+            os.replace(tmp, target)
+            for stale in target.parent.glob(f"{path.stem}.*.{name}.parquet"):
+                if stale != target:
+                    stale.unlink(missing_ok=True)
+        except Exception:
+            logger.warning("Could not save the %s aggregate of %s", name, path.name, exc_info=True)
+
+
+@dataclass
+class IngestResult:
+    """Outcome of streaming one table."""
+    frame: Optional[pd.DataFrame]  # compacted table; None unless retained
+    rows: int
+    raw_bytes: int  # deep memory the validated table would take before compaction
+    quality: Optional[Dict[str, Any]]  # None when the source file is missing
+    aggregators: Dict[str, Aggregator] = field(default_factory=dict)
+    from_cache: bool = False
+
+
+def segment_chunks(segment: Path, chunk_rows: int = CHUNK_ROWS) -> Iterator[pd.DataFrame]:
+    """Validated chunks of a Parquet file (cache file or delta segment)."""
+    import pyarrow.parquet as pq
+
+    for batch in pq.ParquetFile(segment).iter_batches(batch_size=chunk_rows):
+        yield batch.to_pandas()
+
+
+def segment_rows(segment: Path) -> Optional[int]:
+    """Table row count recorded in a delta segment after it was applied."""
+    import pyarrow.parquet as pq
+
+    value = (pq.ParquetFile(segment).metadata.metadata or {}).get(ROWS_METADATA_KEY.encode())
+    return int(value) if value is not None else None
+
+
+def _superseded(segments: Sequence[Path], key: Optional[str]) -> List[set]:
+    """For the base and each segment, the keys a later segment replaces."""
+    later: List[set] = [set() for _ in range(len(segments) + 1)]
+    if key is None:
+        return later
+    import pyarrow.parquet as pq
+
+    replaced: set = set()
+    for index in range(len(segments), 0, -1):
+        later[index] = set(replaced)
+        replaced |= set(pq.read_table(segments[index - 1], columns=[key]).column(key).to_pylist())
+    later[0] = replaced
+    return later
+
+
+def ingest_table(
+    path: Path,
+    schema: TableSchema,
+    aggregators: Optional[Dict[str, Callable[[], Aggregator]]] = None,
+    retain: bool = True,
+    chunk_rows: int = CHUNK_ROWS,
+    state_key: Optional[str] = None,
+    deltas: Sequence[Path] = (),
+) -> IngestResult:
+    """
+    Stream `path` through `schema` chunk by chunk, followed by any delta
+    `segments` appended on top of it by incremental ingestion (rows a later
+    segment replaces are skipped). Every chunk feeds a fresh instance of each
+    aggregator factory; the compacted chunks are concatenated into the
+    returned frame only when `retain` is set. With a `state_key` (the stamp of
+    everything the aggregators depend on) persistent aggregator states are
+    saved after a full pass and restored instead of replaying.
+    """
+    path = Path(path)
+    running = {name: factory() for name, factory in (aggregators or {}).items()}
+    reports: List[Dict[str, Any]] = []
+    writer: Optional[_ChunkWriter] = None
+    quality: Optional[Dict[str, Any]] = None
+    from_cache = False
+    persist = bool(CACHE_ENABLED and state_key and path.exists())
+
+    if not path.exists():
+        chunks: Iterator[pd.DataFrame] = iter([schema.empty_frame()])
+    else:
+        target = cache_path(path, source_stamp(path), schema.fingerprint)
+        cached = _open_cache(target) if CACHE_ENABLED else None
+        if (
+            cached is not None and persist and not retain and running
+            and all(a.persistent for a in running.values()) and _restore_states(path, _state_key(schema, state_key), running)
+        ):
+            return IngestResult(
+                frame=None,
+                rows=(segment_rows(deltas[-1]) if deltas else None) or cached.rows,
+                raw_bytes=cached.raw_bytes,
+                quality=cached.quality,
+                aggregators=running,
+                from_cache=True,
+            )
+        if cached is not None:
+            chunks, quality, from_cache = cached.chunks(chunk_rows), cached.quality, True
+        else:
+            chunks = _validated_chunks(path, schema, chunk_rows, reports)
+            if CACHE_ENABLED:
+                try:
+                    writer = _ChunkWriter(path, target)
+                except ImportError:
+                    writer = None  # no Parquet engine: stream without caching
+
+    superseded = _superseded(deltas, schema.key) if deltas else [set()]
+    parts: List[pd.DataFrame] = []
+    keys: List[pd.Series] = []
+    rows = raw_bytes = 0
+
+    def consume(chunk: pd.DataFrame, replaced: set):
+        nonlocal rows, raw_bytes
+        if replaced:
+            chunk = chunk[~chunk[schema.key].isin(replaced)]
+        rows += len(chunk)
+        raw_bytes += int(chunk.memory_usage(deep=True, index=False).sum())
+        chunk = compact_frame(chunk, categorical=schema.names_of(CATEGORY), ids=schema.names_of(ID))
+        for aggregator in running.values():
+            aggregator.update(chunk)
+        if schema.key is not None:
+            keys.append(chunk[schema.key])
+        if retain:
+            parts.append(chunk)
+
+    try:
+        for chunk in chunks:
+            if writer is not None:
+                try:
+                    writer.write(chunk)
+                except Exception:
+                    # Caching is best-effort (read-only data dir, ...)
+                    logger.warning("Could not cache %s; continuing without", path.name, exc_info=True)
+                    writer.abort()
+                    writer = None
+            consume(chunk, superseded[0])
+            del chunk
+
+        if reports:
+            quality = merge_reports(reports)
+            if schema.key is not None and rows:
+                # Keys are checked across chunks; only the (compact) key column is kept for it
+                quality["duplicate_keys"] = int(pd.concat(keys, ignore_index=True).duplicated().sum())
+        if writer is not None:
+            writer.close(quality, raw_bytes)
+            writer = None
+    finally:
+        if writer is not None:
+            writer.abort()
+    for index, segment in enumerate(deltas, start=1):
+        for chunk in segment_chunks(segment, chunk_rows):
+            consume(chunk, superseded[index])
+    if persist:
+        save_states(path, schema, state_key, running)
+
+    return IngestResult(
+        frame=concat_compact(parts) if retain else None,
+        rows=rows,
+        raw_bytes=raw_bytes,
+        quality=quality,
+        aggregators=running,
+        from_cache=from_cache,
+    )
+
+
+def _validated_chunks(
+    path: Path, schema: TableSchema, chunk_rows: int, reports: List[Dict[str, Any]]
+) -> Iterator[pd.DataFrame]:
+    return validate_chunks(iter_source_chunks(path, chunk_rows), schema, reports)
+
+
+def validate_chunks(
+    raw_chunks: Iterable[pd.DataFrame], schema: TableSchema, reports: List[Dict[str, Any]]
+) -> Iterator[pd.DataFrame]:
+    """Schema-applied chunks; each chunk's quality report is appended to `reports`."""
+    for raw in raw_chunks:
+        chunk, report = schema.apply(raw)
+        reports.append(report)
+        # Columns outside the schema are carried as text so every row group shares one Parquet schema
+        for column in report["unexpected_columns"]:
+            chunk[column] = chunk[column].astype("string")
+        yield chunk.reset_index(drop=True)
@@ -0,0 +1,181 @@
+"""
+Agent Load Test Harness
+Drives POST /agent/query from N concurrent sessions (each sends its questions
+sequentially, like a user in a chat) and reports latency percentiles,
+throughput and how agent run time splits between tools and the model.
+
+    # Offline: start an in-process server on the fake model
+    python -m Adk_Agent.loadtest.agent_load --serve --sessions 20 --requests 5 --latency-ms 200
+
+    # Against a running FastAPI backend (start it with MODEL=fake for offline runs)
+    python -m Adk_Agent.loadtest.agent_load --url http://localhost:8001 --sessions 20 --requests 5
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import requests
+
+QUESTIONS = [
+    "How is the business doing overall?",
+    "How is revenue trending?",
+    "Which customer segments are churning?",
+    "How many overdue invoices do we have?",
+    "Are we low on any inventory?",
+    "What are the active risks?",
+]
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of `values` (0 when empty)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, int(round(pct / 100 * len(ordered) + 0.5)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+def _pool_stats(url: str) -> Optional[Dict[str, Any]]:
+    try:
+        resp = requests.get(f"{url}/agent/pool", timeout=10)
+        return resp.json() if resp.ok else None
+    except requests.RequestException:
+        return None
+
+
+def _run_session(url: str, session: int, count: int, timeout: float) -> List[Dict[str, Any]]:
+    results = []
+    http = requests.Session()
+    for i in range(count):
+        question = QUESTIONS[(session + i) % len(QUESTIONS)]
+        started = time.perf_counter()
+        try:
+            resp = http.post(
+                f"{url}/agent/query",
+                json={"question": question, "session_id": f"load-{session}"},
+                timeout=timeout,
+            )
+            status = resp.status_code
+        except requests.RequestException as e:
+            status = type(e).__name__
+        results.append({"status": status, "latency_ms": (time.perf_counter() - started) * 1000})
+    return results
+
+
+def run_load(url: str, sessions: int, requests_per_session: int, timeout: float = 120.0) -> Dict[str, Any]:
+    """Run the load test and return a report dict."""
+    before = _pool_stats(url)
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=sessions) as pool:
+        batches = list(pool.map(
+            lambda s: _run_session(url, s, requests_per_session, timeout), range(sessions)
+        ))
+    elapsed = time.perf_counter() - started
+    after = _pool_stats(url)
+
+    results = [r for batch in batches for r in batch]
+    ok = [r["latency_ms"] for r in results if r["status"] == 200]
+    report = {
+        "sessions": sessions,
+        "requests": len(results),
+        "succeeded": len(ok),
+        "status_counts": dict(Counter(str(r["status"]) for r in results)),
+        "elapsed_s": round(elapsed, 3),
+        "throughput_rps": round(len(ok) / elapsed, 2) if elapsed else 0.0,
+        "latency_ms": {
+            "p50": round(percentile(ok, 50), 1),
+            "p95": round(percentile(ok, 95), 1),
+            "p99": round(percentile(ok, 99), 1),
+            "max": round(max(ok), 1) if ok else 0.0,
+        },
+    }
+    if before and after:
+        completed = (after["completed"] + after["failed"]) - (before["completed"] + before["failed"])
+        run_ms = after["total_run_ms"] - before["total_run_ms"]
+        tool_ms = after["total_tool_ms"] - before["total_tool_ms"]
+        report["agent_time_ms"] = {
+            "avg_run": round(run_ms / completed, 1) if completed else 0.0,
+            "avg_tool": round(tool_ms / completed, 1) if completed else 0.0,
+            "avg_model": round((run_ms - tool_ms) / completed, 1) if completed else 0.0,  # model + framework
+            "tool_share_pct": round(tool_ms / run_ms * 100, 1) if run_ms else 0.0,
+        }
+        report["pool"] = {k: after[k] for k in ("size", "max_queue", "rejected", "avg_wait_ms", "max_wait_ms")}
+    return report
+
+
+def _serve_in_process(port: int):
+    """Start the FastAPI app on the fake model in a background thread."""
+    import uvicorn
+
+    sys.path.insert(0, str(Path(__file__).resolve().parent.parent.parent))
+    from Adk_Agent.api.fastapi_backend import app
+
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.05)
+    return server, thread
+
+
+def _print_report(report: Dict[str, Any]):
+    lat = report["latency_ms"]
+    print(f"Requests:    {report['succeeded']}/{report['requests']} ok over {report['sessions']} sessions "
+          f"{report['status_counts']}")
+    print(f"Elapsed:     {report['elapsed_s']}s  ->  {report['throughput_rps']} req/s")
+    print(f"Latency ms:  p50={lat['p50']}  p95={lat['p95']}  p99={lat['p99']}  max={lat['max']}")
+    if "agent_time_ms" in report:
+        t = report["agent_time_ms"]
+        print(f"Agent ms:    run={t['avg_run']}  tool={t['avg_tool']}  model={t['avg_model']}  "
+              f"(tools {t['tool_share_pct']}% of run time)")
+        p = report["pool"]
+        print(f"Pool:        size={p['size']}  rejected={p['rejected']}  "
+              f"avg_wait={p['avg_wait_ms']}ms  max_wait={p['max_wait_ms']}ms")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load test /agent/query")
+    parser.add_argument("--url", default="http://localhost:8001", help="backend base URL")
+    parser.add_argument("--serve", action="store_true", help="start an in-process server on the fake model")
+    parser.add_argument("--port", type=int, default=8765, help="port for --serve")
+    parser.add_argument("--sessions", type=int, default=10, help="concurrent sessions")
+    parser.add_argument("--requests", type=int, default=5, help="sequential queries per session")
+    parser.add_argument("--latency-ms", type=float, default=None, help="fake model latency per call (--serve)")
+    parser.add_argument("--pool-size", type=int, default=None, help="agent runner pool size (--serve)")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args(argv)
+
+    server = None
+    url = args.url.rstrip("/")
+    if args.serve:
+        # Must be set before the agent and pool modules are imported
+        os.environ["MODEL"] = "fake"
+        os.environ.setdefault("MONITORING_SCHEDULER", "0")
+        if args.latency_ms is not None:
+            os.environ["FAKE_MODEL_LATENCY_MS"] = str(args.latency_ms)
+        if args.pool_size is not None:
+            os.environ["AGENT_POOL_SIZE"] = str(args.pool_size)
+        server, _ = _serve_in_process(args.port)
+        url = f"http://127.0.0.1:{args.port}"
+
+    try:
+        report = run_load(url, args.sessions, args.requests)
+    finally:
+        if server is not None:
+            server.should_exit = True
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        _print_report(report)
+
+
+if __name__ == "__main__":
+    main()
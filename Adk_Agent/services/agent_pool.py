@@ -0,0 +1,235 @@
+"""
+Agent Runner Pool
+ADK runners and session services are created once at startup instead of per
+request. Each slot owns a Runner, its InMemorySessionService and a thread
+running a private event loop, and serves one query at a time, so the pool size
+bounds agent concurrency. A session_id is pinned to one slot (hash affinity),
+so its ADK session - the conversation history the model sees - persists across
+requests; anonymous queries go to the least-loaded slot with a throwaway
+session. Admission is bounded: beyond `max_queue` waiting queries new ones are
+rejected with ExecutorSaturated (503).
+"""
+import asyncio
+import logging
+import os
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional
+
+from .agent_stream import APP_NAME, USER_ID, stream_agent_events
+from .executors import ExecutorSaturated
+from .memory import log_insight
+from .session_store import SESSION_CAPACITY, session_scope, session_store
+from .tracing import current_span, start_span, use_span
+
+logger = logging.getLogger(__name__)
+
+POOL_SIZE = int(os.getenv("AGENT_POOL_SIZE", "4"))
+POOL_MAX_QUEUE = int(os.getenv("AGENT_POOL_MAX_QUEUE", "32"))
+
+Emit = Callable[[str, Dict[str, Any]], None]
+
+
+def build_runner():
+    """Default runner factory: the production agent with an in-memory session service."""
+    from google.adk.runners import Runner
+    from google.adk.sessions import InMemorySessionService
+    from ..agent.agent import root_agent
+    return Runner(agent=root_agent, app_name=APP_NAME, session_service=InMemorySessionService())
+
+
+def record_conversation(question: str, text_response: str, session_id: Optional[str]):
+    """Log the interaction to memory and advance the session's turn counter."""
+    log_insight("conversation", {
+        "question": question,
+        "response_preview": text_response[:200] if len(text_response) > 200 else text_response
+    })
+    if session_id is not None:
+        turns = session_store.get(session_id).state.get("turns", 0)
+        session_store.update_state(session_id, turns=turns + 1, last_question=question)
+
+
+class _Slot:
+    """One runner with its own event loop thread."""
+
+    def __init__(self, index: int, runner):
+        self.index = index
+        self.runner = runner
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, name=f"agent-slot-{index}", daemon=True)
+        self.thread.start()
+        self.lock = asyncio.Lock()  # one query at a time per slot
+        self.sessions: "OrderedDict[str, None]" = OrderedDict()  # persistent ADK sessions, LRU order
+        self.queued = 0
+        self.active = 0
+        self.completed = 0
+
+    @property
+    def load(self) -> int:
+        return self.queued + self.active
+
+    def stop(self):
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join(timeout=5)
+
+
+class AgentRunnerPool:
+    """Fixed set of long-lived ADK runners with per-session affinity."""
+
+    def __init__(
+        self,
+        size: int = POOL_SIZE,
+        max_queue: int = POOL_MAX_QUEUE,
+        sessions_per_slot: Optional[int] = None,
+        runner_factory: Callable[[], Any] = build_runner,
+    ):
+        self.size = size
+        self.max_queue = max_queue
+        self.sessions_per_slot = sessions_per_slot or max(1, SESSION_CAPACITY // size)
+        self.runner_factory = runner_factory
+        self._slots: List[_Slot] = []
+        self._lock = threading.Lock()
+        self.queued = 0
+        self.active = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.total_wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+        self.total_run_seconds = 0.0
+        self.total_tool_seconds = 0.0  # run time spent inside tools; the rest is model + framework
+
+    @property
+    def started(self) -> bool:
+        return bool(self._slots)
+
+    def start(self):
+        """Create the runners and their loop threads (idempotent)."""
+        with self._lock:
+            if not self._slots:
+                self._slots = [_Slot(i, self.runner_factory()) for i in range(self.size)]
+
+    def stop(self):
+        with self._lock:
+            slots, self._slots = self._slots, []
+        for slot in slots:
+            slot.stop()
+
+    def _slot_for(self, session_id: Optional[str]) -> _Slot:
+        if session_id is not None:
+            return self._slots[zlib.crc32(session_id.encode("utf-8")) % len(self._slots)]
+        return min(self._slots, key=lambda s: s.load)
+
+    def submit(self, question: str, session_id: Optional[str] = None, emit: Optional[Emit] = None) -> "asyncio.Future":
+        """
+        Admit a query and return an awaitable future for its final response
+        (call from an event loop). `emit` receives every streamed event from
+        the slot thread. Raises ExecutorSaturated when the queue is full.
+        """
+        self.start()
+        with self._lock:
+            if self.queued >= self.max_queue:
+                self.rejected += 1
+                raise ExecutorSaturated(f"agent pool queue is full ({self.max_queue} pending)")
+            self.queued += 1
+            slot = self._slot_for(session_id)
+            slot.queued += 1
+        coro = self._serve(slot, question, session_id, emit, time.perf_counter(), current_span())
+        return asyncio.wrap_future(asyncio.run_coroutine_threadsafe(coro, slot.loop))
+
+    async def run(self, question: str, session_id: Optional[str] = None) -> Dict[str, Any]:
+        return await self.submit(question, session_id)
+
+    async def _serve(
+        self, slot: _Slot, question: str, session_id: Optional[str], emit: Optional[Emit], submitted: float, parent=None
+    ):
+        async with slot.lock:
+            started = time.perf_counter()
+            wait = started - submitted
+            with self._lock:
+                self.queued -= 1
+                slot.queued -= 1
+                self.active += 1
+                slot.active += 1
+                self.total_wait_seconds += wait
+                self.max_wait_seconds = max(self.max_wait_seconds, wait)
+            ok = False
+            adk_session_id = None
+            tool_ms = 0.0
+            try:
+                adk_session_id = await self._ensure_session(slot, session_id)
+                result = None
+                # The slot loop does not inherit the caller's context; re-attach its span
+                with session_scope(session_id), use_span(parent), \
+                        start_span("agent.run", slot=slot.index, wait_ms=round(wait * 1000, 2)) as span:
+                    async for name, data in stream_agent_events(slot.runner, question, adk_session_id):
+                        if emit is not None:
+                            emit(name, data)
+                        if name == "tool_result":
+                            tool_ms += data.get("duration_ms") or 0.0
+                        elif name == "done":
+                            result = data
+                    span.set_attribute("tool_ms", round(tool_ms, 2))
+                    record_conversation(question, result.get("text", ""), session_id)
+                ok = True
+                return result
+            finally:
+                if session_id is None and adk_session_id is not None:
+                    await slot.runner.session_service.delete_session(
+                        app_name=APP_NAME, user_id=USER_ID, session_id=adk_session_id
+                    )
+                with self._lock:
+                    self.active -= 1
+                    slot.active -= 1
+                    self.total_run_seconds += time.perf_counter() - started
+                    self.total_tool_seconds += tool_ms / 1000
+                    if ok:
+                        self.completed += 1
+                        slot.completed += 1
+                    else:
+                        self.failed += 1
+
+    async def _ensure_session(self, slot: _Slot, session_id: Optional[str]) -> str:
+        """Return the slot's ADK session for `session_id`, creating it (and evicting the LRU one) if needed."""
+        service = slot.runner.session_service
+        if session_id is None:
+            session = await service.create_session(app_name=APP_NAME, user_id=USER_ID)
+            return session.id
+        if session_id in slot.sessions:
+            slot.sessions.move_to_end(session_id)
+            return session_id
+        await service.create_session(app_name=APP_NAME, user_id=USER_ID, session_id=session_id)
+        slot.sessions[session_id] = None
+        while len(slot.sessions) > self.sessions_per_slot:
+            evicted, _ = slot.sessions.popitem(last=False)
+            await service.delete_session(app_name=APP_NAME, user_id=USER_ID, session_id=evicted)
+        return session_id
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            started = self.completed + self.failed + self.active
+            finished = self.completed + self.failed
+            return {
+                "size": self.size,
+                "max_queue": self.max_queue,
+                "queue_depth": self.queued,
+                "active": self.active,
+                "completed": self.completed,
+                "failed": self.failed,
+                "rejected": self.rejected,
+                "avg_wait_ms": round(self.total_wait_seconds / started * 1000, 3) if started else 0.0,
+                "max_wait_ms": round(self.max_wait_seconds * 1000, 3),
+                "avg_run_ms": round(self.total_run_seconds / finished * 1000, 3) if finished else 0.0,
+                "avg_tool_ms": round(self.total_tool_seconds / finished * 1000, 3) if finished else 0.0,
+                "total_run_ms": round(self.total_run_seconds * 1000, 3),
+                "total_tool_ms": round(self.total_tool_seconds * 1000, 3),
+                "slots": [
+                    {"queued": s.queued, "active": s.active, "completed": s.completed, "sessions": len(s.sessions)}
+                    for s in self._slots
+                ],
+            }
+
+
+agent_pool = AgentRunnerPool()
@@ -0,0 +1,107 @@
+"""
+Agent Event Streaming
+Runs one query through an ADK Runner with SSE streaming enabled and turns ADK
+events into progress events for the chat UI:
+- `tool_call`   {"id", "name", "args"} when the model invokes a tool
+- `tool_result` {"id", "name", "duration_ms"} when the tool returns
+- `token`       {"text"} for each partial chunk of the answer
+- `done`        the final create_agent_response() payload, including the
+                visuals the tools produced (collected next to the tool results
+                through tool_output.collect_visuals(), so they stay out of the
+                model's context)
+Each model turn (from the question or the last tool result to the next tool
+call or final answer) is recorded as a `model.generate` trace span.
+"""
+import time
+from typing import Any, AsyncIterator, Dict, List, Tuple
+
+from .tool_output import collect_visuals
+from .tracing import record_span
+from .visualization import create_agent_response
+
+APP_NAME = "agentic_bi_copilot"
+USER_ID = "default"
+
+AgentEvent = Tuple[str, Dict[str, Any]]
+
+
+def _collect_visuals(response: Any) -> List[Dict[str, Any]]:
+    """
+    Pull visualization specs out of a tool response ("visual" or "visuals"
+    keys) - for tools whose output is not compacted, which return them inline.
+    """
+    if not isinstance(response, dict):
+        return []
+    if "result" in response and isinstance(response["result"], dict):
+        response = response["result"]  # ADK wraps non-dict returns as {"result": ...}
+    visuals = []
+    if isinstance(response.get("visual"), dict):
+        visuals.append(response["visual"])
+    if isinstance(response.get("visuals"), list):
+        visuals.extend(v for v in response["visuals"] if isinstance(v, dict))
+    return visuals
+
+
+def _event_text(event) -> str:
+    if not event.content or not event.content.parts:
+        return ""
+    return "".join(part.text for part in event.content.parts if getattr(part, "text", None))
+
+
+async def stream_agent_events(runner, question: str, session_id: str) -> AsyncIterator[AgentEvent]:
+    """Run `question` in an existing ADK session and yield (event name, payload) pairs."""
+    # Lazy imports keep ADK optional at import time
+    from google.adk.agents.run_config import RunConfig, StreamingMode
+    from google.genai import types
+
+    message = types.Content(role="user", parts=[types.Part(text=question)])
+
+    visuals = collect_visuals()
+    tool_started: Dict[str, float] = {}
+    streamed: List[str] = []  # partial chunks of the current model turn
+    final_text = ""
+    model_started = time.time_ns()
+    model_turns = 0
+
+    async for event in runner.run_async(
+        user_id=USER_ID,
+        session_id=session_id,
+        new_message=message,
+        run_config=RunConfig(streaming_mode=StreamingMode.SSE),
+    ):
+        calls = event.get_function_calls()
+        if calls:
+            model_turns += 1
+            record_span("model.generate", model_started, time.time_ns(), turn=model_turns, tool_calls=len(calls))
+        for call in calls:
+            tool_started[call.id] = time.perf_counter()
+            streamed = []
+            yield "tool_call", {"id": call.id, "name": call.name, "args": call.args or {}}
+
+        responses = event.get_function_responses()
+        if responses:
+            model_started = time.time_ns()
+        for response in responses:
+            started = tool_started.pop(response.id, None)
+            visuals.extend(_collect_visuals(response.response))
+            yield "tool_result", {
+                "id": response.id,
+                "name": response.name,
+                "duration_ms": round((time.perf_counter() - started) * 1000, 2) if started else None,
+            }
+
+        text = _event_text(event)
+        if not text:
+            continue
+        if event.partial:
+            streamed.append(text)
+            yield "token", {"text": text}
+        elif event.is_final_response():
+            model_turns += 1
+            record_span("model.generate", model_started, time.time_ns(), turn=model_turns, chars=len(text))
+            if not streamed:
+                yield "token", {"text": text}  # model did not stream this turn
+            final_text = text
+
+    yield "done", create_agent_response(text=final_text or "".join(streamed), visuals=visuals)
+
@@ -0,0 +1,120 @@
+"""
+Bounded executors for blocking work called from async request handlers.
+The data pool keeps cheap data reads (snapshots, risk lookups) off the event
+loop; agent calls run on their own runner pool (services/agent_pool.py) so
+they never queue in front of data reads. Each pool tracks queue depth and
+wait/run times.
+"""
+import asyncio
+import contextvars
+import functools
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict
+
+
+class ExecutorSaturated(RuntimeError):
+    """Raised when a pool's queue is full and new work is rejected."""
+
+
+class InstrumentedExecutor:
+    """Thread pool with an admission limit and queue/latency counters."""
+
+    def __init__(self, name: str, max_workers: int, max_queue: int):
+        self.name = name
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=name)
+        self._lock = threading.Lock()
+        self.queued = 0
+        self.active = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.total_wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+        self.total_run_seconds = 0.0
+
+    def _wrap(self, fn: Callable, submitted: float) -> Callable:
+        def task():
+            started = time.perf_counter()
+            wait = started - submitted
+            with self._lock:
+                self.queued -= 1
+                self.active += 1
+                self.total_wait_seconds += wait
+                self.max_wait_seconds = max(self.max_wait_seconds, wait)
+            ok = False
+            try:
+                result = fn()
+                ok = True
+                return result
+            finally:
+                with self._lock:
+                    self.active -= 1
+                    self.total_run_seconds += time.perf_counter() - started
+                    if ok:
+                        self.completed += 1
+                    else:
+                        self.failed += 1
+        return task
+
+    async def run(self, fn: Callable, *args, **kwargs) -> Any:
+        """Run `fn(*args, **kwargs)` on the pool without blocking the event loop."""
+        return await self.submit(fn, *args, **kwargs)
+
+    def submit(self, fn: Callable, *args, **kwargs) -> "asyncio.Future":
+        """
+        Admit `fn` immediately and return an awaitable future (call from the
+        event loop). Raises ExecutorSaturated before any work is scheduled, so
+        streaming handlers can reject a request before sending headers.
+        """
+        with self._lock:
+            if self.queued >= self.max_queue:
+                self.rejected += 1
+                raise ExecutorSaturated(f"{self.name} executor queue is full ({self.max_queue} pending)")
+            self.queued += 1
+        task = self._wrap(functools.partial(fn, *args, **kwargs), time.perf_counter())
+        # Carry the caller's context (current trace span, session) onto the worker thread
+        future = self._pool.submit(contextvars.copy_context().run, task)
+        future.add_done_callback(self._on_done)
+        return asyncio.wrap_future(future)
+
+    def _on_done(self, future):
+        # A task cancelled before it started never decremented the queue
+        if future.cancelled():
+            with self._lock:
+                self.queued -= 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            started = self.completed + self.failed + self.active
+            finished = self.completed + self.failed
+            return {
+                "max_workers": self.max_workers,
+                "max_queue": self.max_queue,
+                "queue_depth": self.queued,
+                "active": self.active,
+                "completed": self.completed,
+                "failed": self.failed,
+                "rejected": self.rejected,
+                "avg_wait_ms": round(self.total_wait_seconds / started * 1000, 3) if started else 0.0,
+                "max_wait_ms": round(self.max_wait_seconds * 1000, 3),
+                "avg_run_ms": round(self.total_run_seconds / finished * 1000, 3) if finished else 0.0,
+            }
+
+    def shutdown(self, wait: bool = True):
+        self._pool.shutdown(wait=wait)
+
+
+data_executor = InstrumentedExecutor(
+    "data",
+    max_workers=int(os.getenv("DATA_EXECUTOR_WORKERS", "8")),
+    max_queue=int(os.getenv("DATA_EXECUTOR_MAX_QUEUE", "256")),
+)
+
+
+def executor_stats() -> Dict[str, Dict[str, Any]]:
+    return {"data": data_executor.stats()}
@@ -0,0 +1,140 @@
+"""
+Live Update Hub
+Fans monitoring snapshot deltas and risk changes out to streaming clients
+(SSE / WebSocket). Each event is serialized once and shared by every
+subscriber; each subscriber has a bounded queue, and a client that falls
+behind is reset to a single "resync" event instead of buffering unboundedly.
+"""
+import asyncio
+import json
+import os
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+SUBSCRIBER_QUEUE_SIZE = int(os.getenv("LIVE_UPDATES_QUEUE_SIZE", "100"))
+
+# (event name, JSON payload) – payloads are encoded once per publish
+Event = Tuple[str, str]
+RESYNC: Event = ("resync", "{}")
+
+
+def diff_snapshots(old: Optional[Dict[str, Any]], new: Dict[str, Any]) -> Dict[str, Any]:
+    """Return only the metric and status fields that changed between two snapshots."""
+    old = old or {}
+    changed_metrics = {}
+    old_metrics = old.get("metrics", {})
+    for domain, section in new.get("metrics", {}).items():
+        previous = old_metrics.get(domain, {})
+        fields = {k: v for k, v in section.items() if previous.get(k) != v}
+        if fields:
+            changed_metrics[domain] = fields
+    old_status = old.get("status", {})
+    changed_status = {k: v for k, v in new.get("status", {}).items() if old_status.get(k) != v}
+    return {"timestamp": new.get("timestamp"), "metrics": changed_metrics, "status": changed_status}
+
+
+class Subscription:
+    """One streaming client's bounded event queue."""
+
+    def __init__(self, hub: "LiveUpdateHub", maxsize: int):
+        self.hub = hub
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=maxsize)
+        self.dropped = 0
+
+    def offer(self, event: Event):
+        """Enqueue without blocking; on overflow replace the backlog with a resync marker."""
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.dropped += self.queue.qsize()
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(RESYNC)
+
+    async def next(self, timeout: Optional[float] = None) -> Optional[Event]:
+        """Wait for the next event; returns None on timeout (use it for heartbeats)."""
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    def close(self):
+        self.hub.unsubscribe(self)
+
+
+class LiveUpdateHub:
+    """Thread-safe publisher with per-client asyncio queues on one event loop."""
+
+    def __init__(self, queue_size: int = SUBSCRIBER_QUEUE_SIZE):
+        self.queue_size = queue_size
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._subscribers: List[Subscription] = []
+        self._lock = threading.Lock()
+        self._last_snapshot: Optional[Dict[str, Any]] = None
+        self.published = 0
+
+    def attach_loop(self, loop: asyncio.AbstractEventLoop):
+        self._loop = loop
+
+    def subscribe(self) -> Subscription:
+        sub = Subscription(self, self.queue_size)
+        with self._lock:
+            self._subscribers.append(sub)
+        return sub
+
+    def unsubscribe(self, sub: Subscription):
+        with self._lock:
+            if sub in self._subscribers:
+                self._subscribers.remove(sub)
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+    def latest_snapshot(self) -> Optional[Dict[str, Any]]:
+        return self._last_snapshot
+
+    def publish(self, name: str, data: Dict[str, Any]):
+        """Publish an event from any thread."""
+        event = (name, json.dumps(data, default=str))
+        self.published += 1
+        loop = self._loop
+        if loop is None or loop.is_closed() or not self._subscribers:
+            return
+        loop.call_soon_threadsafe(self._fanout, event)
+
+    def _fanout(self, event: Event):
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for sub in subscribers:
+            sub.offer(event)
+
+    def on_snapshot(self, snapshot: Dict[str, Any]):
+        """Snapshot cache listener: publish the changed fields of a new snapshot."""
+        delta = diff_snapshots(self._last_snapshot, snapshot)
+        self._last_snapshot = snapshot
+        if delta["metrics"] or delta["status"]:
+            self.publish("delta", delta)
+
+    def on_risks(self, new_risks: List[Dict[str, Any]], resolved_risks: List[Dict[str, Any]]):
+        """Publish newly generated and resolved risks."""
+        if new_risks or resolved_risks:
+            self.publish("risks", {"new": new_risks, "resolved": resolved_risks})
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            subscribers = list(self._subscribers)
+        return {
+            "subscribers": len(subscribers),
+            "published": self.published,
+            "dropped": sum(s.dropped for s in subscribers),
+            "queue_size": self.queue_size,
+        }
+
+
+def format_sse(event: Event) -> str:
+    name, payload = event
+    return f"event: {name}\ndata: {payload}\n\n"
+
+
+hub = LiveUpdateHub()
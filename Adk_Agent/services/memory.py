@@ -1,69 +1,346 @@
+"""
+Agent memory: preferences, insights and risk references.
+State is held in memory and every change is appended to a journal file by a
+background group-commit flush, so logging an insight is an O(1) in-memory
+append. The journal is periodically compacted into `memory.json` with an
+atomic rename. All file access is serialized across processes by a lock file,
+and entries written by other processes are merged in on each flush.
+"""
+import atexit
 import json
+import os
+import threading
+import time
+import uuid
 from pathlib import Path
 from datetime import datetime
 from typing import Dict, List
 
+from .session_store import current_session_id, session_store
+from .tracing import traced
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
 MEMORY_PATH = Path("data/memory.json")
+JOURNAL_PATH = MEMORY_PATH.with_suffix(".journal")
+LOCK_PATH = MEMORY_PATH.with_suffix(".lock")
+
+FLUSH_INTERVAL_SECONDS = float(os.getenv("MEMORY_FLUSH_INTERVAL_SECONDS", "1.0"))
+COMPACT_EVERY = int(os.getenv("MEMORY_COMPACT_EVERY", "1000"))
 
-def _load_memory():
-    if MEMORY_PATH.exists():
-        try:
-            with open(MEMORY_PATH, "r", encoding="utf-8") as f:
-                return json.load(f)
-        except json.JSONDecodeError:
-            return {"preferences": {}, "insights": [], "risk_references": []}
+MAX_INSIGHTS = 100
+MAX_RISK_REFERENCES = 50
+
+
+def _empty_memory():
     return {"preferences": {}, "insights": [], "risk_references": []}
 
-def _save_memory(mem):
-    MEMORY_PATH.parent.mkdir(parents=True, exist_ok=True)
-    with open(MEMORY_PATH, "w", encoding="utf-8") as f:
-        json.dump(mem, f, indent=2, default=str)
+
+class _FileLock:
+    """Exclusive inter-process lock on a lock file."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._fh = None
+
+    def __enter__(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._fh = open(self.path, "a+")
+        if fcntl is not None:
+            fcntl.flock(self._fh.fileno(), fcntl.LOCK_EX)
+        else:
+            self._fh.seek(0)
+            msvcrt.locking(self._fh.fileno(), msvcrt.LK_LOCK, 1)
+        return self
+
+    def __exit__(self, *exc):
+        if fcntl is not None:
+            fcntl.flock(self._fh.fileno(), fcntl.LOCK_UN)
+        else:
+            self._fh.seek(0)
+            msvcrt.locking(self._fh.fileno(), msvcrt.LK_UNLCK, 1)
+        self._fh.close()
+        self._fh = None
+
+
+def _apply(mem: Dict, op: Dict):
+    """Apply one journal operation to a memory dict."""
+    kind = op.get("op")
+    if kind == "insight":
+        mem["insights"].append(op["entry"])
+        del mem["insights"][:-MAX_INSIGHTS]
+    elif kind == "risk_reference":
+        mem["risk_references"].append(op["entry"])
+        del mem["risk_references"][:-MAX_RISK_REFERENCES]
+    elif kind == "preference":
+        mem["preferences"][op["key"]] = op["value"]
+
+
+class MemoryService:
+    """In-memory agent memory with a write-behind journal."""
+
+    def __init__(self, path: Path = MEMORY_PATH, journal_path: Path = JOURNAL_PATH, lock_path: Path = LOCK_PATH):
+        self.path = path
+        self.journal_path = journal_path
+        self.lock_path = lock_path
+        self.writer_id = uuid.uuid4().hex
+        self._lock = threading.RLock()  # guards in-memory state
+        self._io_lock = threading.Lock()  # serializes flushes within this process
+        self._mem = None
+        self._pending: List[Dict] = []
+        self._journal_id = None  # (st_dev, st_ino) of the journal we have read
+        self._journal_offset = 0
+        self._journal_entries = 0
+        self._flusher = None
+        self.flushes = 0
+        self.compactions = 0
+
+    # ---- file helpers (inter-process lock held) ------------------------
+
+    def _read_base(self) -> Dict:
+        if self.path.exists():
+            try:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    mem = json.load(f)
+            except json.JSONDecodeError:
+                mem = _empty_memory()
+        else:
+            mem = _empty_memory()
+        for key, default in _empty_memory().items():
+            mem.setdefault(key, default)
+        return mem
+
+    def _journal_identity(self):
+        st = self.journal_path.stat()
+        return (st.st_dev, st.st_ino)
+
+    def _read_new_ops(self):
+        """
+        Return (ops, reset): journal entries past our offset. `reset` is True
+        when the journal was replaced by a compaction, in which case every
+        entry of the new journal is returned and memory.json must be reread.
+        """
+        if not self.journal_path.exists():
+            reset = self._journal_id is not None
+            self._journal_id, self._journal_offset, self._journal_entries = None, 0, 0
+            return [], reset
+        ident = self._journal_identity()
+        reset = ident != self._journal_id
+        if reset:
+            self._journal_id, self._journal_offset, self._journal_entries = ident, 0, 0
+        ops = []
+        with open(self.journal_path, "rb") as f:
+            f.seek(self._journal_offset)
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break  # torn write from a crashed writer
+                self._journal_offset += len(line)
+                self._journal_entries += 1
+                try:
+                    ops.append(json.loads(line))
+                except json.JSONDecodeError:
+                    continue
+        return ops, reset
+
+    def _append_journal(self, batch: List[Dict]):
+        self.journal_path.parent.mkdir(parents=True, exist_ok=True)
+        data = "".join(json.dumps(op, default=str) + "\n" for op in batch).encode("utf-8")
+        with open(self.journal_path, "ab") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        self._journal_id = self._journal_identity()
+        self._journal_offset += len(data)
+        self._journal_entries += len(batch)
+
+    def _compact(self):
+        """Write the full state (including pending entries) to memory.json and start a new journal."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_name(f"{self.path.name}.{os.getpid()}.tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self._mem, f, indent=2, default=str)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.path)
+        tmp_journal = self.journal_path.with_name(f"{self.journal_path.name}.{os.getpid()}.tmp")
+        open(tmp_journal, "wb").close()
+        os.replace(tmp_journal, self.journal_path)
+        self._journal_id = self._journal_identity()
+        self._journal_offset = 0
+        self._journal_entries = 0
+        self._pending = []
+        self.compactions += 1
+
+    # ---- in-memory state -----------------------------------------------
+
+    def _ensure_loaded(self) -> Dict:
+        if self._mem is None:
+            with _FileLock(self.lock_path):
+                mem = self._read_base()
+                ops, _ = self._read_new_ops()
+            for op in ops:
+                _apply(mem, op)
+            self._mem = mem
+        return self._mem
+
+    def _record(self, op: Dict):
+        op["w"] = self.writer_id
+        _apply(self._ensure_loaded(), op)
+        self._pending.append(op)
+        self._start_flusher()
+
+    def _start_flusher(self):
+        if self._flusher is None or not self._flusher.is_alive():
+            self._flusher = threading.Thread(target=self._flush_loop, name="memory-flush", daemon=True)
+            self._flusher.start()
+
+    def _flush_loop(self):
+        while True:
+            time.sleep(FLUSH_INTERVAL_SECONDS)
+            try:
+                self.flush()
+            except OSError:
+                pass  # entries stay pending and are retried on the next cycle
+
+    def flush(self):
+        """Group-commit pending entries to the journal and merge other writers' entries."""
+        with self._io_lock:
+            with self._lock:
+                self._ensure_loaded()
+                batch, self._pending = self._pending, []
+            try:
+                with _FileLock(self.lock_path):
+                    ops, reset = self._read_new_ops()
+                    base = self._read_base() if reset else None
+                    if batch:
+                        self._append_journal(batch)
+                        self.flushes += 1
+                    with self._lock:
+                        if reset:
+                            for op in ops:
+                                _apply(base, op)
+                            for op in batch + self._pending:
+                                _apply(base, op)
+                            self._mem = base
+                        else:
+                            for op in ops:
+                                if op.get("w") != self.writer_id:
+                                    _apply(self._mem, op)
+                        if self._journal_entries >= COMPACT_EVERY:
+                            self._compact()
+            except OSError:
+                with self._lock:
+                    self._pending = batch + self._pending
+                raise
+
+    # ---- public API ----------------------------------------------------
+
+    def get_preferences(self) -> Dict:
+        with self._lock:
+            return dict(self._ensure_loaded()["preferences"])
+
+    def set_preference(self, key: str, value) -> Dict:
+        with self._lock:
+            self._record({"op": "preference", "key": key, "value": value})
+            return dict(self._mem["preferences"])
+
+    def log_insight(self, domain: str, payload: dict) -> Dict:
+        entry = {
+            "timestamp": datetime.utcnow().isoformat() + "Z",
+            "domain": domain,
+            "payload": payload,
+        }
+        with self._lock:
+            self._record({"op": "insight", "entry": entry})
+        return entry
+
+    def recent_insights(self, limit: int = 10) -> List[Dict]:
+        with self._lock:
+            return list(reversed(self._ensure_loaded()["insights"]))[:limit]
+
+    def log_risk_reference(self, risk_id: str, context: str) -> Dict:
+        entry = {
+            "timestamp": datetime.utcnow().isoformat() + "Z",
+            "risk_id": risk_id,
+            "context": context,
+        }
+        with self._lock:
+            self._record({"op": "risk_reference", "entry": entry})
+        return entry
+
+    def recent_risk_references(self, limit: int = 10) -> List[Dict]:
+        with self._lock:
+            return list(reversed(self._ensure_loaded()["risk_references"]))[:limit]
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "pending": len(self._pending),  # write-behind backlog
+                "journal_entries": self._journal_entries,
+                "flushes": self.flushes,
+                "compactions": self.compactions,
+            }
+
+
+memory_service = MemoryService()
+atexit.register(lambda: memory_service.flush() if memory_service._pending else None)
+
+
+# The wrappers below are session-aware: inside `session_scope(session_id)`
+# insights and preferences are also kept per session, and reads come from
+# that session (preferences overlay the global ones).
 
 def get_preferences():
-    mem = _load_memory()
-    return mem.get("preferences", {})
+    prefs = memory_service.get_preferences()
+    session_id = current_session_id.get()
+    if session_id is not None:
+        prefs.update(session_store.get(session_id).preferences)
+    return prefs
 
 def set_preference(key: str, value):
-    mem = _load_memory()
-    prefs = mem.get("preferences", {})
-    prefs[key] = value
-    mem["preferences"] = prefs
-    _save_memory(mem)
-    return prefs
+    session_id = current_session_id.get()
+    if session_id is not None:
+        session_store.set_preference(session_id, key, value)
+        return get_preferences()
+    return memory_service.set_preference(key, value)
 
+@traced("memory.log_insight")
 def log_insight(domain: str, payload: dict):
-    mem = _load_memory()
-    entry = {
-        "timestamp": datetime.utcnow().isoformat() + "Z",
-        "domain": domain,
-        "payload": payload,
-    }
-    mem.setdefault("insights", []).append(entry)
-    # keep last 100
-    mem["insights"] = mem["insights"][-100:]
-    _save_memory(mem)
+    entry = memory_service.log_insight(domain, payload)
+    session_id = current_session_id.get()
+    if session_id is not None:
+        session_store.add_insight(session_id, entry)
     return entry
 
+@traced("memory.recent_insights", rows=True)
 def recent_insights(limit: int = 10):
-    mem = _load_memory()
-    return list(reversed(mem.get("insights", [])))[:limit]
+    session_id = current_session_id.get()
+    if session_id is not None:
+        return list(reversed(session_store.get(session_id).insights))[:limit]
+    return memory_service.recent_insights(limit)
 
 
 def log_risk_reference(risk_id: str, context: str):
     """Store a reference to a risk the agent mentioned or generated."""
-    mem = _load_memory()
-    entry = {
-        "timestamp": datetime.utcnow().isoformat() + "Z",
-        "risk_id": risk_id,
-        "context": context,
-    }
-    mem.setdefault("risk_references", []).append(entry)
-    mem["risk_references"] = mem["risk_references"][-50:]  # keep last 50
-    _save_memory(mem)
-    return entry
+    return memory_service.log_risk_reference(risk_id, context)
 
 
 def recent_risk_references(limit: int = 10) -> List[Dict]:
     """Retrieve recent risk references from agent memory."""
-    mem = _load_memory()
-    return list(reversed(mem.get("risk_references", [])))[:limit]
+    return memory_service.recent_risk_references(limit)
+
+
+@traced("memory.flush")
+def flush_memory():
+    """Force pending memory entries to disk."""
+    memory_service.flush()
+
+
+def memory_stats() -> Dict:
+    stats = memory_service.stats()
+    stats["sessions"] = session_store.stats()
+    return stats
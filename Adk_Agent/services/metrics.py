@@ -0,0 +1,228 @@
+"""
+Prometheus Metrics
+Request latency histograms and an in-flight gauge recorded by HTTP middleware
+(ASGI for FastAPI, request hooks for Flask), plus gauges read at scrape time
+from counters the services already keep: dataset loads, snapshot compute time
+per domain, risk store size, memory journal backlog and cache hit ratios.
+Rendered in the Prometheus text exposition format (0.0.4) without the client
+library.
+"""
+import bisect
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Seconds; wide enough for agent queries that spend tens of seconds in the model
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+def _escape(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels: Iterable[Tuple[str, Any]]) -> str:
+    pairs = [f'{k}="{_escape(v)}"' for k, v in labels]
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Histogram:
+    """Cumulative-bucket histogram keyed by label values."""
+
+    def __init__(self, name: str, help: str, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.buckets = tuple(sorted(buckets))
+        self._series: Dict[Labels, List[float]] = {}  # bucket counts..., +Inf count, sum
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        key = tuple(sorted((k, str(v)) for k, v in labels.items()))
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[index] += 1
+            series[-1] += value
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = {key: list(values) for key, values in self._series.items()}
+        for key, values in sorted(series.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), values[:-1]):
+                cumulative += count
+                le = _format_labels(key + (("le", _format_value(bound)),))
+                lines.append(f"{self.name}_bucket{le} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(key)} {_format_value(values[-1])}")
+            lines.append(f"{self.name}_count{_format_labels(key)} {cumulative}")
+        return lines
+
+
+def gauge(name: str, help: str, samples, kind: str = "gauge") -> List[str]:
+    """
+    Render one metric family. `samples` is a number or a list of
+    (labels dict, value) pairs; None values are skipped.
+    """
+    if not isinstance(samples, list):
+        samples = [({}, samples)]
+    lines = [f"# HELP {name} {help}", f"# TYPE {name} {kind}"]
+    for labels, value in samples:
+        if value is not None:
+            lines.append(f"{name}{_format_labels(labels.items())} {_format_value(value)}")
+    return lines
+
+
+HTTP_REQUEST_SECONDS = Histogram("http_request_duration_seconds", "HTTP request latency by route template.")
+DATASET_LOAD_SECONDS = Histogram("copilot_dataset_load_seconds", "Time to load and normalize a dataset table.")
+SNAPSHOT_DOMAIN_SECONDS = Histogram("copilot_snapshot_domain_seconds", "Monitoring snapshot compute time per domain.")
+
+_in_flight = 0
+_in_flight_lock = threading.Lock()
+
+
+def _track_in_flight(delta: int):
+    global _in_flight
+    with _in_flight_lock:
+        _in_flight += delta
+
+
+def observe_request(method: str, route: str, status: int, seconds: float):
+    HTTP_REQUEST_SECONDS.observe(seconds, method=method, route=route, status=status)
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware timing every HTTP request until its last body chunk, so
+    SSE streams count their full duration. Routes are labelled by template
+    (e.g. /agent/sessions/{session_id}) to keep label cardinality bounded.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        started = time.perf_counter()
+        _track_in_flight(1)
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            _track_in_flight(-1)
+            route = getattr(scope.get("route"), "path", None) or "unmatched"
+            observe_request(scope["method"], route, status, time.perf_counter() - started)
+
+
+def instrument_flask(app):
+    """Register request hooks recording the same latency and in-flight metrics for a Flask app."""
+    from flask import g, request
+
+    @app.before_request
+    def _metrics_start():
+        g.metrics_started = time.perf_counter()
+        _track_in_flight(1)
+
+    @app.after_request
+    def _metrics_status(response):
+        g.metrics_status = response.status_code
+        return response
+
+    @app.teardown_request
+    def _metrics_finish(exc):
+        started = g.pop("metrics_started", None)
+        if started is None:
+            return
+        _track_in_flight(-1)
+        route = request.url_rule.rule if request.url_rule is not None else "unmatched"
+        observe_request(request.method, route, g.pop("metrics_status", 500), time.perf_counter() - started)
+
+    return app
+
+
+def _service_lines() -> List[str]:
+    # Imported lazily: these modules import this one for their histograms
+    from ..data_access.registry import registry
+    from .memory import memory_stats
+    from .monitoring_engine import last_run_stats
+    from .risk_engine import risk_store
+    from .snapshot_cache import snapshot_cache_stats
+    from .tool_cache import tool_cache_stats
+
+    datasets = registry.stats()
+    snapshot = snapshot_cache_stats()
+    tools = tool_cache_stats()
+    memory = memory_stats()
+    lines: List[str] = []
+    lines += gauge("copilot_dataset_rows", "Rows in the cached dataset table.",
+                   [({"table": t}, s["rows"]) for t, s in datasets.items()])
+    lines += gauge("copilot_dataset_bytes", "Deep memory use of the cached dataset table.",
+                   [({"table": t}, s["bytes"]) for t, s in datasets.items()])
+    quality = registry.quality_report()
+    lines += gauge("copilot_dataset_dropped_rows", "Source rows rejected by the table schema at the latest ingestion.",
+                   [({"table": t}, sum(q["dropped_rows"].values())) for t, q in quality.items()])
+    lines += gauge("copilot_dataset_invalid_values", "Unparseable source values at the latest ingestion.",
+                   [({"table": t}, sum(q["invalid_values"].values())) for t, q in quality.items()])
+    lines += gauge("copilot_dataset_last_load_seconds", "Duration of the latest load of each table.",
+                   [({"table": t}, s["last_load_seconds"]) for t, s in datasets.items() if s["loads"]])
+    lines += gauge("copilot_dataset_loads_total", "Dataset table (re)loads since start.",
+                   [({"table": t}, s["loads"]) for t, s in datasets.items()], kind="counter")
+    lines += gauge("copilot_ingest_rows_total", "Rows seen by incremental ingestion since start, by outcome.",
+                   [({"table": t, "kind": k}, a[k]) for t, a in registry.appends.items()
+                    for k in ("new", "changed", "unchanged", "skipped")], kind="counter")
+    lines += gauge("copilot_snapshot_last_domain_seconds", "Compute time of each domain in the latest snapshot.",
+                   [({"domain": d}, round(s, 6)) for d, s in last_run_stats["timings"].items()])
+    lines += gauge("copilot_snapshot_degraded_domains", "Domains degraded in the latest snapshot.",
+                   len(last_run_stats["degraded"]))
+    lines += gauge("copilot_snapshot_last_compute_seconds", "Duration of the latest full snapshot computation.",
+                   snapshot["last_compute_seconds"])
+    lines += gauge("copilot_snapshot_age_seconds", "Age of the cached monitoring snapshot.", snapshot["age_seconds"])
+    lines += gauge("copilot_risk_store_rows", "Risks in the risk store by status.",
+                   [({"status": s}, risk_store.count(status=s)) for s in ("ACTIVE", "RESOLVED")])
+    lines += gauge("copilot_memory_pending_entries", "Memory entries waiting for the write-behind flush.",
+                   memory["pending"])
+    lines += gauge("copilot_memory_journal_entries", "Memory journal entries since the last compaction.",
+                   memory["journal_entries"])
+    lines += gauge("copilot_sessions", "Conversation sessions held in memory.", memory["sessions"]["in_memory"])
+    lines += gauge("copilot_cache_hits_total", "Cache hits (coalesced waits count as hits for the snapshot).",
+                   [({"cache": "snapshot"}, snapshot["hits"] + snapshot["coalesced"]),
+                    ({"cache": "tool"}, tools["hits"])], kind="counter")
+    lines += gauge("copilot_cache_misses_total", "Cache misses.",
+                   [({"cache": "snapshot"}, snapshot["misses"]), ({"cache": "tool"}, tools["misses"])],
+                   kind="counter")
+    lines += gauge("copilot_cache_hit_ratio", "Cache hit ratio since start.",
+                   [({"cache": "snapshot"}, snapshot["hit_ratio"]), ({"cache": "tool"}, tools["hit_ratio"])])
+    return lines
+
+
+def render_metrics(extra: Optional[List[str]] = None) -> str:
+    """Full exposition: HTTP metrics, recorded histograms, service gauges and any app-specific `extra` lines."""
+    with _in_flight_lock:
+        in_flight = _in_flight
+    lines = HTTP_REQUEST_SECONDS.render()
+    lines += gauge("http_requests_in_flight", "Requests currently being served.", in_flight)
+    lines += DATASET_LOAD_SECONDS.render()
+    lines += SNAPSHOT_DOMAIN_SECONDS.render()
+    lines += _service_lines()
+    lines += extra or []
+    return "\n".join(lines) + "\n"
@@ -3,78 +3,186 @@ Deterministic Monitoring Engine (NON-LLM)
 Computes business health KPIs for dashboard consumption.
 Returns compact, structured JSON suitable for frontend visualizations.
 """
+import contextvars
+import os
+import time
 import pandas as pd
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, TimeoutError as FutureTimeout
 from datetime import datetime, timedelta
 from ..data_access.revenue_data import compute_revenue_kpis, supporting_signals
 from ..data_access.crm_data import _load_customers
 from ..data_access.erp_data import compute_finance_kpis, payment_cycle_health
 from ..data_access.inventory_data import compute_inventory_kpis, low_stock_alerts
+from ..data_access.registry import get_rollup
+from .metrics import SNAPSHOT_DOMAIN_SECONDS
+from .tracing import start_span, traced
 
+# Execution mode for the per-domain KPI fan-out: "serial", "thread" or "process"
+EXECUTION_MODE = os.getenv("MONITORING_EXECUTION_MODE", "thread")
+MAX_WORKERS = int(os.getenv("MONITORING_MAX_WORKERS", "4"))
+DOMAIN_TIMEOUT_SECONDS = float(os.getenv("MONITORING_DOMAIN_TIMEOUT_SECONDS", "60"))
 
-def compute_monitoring_snapshot():
-    """
-    Compute all dashboard KPIs in one call.
-    Returns a structured dict with metrics and status flags.
-    """
-    # Revenue
+_executors = {}
+# Per-domain wall time (seconds) and degraded domains of the most recent snapshot
+last_run_stats = {"mode": None, "timings": {}, "degraded": []}
+
+
+def _revenue_section():
     revenue_kpis = compute_revenue_kpis()
     revenue_change_pct = revenue_kpis.get("revenue_change_pct", 0.0)
     current_revenue = revenue_kpis.get("current_revenue", 0.0)
-    
-    # Customer health
+    return {
+        "current_revenue": round(current_revenue, 2),
+        "revenue_change_pct": round(revenue_change_pct, 2),
+        "alert": revenue_change_pct < -10  # >10% drop
+    }
+
+
+def _customer_section():
     customers_df = _load_customers()
     total_customers = len(customers_df)
     cutoff = datetime.now() - timedelta(days=30)
     inactive_count = len(customers_df[customers_df["last_order_date"] < cutoff])
     inactive_pct = (inactive_count / total_customers * 100) if total_customers > 0 else 0.0
     churn_rate_pct = inactive_pct  # proxy for churn
-    
-    # Finance
+    return {
+        "total_customers": total_customers,
+        "inactive_count": inactive_count,
+        "churn_rate_pct": round(churn_rate_pct, 2),
+        "alert": churn_rate_pct > 50  # more than half inactive
+    }
+
+
+def _finance_section():
     finance_kpis = compute_finance_kpis()
     payment_health = payment_cycle_health()
     outstanding_cash = payment_health.get("overdue_amount", 0.0)
     overdue_invoices = payment_health.get("overdue_invoices", 0)
     total_spend = finance_kpis.get("total_spend", 0.0)
     overdue_pct = (outstanding_cash / total_spend * 100) if total_spend > 0 else 0.0
-    
-    # Inventory
+    return {
+        "outstanding_cash_amount": round(outstanding_cash, 2),
+        "overdue_invoices": overdue_invoices,
+        "overdue_pct": round(overdue_pct, 2),
+        "alert": overdue_pct > 15 or outstanding_cash > 10_000_000
+    }
+
+
+def _inventory_section():
     inventory_kpis = compute_inventory_kpis()
-    low_stock = low_stock_alerts()
-    low_stock_count = len(low_stock)
+    low_stock_count = len(low_stock_alerts())
     days_inventory = inventory_kpis.get("days_inventory", 0.0)
-    
+    return {
+        "low_stock_item_count": low_stock_count,
+        "days_inventory": round(days_inventory, 2),
+        "alert": low_stock_count > 10 or days_inventory > 45
+    }
+
+
+DOMAIN_SECTIONS = {
+    "revenue": _revenue_section,
+    "customers": _customer_section,
+    "finance": _finance_section,
+    "inventory": _inventory_section,
+}
+
+# Section returned when a domain fails or times out
+DEGRADED_SECTIONS = {
+    "revenue": {"current_revenue": 0.0, "revenue_change_pct": 0.0},
+    "customers": {"total_customers": 0, "inactive_count": 0, "churn_rate_pct": 0.0},
+    "finance": {"outstanding_cash_amount": 0.0, "overdue_invoices": 0, "overdue_pct": 0.0},
+    "inventory": {"low_stock_item_count": 0, "days_inventory": 0.0},
+}
+
+
+def _degraded_section(domain, reason):
+    return {**DEGRADED_SECTIONS[domain], "alert": False, "degraded": True, "error": reason}
+
+
+def _timed_section(domain):
+    started = time.perf_counter()
+    with start_span(f"monitoring.{domain}"):
+        section = DOMAIN_SECTIONS[domain]()
+    return section, time.perf_counter() - started
+
+
+def _get_executor(mode, max_workers):
+    key = (mode, max_workers)
+    if key not in _executors:
+        if mode == "process":
+            _executors[key] = ProcessPoolExecutor(max_workers=max_workers)
+        else:
+            _executors[key] = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="monitoring")
+    return _executors[key]
+
+
+def _compute_sections(mode, max_workers, timeout):
+    """Run every domain section and return (sections, timings, degraded domains)."""
+    sections, timings, degraded = {}, {}, []
+
+    if mode == "serial":
+        for domain in DOMAIN_SECTIONS:
+            try:
+                sections[domain], timings[domain] = _timed_section(domain)
+            except Exception as e:
+                sections[domain] = _degraded_section(domain, str(e))
+                degraded.append(domain)
+        return sections, timings, degraded
+
+    executor = _get_executor(mode, max_workers)
+    if mode == "process":
+        futures = {domain: executor.submit(_timed_section, domain) for domain in DOMAIN_SECTIONS}
+    else:
+        # Threads share the caller's trace; process workers cannot carry the context
+        futures = {
+            domain: executor.submit(contextvars.copy_context().run, _timed_section, domain)
+            for domain in DOMAIN_SECTIONS
+        }
+    deadline = time.monotonic() + timeout
+    for domain, future in futures.items():
+        try:
+            sections[domain], timings[domain] = future.result(timeout=max(0.0, deadline - time.monotonic()))
+        except FutureTimeout:
+            # The worker keeps running in the background; its result is discarded.
+            future.cancel()
+            sections[domain] = _degraded_section(domain, f"timed out after {timeout}s")
+            degraded.append(domain)
+        except Exception as e:
+            sections[domain] = _degraded_section(domain, str(e))
+            degraded.append(domain)
+    return sections, timings, degraded
+
+
+@traced()
+def compute_monitoring_snapshot(mode=None, max_workers=None, timeout=None):
+    """
+    Compute all dashboard KPIs in one call.
+    Returns a structured dict with metrics and status flags.
+
+    The four domains are computed independently (serially, on a thread pool or
+    on a process pool). A domain that fails or exceeds `timeout` seconds is
+    returned with zeroed metrics and `degraded: True` instead of failing the
+    whole snapshot.
+    """
+    mode = mode or EXECUTION_MODE
+    sections, timings, degraded = _compute_sections(
+        mode,
+        max_workers or MAX_WORKERS,
+        DOMAIN_TIMEOUT_SECONDS if timeout is None else timeout,
+    )
+    last_run_stats.update({"mode": mode, "timings": timings, "degraded": degraded})
+    for domain, seconds in timings.items():
+        SNAPSHOT_DOMAIN_SECONDS.observe(seconds, domain=domain)
+
     # Status flags (business stress indicators)
-    high_churn = churn_rate_pct > 50  # more than half inactive
-    cash_crunch = overdue_pct > 15 or outstanding_cash > 10_000_000
-    inventory_crisis = low_stock_count > 10 or days_inventory > 45
-    revenue_alert = revenue_change_pct < -10  # >10% drop
+    high_churn = sections["customers"]["alert"]
+    cash_crunch = sections["finance"]["alert"]
+    inventory_crisis = sections["inventory"]["alert"]
+    revenue_alert = sections["revenue"]["alert"]
     
-    return {
+    snapshot = {
         "timestamp": datetime.utcnow().isoformat() + "Z",
-        "metrics": {
-            "revenue": {
-                "current_revenue": round(current_revenue, 2),
-                "revenue_change_pct": round(revenue_change_pct, 2),
-                "alert": revenue_alert
-            },
-            "customers": {
-                "total_customers": total_customers,
-                "inactive_count": inactive_count,
-                "churn_rate_pct": round(churn_rate_pct, 2),
-                "alert": high_churn
-            },
-            "finance": {
-                "outstanding_cash_amount": round(outstanding_cash, 2),
-                "overdue_invoices": overdue_invoices,
-                "overdue_pct": round(overdue_pct, 2),
-                "alert": cash_crunch
-            },
-            "inventory": {
-                "low_stock_item_count": low_stock_count,
-                "days_inventory": round(days_inventory, 2),
-                "alert": inventory_crisis
-            }
-        },
+        "metrics": sections,
         "status": {
             "high_churn": high_churn,
             "cash_crunch": cash_crunch,
@@ -83,12 +191,15 @@ def compute_monitoring_snapshot():
             "overall_health": "CRITICAL" if (high_churn or cash_crunch or revenue_alert) else "WARNING" if inventory_crisis else "HEALTHY"
         }
     }
+    if degraded:
+        snapshot["degraded"] = degraded
+    return snapshot
 
 
 def get_average_order_value():
-    """Compute AOV from invoice data."""
-    from ..data_access.erp_data import _load_invoices
-    invoices = _load_invoices()
-    if invoices.empty:
+    """Compute AOV from the daily invoice rollup (total revenue over invoice count)."""
+    daily = get_rollup("invoices").daily()
+    count = daily["invoice_count"].sum() if not daily.empty else 0
+    if not count:
         return 0.0
-    return float(invoices["invoice_amount"].mean())
+    return float(daily["revenue"].sum() / count)
@@ -3,37 +3,57 @@ Risk Generation and Persistence Engine
 Generates structured risk objects based on monitoring signals.
 Stores historical risks for review.
 """
-import json
+import os
+import threading
 from pathlib import Path
-from datetime import datetime
+from datetime import datetime, timedelta
 from typing import List, Dict, Optional
+from .risk_store import RiskStore
 
 
-RISKS_PATH = Path("data/risks.json")
+RISKS_PATH = Path("data/risks.json")  # legacy store, migrated on first use
+RISKS_DB_PATH = Path("data/risks.db")
+
+risk_store = RiskStore(RISKS_DB_PATH, legacy_json_path=RISKS_PATH)
+
+# A regenerated risk whose fingerprint matches an ACTIVE risk seen within this
+# window updates that risk instead of opening a new one; any other new risk
+# supersedes (resolves) the open risks of its type.
+DEDUP_WINDOW_HOURS = float(os.getenv("RISK_DEDUP_WINDOW_HOURS", "24"))
+
+# fingerprint -> risk_id of the ACTIVE risk carrying it (built lazily from the store)
+_open_fingerprints: Optional[Dict[str, str]] = None
+_fingerprint_lock = threading.RLock()
 
 
 def _load_risks() -> List[Dict]:
     """Load all risks from persistent storage."""
-    if RISKS_PATH.exists():
-        try:
-            with open(RISKS_PATH, "r", encoding="utf-8") as f:
-                return json.load(f)
-        except json.JSONDecodeError:
-            return []
-    return []
+    return risk_store.query()
 
 
-def _save_risks(risks: List[Dict]):
-    """Persist risks to storage."""
-    RISKS_PATH.parent.mkdir(parents=True, exist_ok=True)
-    with open(RISKS_PATH, "w", encoding="utf-8") as f:
-        json.dump(risks, f, indent=2, default=str)
+def _metric_band(risk: Dict) -> str:
+    """Coarse bucket of the metric that triggered a risk, used in its fingerprint."""
+    metrics = risk.get("metrics", {})
+    risk_type = risk.get("risk_type")
+    if risk_type == "REVENUE":
+        return f"change{int((metrics.get('revenue_change_pct') or 0) // 10 * 10)}"
+    if risk_type == "CUSTOMER":
+        return f"churn{int((metrics.get('churn_rate_pct') or 0) // 10 * 10)}"
+    if risk_type == "INVENTORY":
+        return "low_stock" if (metrics.get("low_stock_count") or 0) > 10 else "holding"
+    return "default"
+
+
+def risk_fingerprint(risk: Dict) -> str:
+    """Identity of an incident: type + metric band + severity."""
+    return f"{risk.get('risk_type')}:{_metric_band(risk)}:{risk.get('severity')}"
 
 
 def generate_risks_from_monitoring(monitoring_snapshot: Dict) -> List[Dict]:
     """
     Generate structured risk objects from monitoring data.
-    Each risk has: risk_type, description, severity, timestamp, status.
+    Each risk has: risk_type, description, severity, timestamp, status,
+    plus a fingerprint used by store_risks to deduplicate repeated alerts.
     """
     risks = []
     ts = datetime.utcnow().isoformat() + "Z"
@@ -100,26 +120,103 @@ def generate_risks_from_monitoring(monitoring_snapshot: Dict) -> List[Dict]:
             "metrics": {"low_stock_count": low_stock_count, "days_inventory": days_inv}
         })
     
+    for risk in risks:
+        risk["fingerprint"] = risk_fingerprint(risk)
+        risk["last_seen"] = ts
+        risk["occurrences"] = 1
+    
     return risks
 
 
-def store_risks(new_risks: List[Dict]):
-    """Append new risks to persistent storage."""
-    existing = _load_risks()
-    existing.extend(new_risks)
-    _save_risks(existing)
+def _fingerprint_index() -> Dict[str, str]:
+    global _open_fingerprints
+    if _open_fingerprints is None:
+        _open_fingerprints = {
+            r["fingerprint"]: r["risk_id"]
+            for r in risk_store.query(status="ACTIVE", where="fingerprint IS NOT NULL")
+        }
+    return _open_fingerprints
+
+
+def _forget_fingerprints(risk_ids: List[str]):
+    with _fingerprint_lock:
+        index = _fingerprint_index()
+        for fp in [fp for fp, rid in index.items() if rid in risk_ids]:
+            del index[fp]
+
+
+def store_risks(new_risks: List[Dict]) -> List[Dict]:
+    """
+    Persist generated risks, deduplicating by fingerprint.
+    A risk matching an ACTIVE risk last seen within DEDUP_WINDOW_HOURS bumps
+    that risk's `last_seen`, `occurrences` and `metrics` instead of being
+    appended. A newly inserted risk (new metric band or severity, or an
+    expired window) resolves the ACTIVE risks of its type as superseded, so
+    each type has at most one open risk. Returns only the risks that were
+    newly inserted.
+    """
+    with _fingerprint_lock:
+        index = _fingerprint_index()
+        matched = {r["fingerprint"]: index[r["fingerprint"]] for r in new_risks if r.get("fingerprint") in index}
+        existing = {}
+        if matched:
+            ids = list(matched.values())
+            rows = risk_store.query(where=f"risk_id IN ({','.join('?' * len(ids))})", params=tuple(ids))
+            existing = {r["risk_id"]: r for r in rows}
+
+        inserted, updated = [], []
+        for risk in new_risks:
+            current = existing.get(matched.get(risk.get("fingerprint")))
+            if current is not None and current.get("status") == "ACTIVE" and _within_window(current, risk):
+                current["last_seen"] = risk.get("timestamp")
+                current["occurrences"] = current.get("occurrences", 1) + 1
+                current["metrics"] = risk.get("metrics", current.get("metrics"))
+                current["description"] = risk.get("description", current.get("description"))
+                updated.append(current)
+            else:
+                inserted.append(risk)
+                if risk.get("fingerprint"):
+                    index[risk["fingerprint"]] = risk["risk_id"]
+
+        superseded = _open_risks_of_types({r.get("risk_type") for r in inserted})
+        risk_store.append(updated + inserted)
+        resolved_at = datetime.utcnow().isoformat() + "Z"
+        for risk in inserted:
+            stale = [r["risk_id"] for r in superseded if r.get("risk_type") == risk.get("risk_type")]
+            risk_store.update_status(
+                stale, "RESOLVED", resolved_at=resolved_at, resolution_reason=f"Superseded by {risk['risk_id']}"
+            )
+            _forget_fingerprints(stale)
+    return inserted
+
+
+def _open_risks_of_types(risk_types) -> List[Dict]:
+    risk_types = sorted(t for t in risk_types if t)
+    if not risk_types:
+        return []
+    return risk_store.query(
+        status="ACTIVE", where=f"risk_type IN ({','.join('?' * len(risk_types))})", params=tuple(risk_types)
+    )
+
+
+def _within_window(existing: Dict, candidate: Dict) -> bool:
+    last_seen = existing.get("last_seen") or existing.get("timestamp") or ""
+    try:
+        last = datetime.fromisoformat(last_seen.replace("Z", ""))
+        now = datetime.fromisoformat((candidate.get("timestamp") or "").replace("Z", ""))
+    except ValueError:
+        return False
+    return now - last <= timedelta(hours=DEDUP_WINDOW_HOURS)
 
 
 def get_active_risks() -> List[Dict]:
     """Retrieve all active risks."""
-    all_risks = _load_risks()
-    return [r for r in all_risks if r.get("status") == "ACTIVE"]
+    return risk_store.query(status="ACTIVE")
 
 
 def get_historical_risks() -> List[Dict]:
     """Retrieve all historical (resolved) risks."""
-    all_risks = _load_risks()
-    return [r for r in all_risks if r.get("status") == "RESOLVED"]
+    return risk_store.query(status="RESOLVED")
 
 
 def get_all_risks() -> List[Dict]:
@@ -127,24 +224,43 @@ def get_all_risks() -> List[Dict]:
     return _load_risks()
 
 
+def get_risks_page(
+    status: Optional[str] = None,
+    risk_type: Optional[str] = None,
+    severity: Optional[str] = None,
+    since: Optional[str] = None,
+    until: Optional[str] = None,
+    cursor: Optional[str] = None,
+    limit: int = 100,
+) -> Dict:
+    """Retrieve one page of risks, newest first, with filters applied in the store."""
+    risks, next_cursor = risk_store.page(
+        status=status, risk_type=risk_type, severity=severity,
+        since=since, until=until, cursor=cursor, limit=limit,
+    )
+    return {"risks": risks, "count": len(risks), "next_cursor": next_cursor}
+
+
+def iter_risks(**filters):
+    """Iterate over all matching risks in batches, newest first."""
+    return risk_store.iterate(**filters)
+
+
 def resolve_risk(risk_id: str):
     """Mark a risk as resolved."""
-    all_risks = _load_risks()
-    for risk in all_risks:
-        if risk.get("risk_id") == risk_id:
-            risk["status"] = "RESOLVED"
-            risk["resolved_at"] = datetime.utcnow().isoformat() + "Z"
-    _save_risks(all_risks)
+    risk_store.update_status([risk_id], "RESOLVED", resolved_at=datetime.utcnow().isoformat() + "Z")
+    _forget_fingerprints([risk_id])
 
 
-def auto_resolve_stale_risks(max_age_hours: int = 48):
+def auto_resolve_stale_risks(max_age_hours: int = 48) -> List[Dict]:
     """
     Auto-resolve risks older than max_age_hours if monitoring no longer flags them.
     Simple heuristic: if risk type is no longer in active alerts, mark resolved.
+    Returns the risks that were resolved.
     """
-    from .monitoring_engine import compute_monitoring_snapshot
+    from .snapshot_cache import get_monitoring_snapshot
     
-    snapshot = compute_monitoring_snapshot()
+    snapshot = get_monitoring_snapshot()
     alerts = snapshot.get("status", {})
     
     active_types = set()
@@ -157,21 +273,26 @@ def auto_resolve_stale_risks(max_age_hours: int = 48):
     if alerts.get("inventory_crisis"):
         active_types.add("INVENTORY")
     
-    all_risks = _load_risks()
+    active_risks = risk_store.query(status="ACTIVE")
     now = datetime.utcnow()
+    resolved_at = now.isoformat() + "Z"
+    reason = "Auto-resolved: monitoring no longer flags this issue"
+    resolved = []
     
-    for risk in all_risks:
-        if risk.get("status") != "ACTIVE":
-            continue
-        
+    for risk in active_risks:
         risk_type = risk.get("risk_type")
-        risk_ts = datetime.fromisoformat(risk.get("timestamp", "").replace("Z", ""))
+        last_seen = risk.get("last_seen") or risk.get("timestamp", "")
+        risk_ts = datetime.fromisoformat(last_seen.replace("Z", ""))
         age_hours = (now - risk_ts).total_seconds() / 3600
         
         # Auto-resolve if type not in active alerts and older than threshold
         if risk_type not in active_types and age_hours > max_age_hours:
             risk["status"] = "RESOLVED"
-            risk["resolved_at"] = datetime.utcnow().isoformat() + "Z"
-            risk["resolution_reason"] = "Auto-resolved: monitoring no longer flags this issue"
+            risk["resolved_at"] = resolved_at
+            risk["resolution_reason"] = reason
+            resolved.append(risk)
     
-    _save_risks(all_risks)
+    resolved_ids = [r["risk_id"] for r in resolved]
+    risk_store.update_status(resolved_ids, "RESOLVED", resolved_at=resolved_at, resolution_reason=reason)
+    _forget_fingerprints(resolved_ids)
+    return resolved
@@ -0,0 +1,261 @@
+"""
+Risk Storage Engine
+Embedded SQLite store for risk records with indexes on status, risk_type and
+timestamp. Appends and status updates touch only the affected rows instead of
+rewriting the whole history. A legacy `risks.json` file is imported once on
+first open and renamed to `risks.json.migrated`.
+"""
+import base64
+import json
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .tracing import traced
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS risks (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    risk_id TEXT NOT NULL UNIQUE,
+    risk_type TEXT,
+    severity TEXT,
+    status TEXT,
+    timestamp TEXT,
+    resolved_at TEXT,
+    resolution_reason TEXT,
+    fingerprint TEXT,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_risks_status ON risks(status);
+CREATE INDEX IF NOT EXISTS idx_risks_type ON risks(risk_type);
+CREATE INDEX IF NOT EXISTS idx_risks_timestamp ON risks(timestamp);
+"""
+
+# Columns added after the first release of the table: (name, type)
+_ADDED_COLUMNS = [("fingerprint", "TEXT")]
+
+_COLUMNS = "risk_id, risk_type, severity, status, timestamp, resolved_at, resolution_reason, fingerprint, data"
+
+
+def _row_to_risk(row: sqlite3.Row) -> Dict[str, Any]:
+    risk = json.loads(row["data"])
+    risk["status"] = row["status"]
+    if row["resolved_at"] is not None:
+        risk["resolved_at"] = row["resolved_at"]
+    if row["resolution_reason"] is not None:
+        risk["resolution_reason"] = row["resolution_reason"]
+    return risk
+
+
+def encode_cursor(risk: Dict[str, Any]) -> str:
+    """Opaque pagination cursor pointing just past `risk` in (timestamp, risk_id) order."""
+    raw = json.dumps([risk.get("timestamp") or "", risk["risk_id"]])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[str, str]:
+    padded = cursor + "=" * (-len(cursor) % 4)
+    try:
+        timestamp, risk_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError):
+        raise ValueError(f"Invalid cursor: {cursor}")
+    return timestamp, risk_id
+
+
+def _risk_to_params(risk: Dict[str, Any]) -> tuple:
+    return (
+        risk["risk_id"],
+        risk.get("risk_type"),
+        risk.get("severity"),
+        risk.get("status"),
+        risk.get("timestamp"),
+        risk.get("resolved_at"),
+        risk.get("resolution_reason"),
+        risk.get("fingerprint"),
+        json.dumps(risk, default=str),
+    )
+
+
+class RiskStore:
+    """Thread-safe SQLite-backed risk store."""
+
+    def __init__(self, db_path: Path, legacy_json_path: Optional[Path] = None):
+        self.db_path = Path(db_path)
+        self.legacy_json_path = Path(legacy_json_path) if legacy_json_path else None
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(_SCHEMA)
+            existing = {row["name"] for row in conn.execute("PRAGMA table_info(risks)")}
+            for name, col_type in _ADDED_COLUMNS:
+                if name not in existing:
+                    conn.execute(f"ALTER TABLE risks ADD COLUMN {name} {col_type}")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_risks_fingerprint ON risks(fingerprint)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_risks_timestamp_id ON risks(timestamp, risk_id)")
+            self._conn = conn
+            self._migrate_legacy_json()
+        return self._conn
+
+    def _migrate_legacy_json(self):
+        """Import risks.json into the database once, then rename the file."""
+        path = self.legacy_json_path
+        if path is None or not path.exists():
+            return
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                legacy = json.load(f)
+        except json.JSONDecodeError:
+            legacy = []
+        self._upsert(r for r in legacy if r.get("risk_id"))
+        path.rename(path.with_name(path.name + ".migrated"))
+
+    def _upsert(self, risks: Iterable[Dict[str, Any]]) -> int:
+        with self._conn:
+            cur = self._conn.executemany(
+                f"""INSERT INTO risks ({_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(risk_id) DO UPDATE SET
+                    risk_type=excluded.risk_type, severity=excluded.severity, status=excluded.status,
+                    timestamp=excluded.timestamp, resolved_at=excluded.resolved_at,
+                    resolution_reason=excluded.resolution_reason, fingerprint=excluded.fingerprint,
+                    data=excluded.data""",
+                [_risk_to_params(r) for r in risks],
+            )
+            return cur.rowcount
+
+    @traced("risk_store.append", rows=lambda n: n)
+    def append(self, risks: List[Dict[str, Any]]) -> int:
+        """Insert new risks (or replace ones with the same risk_id)."""
+        if not risks:
+            return 0
+        with self._lock:
+            self._connect()
+            return self._upsert(risks)
+
+    @traced("risk_store.query", rows=True)
+    def query(
+        self,
+        status: Optional[str] = None,
+        risk_type: Optional[str] = None,
+        where: str = "",
+        params: tuple = (),
+        order: str = "seq",
+        limit: Optional[int] = None,
+    ) -> List[Dict[str, Any]]:
+        """Fetch risks filtered on indexed columns, in insertion order by default."""
+        clauses, args = [], []
+        if status is not None:
+            clauses.append("status = ?")
+            args.append(status)
+        if risk_type is not None:
+            clauses.append("risk_type = ?")
+            args.append(risk_type)
+        if where:
+            clauses.append(where)
+            args.extend(params)
+        sql = "SELECT * FROM risks"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += f" ORDER BY {order}"
+        if limit is not None:
+            sql += " LIMIT ?"
+            args.append(limit)
+        with self._lock:
+            rows = self._connect().execute(sql, args).fetchall()
+        return [_row_to_risk(r) for r in rows]
+
+    def page(
+        self,
+        status: Optional[str] = None,
+        risk_type: Optional[str] = None,
+        severity: Optional[str] = None,
+        since: Optional[str] = None,
+        until: Optional[str] = None,
+        cursor: Optional[str] = None,
+        limit: int = 100,
+        descending: bool = True,
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """
+        Keyset-paginated fetch ordered by (timestamp, risk_id).
+        `since` is inclusive and `until` exclusive (ISO timestamps). Returns the
+        page and a cursor for the next page, or None when there are no more rows.
+        """
+        clauses, args = [], []
+        if severity is not None:
+            clauses.append("severity = ?")
+            args.append(severity)
+        if since is not None:
+            clauses.append("timestamp >= ?")
+            args.append(since)
+        if until is not None:
+            clauses.append("timestamp < ?")
+            args.append(until)
+        if cursor is not None:
+            clauses.append("(COALESCE(timestamp, ''), risk_id) " + ("< (?, ?)" if descending else "> (?, ?)"))
+            args.extend(decode_cursor(cursor))
+        direction = "DESC" if descending else "ASC"
+        rows = self.query(
+            status=status,
+            risk_type=risk_type,
+            where=" AND ".join(clauses),
+            params=tuple(args),
+            order=f"COALESCE(timestamp, '') {direction}, risk_id {direction}",
+            limit=limit + 1,
+        )
+        if len(rows) > limit:
+            rows = rows[:limit]
+            return rows, encode_cursor(rows[-1])
+        return rows, None
+
+    def iterate(self, batch_size: int = 500, **filters) -> Iterator[Dict[str, Any]]:
+        """Yield every matching risk in bounded batches (for bulk export)."""
+        cursor = None
+        while True:
+            rows, cursor = self.page(cursor=cursor, limit=batch_size, **filters)
+            yield from rows
+            if cursor is None:
+                return
+
+    @traced("risk_store.update_status", rows=lambda n: n)
+    def update_status(
+        self,
+        risk_ids: List[str],
+        status: str,
+        resolved_at: Optional[str] = None,
+        resolution_reason: Optional[str] = None,
+    ) -> int:
+        """Update status fields in place for the given risk ids."""
+        if not risk_ids:
+            return 0
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                cur = conn.executemany(
+                    """UPDATE risks SET status = ?,
+                        resolved_at = COALESCE(?, resolved_at),
+                        resolution_reason = COALESCE(?, resolution_reason)
+                    WHERE risk_id = ?""",
+                    [(status, resolved_at, resolution_reason, rid) for rid in risk_ids],
+                )
+                return cur.rowcount
+
+    @traced("risk_store.count")
+    def count(self, status: Optional[str] = None) -> int:
+        sql, args = "SELECT COUNT(*) FROM risks", ()
+        if status is not None:
+            sql, args = sql + " WHERE status = ?", (status,)
+        with self._lock:
+            return self._connect().execute(sql, args).fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
@@ -0,0 +1,134 @@
+"""
+Background Monitoring Scheduler
+Keeps the snapshot cache warm and generates/auto-resolves risks on a fixed
+cadence, and immediately whenever the underlying datasets change, so read
+endpoints serve precomputed results. Files dropped for incremental ingestion
+are appended first, so their rows reach the next snapshot.
+"""
+import logging
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+from ..data_access.incremental import INCREMENTAL_ENABLED, has_pending, ingest_incoming
+from ..data_access.registry import data_version
+from .risk_engine import generate_risks_from_monitoring, store_risks, auto_resolve_stale_risks
+from .snapshot_cache import get_monitoring_snapshot
+from .live_updates import hub
+
+logger = logging.getLogger(__name__)
+
+SCHEDULER_ENABLED = os.getenv("MONITORING_SCHEDULER", "1").lower() not in ("0", "false", "no")
+SNAPSHOT_INTERVAL_SECONDS = float(os.getenv("SCHEDULER_SNAPSHOT_INTERVAL_SECONDS", "20"))
+RISK_INTERVAL_SECONDS = float(os.getenv("SCHEDULER_RISK_INTERVAL_SECONDS", "300"))
+POLL_SECONDS = float(os.getenv("SCHEDULER_POLL_SECONDS", "5"))
+
+
+class MonitoringScheduler:
+    """Daemon thread that precomputes snapshots and risks."""
+
+    def __init__(
+        self,
+        snapshot_interval: float = SNAPSHOT_INTERVAL_SECONDS,
+        risk_interval: float = RISK_INTERVAL_SECONDS,
+        poll_seconds: float = POLL_SECONDS,
+        version_fn: Callable[[], str] = data_version,
+    ):
+        self.snapshot_interval = snapshot_interval
+        self.risk_interval = risk_interval
+        self.poll_seconds = poll_seconds
+        self.version_fn = version_fn
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._seen_version: Optional[str] = None
+        self._next_snapshot = 0.0
+        self._next_risks = 0.0
+        self.runs: Dict[str, Dict[str, Any]] = {
+            job: {"count": 0, "errors": 0, "last_run": None, "last_duration_ms": None, "last_error": None}
+            for job in ("ingest", "snapshot", "risks")
+        }
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        if self.running:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name="monitoring-scheduler", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 10.0):
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        self._thread = None
+
+    def trigger(self):
+        """Run both jobs on the next loop iteration."""
+        self._next_snapshot = self._next_risks = 0.0
+        self._wake.set()
+
+    def _loop(self):
+        while not self._stop.is_set():
+            self.tick()
+            self._wake.wait(self.poll_seconds)
+            self._wake.clear()
+
+    def tick(self):
+        """Run whatever jobs are due; a data version change makes both due."""
+        now = time.monotonic()
+        if INCREMENTAL_ENABLED and has_pending():
+            self._run("ingest", ingest_incoming)
+        try:
+            version = self.version_fn()
+        except Exception:
+            logger.exception("Scheduler could not read data version")
+            version = self._seen_version
+        data_changed = version != self._seen_version
+        self._seen_version = version
+
+        if data_changed or now >= self._next_snapshot:
+            snapshot = self._run("snapshot", lambda: get_monitoring_snapshot(force_refresh=True))
+            self._next_snapshot = now + self.snapshot_interval
+            if snapshot is not None and (data_changed or now >= self._next_risks):
+                self._run("risks", lambda: self._refresh_risks(snapshot))
+                self._next_risks = now + self.risk_interval
+
+    def _refresh_risks(self, snapshot: Dict[str, Any]) -> List[Dict]:
+        new_risks = store_risks(generate_risks_from_monitoring(snapshot))
+        resolved = auto_resolve_stale_risks()
+        hub.on_risks(new_risks, resolved)
+        return new_risks
+
+    def _run(self, job: str, fn: Callable[[], Any]) -> Any:
+        stats = self.runs[job]
+        started = time.perf_counter()
+        try:
+            return fn()
+        except Exception as e:
+            stats["errors"] += 1
+            stats["last_error"] = str(e)
+            logger.exception("Scheduled %s job failed", job)
+            return None
+        finally:
+            stats["count"] += 1
+            stats["last_run"] = datetime.utcnow().isoformat() + "Z"
+            stats["last_duration_ms"] = round((time.perf_counter() - started) * 1000, 2)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "running": self.running,
+            "snapshot_interval_seconds": self.snapshot_interval,
+            "risk_interval_seconds": self.risk_interval,
+            "data_version": self._seen_version,
+            "jobs": self.runs,
+        }
+
+
+scheduler = MonitoringScheduler()
@@ -0,0 +1,174 @@
+"""
+Session-scoped conversation memory.
+Keeps per-session insights, preferences and agent state in an LRU-bounded
+in-memory map. Evicted and dirty sessions are spilled to one JSON file per
+session under `data/sessions/` and reloaded on demand, so concurrent users
+never evict each other's context from a shared list.
+"""
+import atexit
+import contextvars
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from dataclasses import dataclass, field, asdict
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+SESSIONS_DIR = Path("data/sessions")
+SESSION_CAPACITY = int(os.getenv("SESSION_CAPACITY", "1000"))
+SESSION_FLUSH_INTERVAL_SECONDS = float(os.getenv("SESSION_FLUSH_INTERVAL_SECONDS", "5"))
+MAX_SESSION_INSIGHTS = 100
+
+# Session bound to the current request/agent call, if any
+current_session_id: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("current_session_id", default=None)
+
+
+@dataclass
+class SessionState:
+    """Memory of one conversation session."""
+    session_id: str
+    insights: List[Dict[str, Any]] = field(default_factory=list)
+    preferences: Dict[str, Any] = field(default_factory=dict)
+    state: Dict[str, Any] = field(default_factory=dict)  # agent session state
+    created_at: str = field(default_factory=lambda: datetime.utcnow().isoformat() + "Z")
+    updated_at: str = field(default_factory=lambda: datetime.utcnow().isoformat() + "Z")
+
+
+class SessionStore:
+    """LRU map of SessionState objects spilled to disk."""
+
+    def __init__(self, directory: Path = SESSIONS_DIR, capacity: int = SESSION_CAPACITY):
+        self.directory = Path(directory)
+        self.capacity = capacity
+        self._sessions: "OrderedDict[str, SessionState]" = OrderedDict()
+        self._dirty = set()
+        self._lock = threading.RLock()
+        self._flusher = None
+        self.loads = 0
+        self.evictions = 0
+
+    def _path(self, session_id: str) -> Path:
+        digest = hashlib.sha1(session_id.encode("utf-8")).hexdigest()
+        return self.directory / f"{digest}.json"
+
+    def _write(self, session: SessionState):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self._path(session.session_id)
+        tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(asdict(session), f, default=str)
+        os.replace(tmp, path)
+
+    def _read(self, session_id: str) -> Optional[SessionState]:
+        path = self._path(session_id)
+        if not path.exists():
+            return None
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return SessionState(**json.load(f))
+        except (json.JSONDecodeError, TypeError):
+            return None
+
+    def get(self, session_id: str, create: bool = True) -> Optional[SessionState]:
+        """Return the session, loading it from disk or (if `create`) creating it."""
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is not None:
+                self._sessions.move_to_end(session_id)
+                return session
+            session = self._read(session_id)
+            if session is None:
+                if not create:
+                    return None
+                session = SessionState(session_id=session_id)
+            else:
+                self.loads += 1
+            self._sessions[session_id] = session
+            self._evict()
+            return session
+
+    def _evict(self):
+        while len(self._sessions) > self.capacity:
+            session_id, session = self._sessions.popitem(last=False)
+            if session_id in self._dirty:
+                self._dirty.discard(session_id)
+                self._write(session)
+            self.evictions += 1
+
+    def touch(self, session: SessionState):
+        """Mark a session as modified so it is spilled on the next flush."""
+        with self._lock:
+            session.updated_at = datetime.utcnow().isoformat() + "Z"
+            self._dirty.add(session.session_id)
+            self._start_flusher()
+
+    def add_insight(self, session_id: str, entry: Dict[str, Any]):
+        with self._lock:
+            session = self.get(session_id)
+            session.insights.append(entry)
+            del session.insights[:-MAX_SESSION_INSIGHTS]
+            self.touch(session)
+
+    def set_preference(self, session_id: str, key: str, value) -> Dict[str, Any]:
+        with self._lock:
+            session = self.get(session_id)
+            session.preferences[key] = value
+            self.touch(session)
+            return dict(session.preferences)
+
+    def update_state(self, session_id: str, **values) -> Dict[str, Any]:
+        with self._lock:
+            session = self.get(session_id)
+            session.state.update(values)
+            self.touch(session)
+            return dict(session.state)
+
+    def flush(self):
+        """Write every dirty in-memory session to disk."""
+        with self._lock:
+            dirty = [self._sessions[sid] for sid in self._dirty if sid in self._sessions]
+            self._dirty.clear()
+            for session in dirty:
+                self._write(session)
+
+    def _start_flusher(self):
+        if self._flusher is None or not self._flusher.is_alive():
+            self._flusher = threading.Thread(target=self._flush_loop, name="session-flush", daemon=True)
+            self._flusher.start()
+
+    def _flush_loop(self):
+        while True:
+            time.sleep(SESSION_FLUSH_INTERVAL_SECONDS)
+            try:
+                self.flush()
+            except OSError:
+                pass
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "in_memory": len(self._sessions),
+                "capacity": self.capacity,
+                "dirty": len(self._dirty),
+                "loads_from_disk": self.loads,
+                "evictions": self.evictions,
+            }
+
+
+session_store = SessionStore()
+atexit.register(session_store.flush)
+
+
+@contextmanager
+def session_scope(session_id: Optional[str]):
+    """Bind `session_id` to the current context for memory calls made inside the block."""
+    token = current_session_id.set(session_id)
+    try:
+        yield
+    finally:
+        current_session_id.reset(token)
@@ -0,0 +1,159 @@
+"""
+Monitoring Snapshot Cache
+Serves compute_monitoring_snapshot() results keyed by data version with a TTL.
+Concurrent callers that miss the cache wait on a single in-flight computation
+(single-flight) instead of recomputing the same snapshot in parallel.
+"""
+import copy
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from ..data_access.registry import data_version
+from .monitoring_engine import compute_monitoring_snapshot
+
+DEFAULT_TTL_SECONDS = float(os.getenv("SNAPSHOT_TTL_SECONDS", "30"))
+
+
+class _Flight:
+    """One in-flight computation that followers can wait on."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Optional[Dict[str, Any]] = None
+        self.error: Optional[BaseException] = None
+
+
+class SnapshotCache:
+    """TTL cache with single-flight coalescing around a snapshot function."""
+
+    def __init__(
+        self,
+        compute: Callable[[], Dict[str, Any]],
+        ttl_seconds: float = DEFAULT_TTL_SECONDS,
+        version_fn: Callable[[], str] = data_version,
+    ):
+        self.compute = compute
+        self.ttl_seconds = ttl_seconds
+        self.version_fn = version_fn
+        self._lock = threading.Lock()
+        self._value: Optional[Dict[str, Any]] = None
+        self._version: Optional[str] = None
+        self._computed_at: Optional[float] = None
+        self._flight: Optional[_Flight] = None
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.last_compute_seconds = 0.0
+        self._listeners: List[Callable[[Dict[str, Any]], None]] = []
+
+    def _is_fresh(self, version: str) -> bool:
+        return (
+            self._value is not None
+            and self._version == version
+            and time.monotonic() - self._computed_at < self.ttl_seconds
+        )
+
+    def get(self, force_refresh: bool = False) -> Dict[str, Any]:
+        """
+        Return the current snapshot, recomputing it when stale.
+        Each caller gets its own deep copy so it can decorate the result.
+        """
+        version = self.version_fn()
+        with self._lock:
+            if not force_refresh and self._is_fresh(version):
+                self.hits += 1
+                return copy.deepcopy(self._value)
+            if self._flight is None:
+                flight = self._flight = _Flight()
+                leader = True
+                self.misses += 1
+            else:
+                flight = self._flight
+                leader = False
+                self.coalesced += 1
+
+        if leader:
+            started = time.monotonic()
+            try:
+                flight.result = self.compute()
+            except BaseException as e:
+                flight.error = e
+            finished = time.monotonic()
+            with self._lock:
+                # Degraded snapshots are shared with waiting callers but not cached
+                if flight.error is None and not flight.result.get("degraded"):
+                    self._value = flight.result
+                    self._version = version
+                    self._computed_at = finished
+                    self.last_compute_seconds = finished - started
+                self._flight = None
+            flight.done.set()
+            if flight.error is None and not flight.result.get("degraded"):
+                self._notify(flight.result)
+        else:
+            flight.done.wait()
+
+        if flight.error is not None:
+            raise flight.error
+        return copy.deepcopy(flight.result)
+
+    def get_if_fresh(self) -> Optional[Dict[str, Any]]:
+        """Return the cached snapshot if it is fresh, otherwise None (never computes)."""
+        version = self.version_fn()
+        with self._lock:
+            if self._is_fresh(version):
+                self.hits += 1
+                return copy.deepcopy(self._value)
+        return None
+
+    def add_listener(self, listener: Callable[[Dict[str, Any]], None]):
+        """Call `listener(snapshot)` after every successful recomputation."""
+        if listener not in self._listeners:
+            self._listeners.append(listener)
+
+    def _notify(self, snapshot: Dict[str, Any]):
+        for listener in list(self._listeners):
+            try:
+                listener(snapshot)
+            except Exception:
+                pass  # a broken listener must not fail the snapshot request
+
+    def peek(self) -> Optional[Dict[str, Any]]:
+        """Return the last computed snapshot without triggering a refresh."""
+        with self._lock:
+            return copy.deepcopy(self._value) if self._value is not None else None
+
+    def invalidate(self):
+        with self._lock:
+            self._value = None
+            self._version = None
+            self._computed_at = None
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses + self.coalesced
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "coalesced": self.coalesced,
+                "hit_ratio": round((self.hits + self.coalesced) / lookups, 4) if lookups else 0.0,
+                "age_seconds": round(time.monotonic() - self._computed_at, 3) if self._computed_at else None,
+                "ttl_seconds": self.ttl_seconds,
+                "data_version": self._version,
+                "in_flight": self._flight is not None,
+                "last_compute_seconds": round(self.last_compute_seconds, 4),
+            }
+
+
+snapshot_cache = SnapshotCache(compute_monitoring_snapshot)
+
+
+def get_monitoring_snapshot(force_refresh: bool = False) -> Dict[str, Any]:
+    """Cached equivalent of compute_monitoring_snapshot()."""
+    return snapshot_cache.get(force_refresh=force_refresh)
+
+
+def snapshot_cache_stats() -> Dict[str, Any]:
+    return snapshot_cache.stats()
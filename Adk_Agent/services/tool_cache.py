@@ -0,0 +1,96 @@
+"""
+Agent Tool Result Cache
+Memoizes the pure computation behind the agent's FunctionTools, keyed on the
+call arguments, the dataset version and the calendar day (inactivity windows
+are relative to today). Entries live in a bounded LRU map; a new data version
+simply stops matching old keys, which age out through eviction. Side effects
+such as log_insight stay in the tool wrappers so they still run on every call.
+"""
+import copy
+import functools
+import os
+import threading
+from collections import OrderedDict
+from datetime import date
+from typing import Any, Callable, Dict, Optional
+
+from ..data_access.registry import data_version
+from .tracing import current_span
+
+TOOL_CACHE_SIZE = int(os.getenv("TOOL_CACHE_SIZE", "256"))
+
+
+class ToolResultCache:
+    """Thread-safe LRU of tool results keyed by (tool, args, data version, day)."""
+
+    def __init__(self, max_entries: int = TOOL_CACHE_SIZE, version_fn: Callable[[], str] = data_version):
+        self.max_entries = max_entries
+        self.version_fn = version_fn
+        self._entries: "OrderedDict[tuple, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _key(self, name: str, args: tuple, kwargs: Dict[str, Any]) -> tuple:
+        return (name, args, tuple(sorted(kwargs.items())), self.version_fn(), date.today().isoformat())
+
+    def call(self, name: str, fn: Callable, args: tuple, kwargs: Dict[str, Any],
+             cache_if: Optional[Callable[[Any], bool]] = None) -> Any:
+        """Return a copy of the cached result for this call, computing it on a miss."""
+        key = self._key(name, args, kwargs)
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                current_span().set_attribute("cache", "hit")
+                return copy.deepcopy(self._entries[key])
+            self.misses += 1
+        current_span().set_attribute("cache", "miss")
+        result = fn(*args, **kwargs)
+        if cache_if is None or cache_if(result):
+            with self._lock:
+                self._entries[key] = copy.deepcopy(result)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+                    self.evictions += 1
+        return result
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else None,
+            }
+
+
+tool_cache = ToolResultCache()
+
+
+def memoize_tool(fn: Callable = None, *, cache_if: Optional[Callable[[Any], bool]] = None):
+    """
+    Decorator memoizing a tool computation in `tool_cache`.
+    Arguments must be hashable; callers receive their own copy of the result.
+    """
+    def decorate(func):
+        name = f"{func.__module__}.{func.__qualname__}"
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            return tool_cache.call(name, func, args, kwargs, cache_if=cache_if)
+        return wrapper
+
+    return decorate(fn) if fn is not None else decorate
+
+
+def tool_cache_stats() -> Dict[str, Any]:
+    return tool_cache.stats()
@@ -0,0 +1,143 @@
+"""
+Tool Output Compaction
+Shrinks what agent tools hand back to the model: per-tool field projections
+drop record fields the model never uses, floats are rounded, timestamps become
+short ISO dates and long lists are capped. Visualization specs are only for
+the chat UI: while an agent stream collects them (collect_visuals()) they are
+moved out of the result into the stream's collector, so the model never sees
+them. Every call logs an estimated token size (~4 characters per token) before
+and after.
+"""
+import contextvars
+import functools
+import json
+import logging
+import os
+import re
+import threading
+from datetime import date, datetime
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+COMPACTION_ENABLED = os.getenv("TOOL_OUTPUT_COMPACTION", "1").lower() not in ("0", "false", "no")
+DECIMALS = int(os.getenv("TOOL_OUTPUT_DECIMALS", "2"))
+MAX_ITEMS = int(os.getenv("TOOL_OUTPUT_MAX_ITEMS", "10"))
+
+VISUAL_KEYS = ("visual", "visuals")
+PASSTHROUGH_KEYS = set(VISUAL_KEYS)  # kept verbatim when no stream collects visuals
+_ISO_DATETIME = re.compile(r"^\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}")
+
+# Record fields kept for common list payloads, keyed by the list's dict key
+CUSTOMER_FIELDS = ("customer_id", "customer_name", "segment", "lifetime_value", "last_order_date")
+RISK_FIELDS = ("risk_id", "risk_type", "severity", "description", "timestamp", "occurrences")
+
+_stats: Dict[str, Dict[str, int]] = {}
+_stats_lock = threading.Lock()
+
+# Visual specs stripped from tool results in the current agent stream (None outside one)
+_visual_sink: contextvars.ContextVar[Optional[List[Dict[str, Any]]]] = contextvars.ContextVar(
+    "tool_visuals", default=None
+)
+
+
+def collect_visuals() -> List[Dict[str, Any]]:
+    """
+    Start collecting visualization specs in the current context. Tools called
+    from it (including tasks and threads spawned from it) append their visuals
+    to the returned list instead of returning them to the model.
+    """
+    sink: List[Dict[str, Any]] = []
+    _visual_sink.set(sink)
+    return sink
+
+
+def _divert_visuals(raw: Any, drop: frozenset) -> frozenset:
+    """Move top-level visuals of `raw` into the active collector; returns the keys to drop from the result."""
+    sink = _visual_sink.get()
+    if sink is None or not isinstance(raw, dict):
+        return drop
+    if "visual" not in drop and isinstance(raw.get("visual"), dict):
+        sink.append(raw["visual"])
+    if "visuals" not in drop and isinstance(raw.get("visuals"), list):
+        sink.extend(v for v in raw["visuals"] if isinstance(v, dict))
+    return drop | frozenset(VISUAL_KEYS)
+
+
+def estimate_tokens(value: Any) -> int:
+    """Rough token count of a JSON payload (~4 characters per token)."""
+    return len(json.dumps(value, default=str)) // 4
+
+
+def compact_value(
+    value: Any,
+    projections: Optional[Dict[Optional[str], Iterable[str]]] = None,
+    drop: Iterable[str] = (),
+    max_items: int = MAX_ITEMS,
+    decimals: int = DECIMALS,
+    key: Optional[str] = None,
+) -> Any:
+    """Recursively compact a tool result. `key` is the dict key the value sits under (None at the top)."""
+    projections = projections or {}
+    if isinstance(value, dict):
+        out = {}
+        for k, v in value.items():
+            if v is None or k in drop:
+                continue
+            out[k] = v if k in PASSTHROUGH_KEYS else compact_value(v, projections, drop, max_items, decimals, k)
+        return out
+    if isinstance(value, (list, tuple)):
+        fields = projections.get(key)
+        items = []
+        for item in value[:max_items]:
+            if fields and isinstance(item, dict):
+                item = {f: item[f] for f in fields if f in item}
+            items.append(compact_value(item, projections, drop, max_items, decimals))
+        if len(value) > max_items:
+            items.append(f"... {len(value) - max_items} more")
+        return items
+    if isinstance(value, bool) or value is None:
+        return value
+    if isinstance(value, (datetime, date)):  # includes pandas.Timestamp
+        return value.isoformat()[:10]
+    if isinstance(value, str):
+        return value[:10] if _ISO_DATETIME.match(value) else value
+    if hasattr(value, "item"):  # numpy scalars
+        value = value.item()
+    if isinstance(value, float):
+        return round(value, decimals)
+    return value
+
+
+def compact_output(
+    projections: Optional[Dict[Optional[str], Iterable[str]]] = None,
+    drop: Iterable[str] = (),
+    max_items: Optional[int] = None,
+):
+    """Decorator applying compact_value() to a tool's return value and logging its token size."""
+    drop = frozenset(drop)
+
+    def decorate(func: Callable) -> Callable:
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            raw = func(*args, **kwargs)
+            if not COMPACTION_ENABLED:
+                return raw
+            result = compact_value(raw, projections, _divert_visuals(raw, drop), max_items or MAX_ITEMS)
+            raw_tokens, tokens = estimate_tokens(raw), estimate_tokens(result)
+            logger.info("tool %s output ~%d tokens (raw ~%d)", func.__name__, tokens, raw_tokens)
+            with _stats_lock:
+                stats = _stats.setdefault(func.__name__, {"calls": 0, "raw_tokens": 0, "tokens": 0})
+                stats["calls"] += 1
+                stats["raw_tokens"] += raw_tokens
+                stats["tokens"] += tokens
+            return result
+        return wrapper
+
+    return decorate
+
+
+def tool_output_stats() -> Dict[str, Dict[str, int]]:
+    """Per-tool call count and cumulative estimated tokens before/after compaction."""
+    with _stats_lock:
+        return {name: dict(stats) for name, stats in _stats.items()}
@@ -0,0 +1,297 @@
+"""
+Lightweight Tracing
+OpenTelemetry-compatible spans (trace/span ids, unix-nano timestamps, status,
+attributes) without the SDK dependency. The current span is carried in a
+contextvar, so nested calls form a tree; executors copy the context across
+thread hops. When a root span ends, the whole tree is exported:
+- TRACE_EXPORTER=console  indented tree with durations and row counts on stderr
+- TRACE_EXPORTER=file     one OTLP-style JSON line per trace in TRACE_FILE
+- TRACE_EXPORTER=none     (default) tracing is a no-op
+"""
+import contextvars
+import functools
+import inspect
+import json
+import os
+import secrets
+import sys
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+TRACE_EXPORTER = os.getenv("TRACE_EXPORTER", "none").lower()
+TRACE_FILE = Path(os.getenv("TRACE_FILE", "data/traces.jsonl"))
+MAX_SPANS_PER_TRACE = int(os.getenv("TRACE_MAX_SPANS", "2000"))
+TRACING_ENABLED = TRACE_EXPORTER in ("console", "file")
+
+_current_span: contextvars.ContextVar[Optional["Span"]] = contextvars.ContextVar("current_span", default=None)
+
+
+class Span:
+    """One timed operation; field names follow the OTLP JSON span model."""
+
+    __slots__ = ("name", "trace_id", "span_id", "parent_id", "start_ns", "end_ns", "attributes", "status", "error")
+
+    def __init__(self, name: str, trace_id: str, parent_id: Optional[str], attributes: Dict[str, Any]):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = secrets.token_hex(8)
+        self.parent_id = parent_id
+        self.start_ns = time.time_ns()
+        self.end_ns: Optional[int] = None
+        self.attributes = attributes
+        self.status = "OK"
+        self.error: Optional[str] = None
+
+    def set_attribute(self, key: str, value: Any):
+        self.attributes[key] = value
+
+    @property
+    def duration_ms(self) -> float:
+        return ((self.end_ns or time.time_ns()) - self.start_ns) / 1e6
+
+    def to_otlp(self) -> Dict[str, Any]:
+        span = {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns),
+            "attributes": [{"key": k, "value": _otlp_value(v)} for k, v in self.attributes.items()],
+            "status": {"code": "STATUS_CODE_ERROR" if self.status == "ERROR" else "STATUS_CODE_OK"},
+        }
+        if self.parent_id:
+            span["parentSpanId"] = self.parent_id
+        if self.error:
+            span["status"]["message"] = self.error
+        return span
+
+
+class _NoopSpan:
+    def set_attribute(self, key: str, value: Any):
+        pass
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+def _otlp_value(value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+class Tracer:
+    """Collects finished spans per trace and exports a trace when its root span ends."""
+
+    def __init__(self, exporter: str = TRACE_EXPORTER, path: Path = TRACE_FILE):
+        self.exporter = exporter
+        self.path = path
+        self._traces: Dict[str, List[Span]] = {}
+        self._closed: "OrderedDict[str, None]" = OrderedDict()  # recently exported trace ids
+        self._lock = threading.Lock()
+        self.exported = 0
+        self.dropped_spans = 0
+
+    def finish(self, span: Span):
+        with self._lock:
+            if span.trace_id in self._closed:
+                self.dropped_spans += 1  # finished after its root, e.g. a timed-out worker
+                return
+            spans = self._traces.setdefault(span.trace_id, [])
+            if len(spans) < MAX_SPANS_PER_TRACE:
+                spans.append(span)
+            else:
+                self.dropped_spans += 1
+            if span.parent_id is not None:
+                return
+            spans = self._traces.pop(span.trace_id)
+            self._closed[span.trace_id] = None
+            if len(self._closed) > 1000:
+                self._closed.popitem(last=False)
+            self.exported += 1
+        self.export(spans)
+
+    def export(self, spans: List[Span]):
+        if self.exporter == "file":
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            line = json.dumps({"traceId": spans[0].trace_id, "spans": [s.to_otlp() for s in spans]}, default=str)
+            with self._lock, open(self.path, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+        elif self.exporter == "console":
+            sys.stderr.write(format_tree(spans))
+            sys.stderr.flush()
+
+
+def format_tree(spans: List[Span]) -> str:
+    """Render a trace as an indented tree: name, duration and attributes."""
+    children: Dict[Optional[str], List[Span]] = {}
+    ids = {s.span_id for s in spans}
+    for span in sorted(spans, key=lambda s: s.start_ns):
+        parent = span.parent_id if span.parent_id in ids else None
+        children.setdefault(parent, []).append(span)
+
+    lines = []
+
+    def walk(span: Span, depth: int):
+        attrs = " ".join(f"{k}={v}" for k, v in span.attributes.items())
+        flag = " ERROR" if span.status == "ERROR" else ""
+        lines.append(f"{'  ' * depth}{span.name} {span.duration_ms:.2f}ms{flag} {attrs}".rstrip())
+        for child in children.get(span.span_id, []):
+            walk(child, depth + 1)
+
+    for root in children.get(None, []):
+        walk(root, 0)
+    return f"trace {spans[0].trace_id}\n" + "\n".join(lines) + "\n"
+
+
+tracer = Tracer()
+
+
+@contextmanager
+def start_span(name: str, **attributes):
+    """Open a child of the current span (or a new trace) for the duration of the block."""
+    if not TRACING_ENABLED:
+        yield _NOOP_SPAN
+        return
+    parent = _current_span.get()
+    span = Span(
+        name,
+        trace_id=parent.trace_id if parent else secrets.token_hex(16),
+        parent_id=parent.span_id if parent else None,
+        attributes=attributes,
+    )
+    token = _current_span.set(span)
+    try:
+        yield span
+    except BaseException as e:
+        span.status = "ERROR"
+        span.error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        span.end_ns = time.time_ns()
+        _current_span.reset(token)
+        tracer.finish(span)
+
+
+def record_span(name: str, start_ns: int, end_ns: int, **attributes):
+    """Record an already-finished operation (e.g. a model call observed from its events) under the current span."""
+    if not TRACING_ENABLED:
+        return
+    parent = _current_span.get()
+    span = Span(
+        name,
+        trace_id=parent.trace_id if parent else secrets.token_hex(16),
+        parent_id=parent.span_id if parent else None,
+        attributes=attributes,
+    )
+    span.start_ns, span.end_ns = start_ns, end_ns
+    tracer.finish(span)
+
+
+def _count_rows(result: Any) -> Optional[int]:
+    try:
+        return len(result)
+    except TypeError:
+        return None
+
+
+def traced(name: Optional[str] = None, rows: Optional[Callable[[Any], Optional[int]]] = None):
+    """
+    Decorator wrapping a sync or async function in a span. The span name
+    defaults to `<module>.<function>`; `rows` maps the result to a row count
+    (pass `rows=True` to use len()).
+    """
+    row_fn = _count_rows if rows is True else rows
+
+    def decorate(func: Callable) -> Callable:
+        span_name = name or f"{func.__module__.rsplit('.', 1)[-1]}.{func.__name__}"
+
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                if not TRACING_ENABLED:
+                    return await func(*args, **kwargs)
+                with start_span(span_name) as span:
+                    result = await func(*args, **kwargs)
+                    if row_fn is not None:
+                        span.set_attribute("rows", row_fn(result))
+                    return result
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not TRACING_ENABLED:
+                return func(*args, **kwargs)
+            with start_span(span_name) as span:
+                result = func(*args, **kwargs)
+                if row_fn is not None:
+                    span.set_attribute("rows", row_fn(result))
+                return result
+        return wrapper
+
+    return decorate
+
+
+@contextmanager
+def use_span(span):
+    """Make `span` the current span inside the block without ending it (for work handed to another loop)."""
+    if not isinstance(span, Span):
+        yield span
+        return
+    token = _current_span.set(span)
+    try:
+        yield span
+    finally:
+        _current_span.reset(token)
+
+
+class TraceMiddleware:
+    """
+    ASGI middleware opening the root span of every HTTP request. The span
+    stays open until the last body chunk is sent, so streamed responses (SSE)
+    include the work done while streaming.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not TRACING_ENABLED:
+            await self.app(scope, receive, send)
+            return
+        with start_span(f"http {scope['method']} {scope['path']}", method=scope["method"], path=scope["path"]) as span:
+            async def send_with_status(message):
+                if message["type"] == "http.response.start":
+                    span.set_attribute("status_code", message["status"])
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_with_status)
+            finally:
+                route = getattr(scope.get("route"), "path", None)
+                if route:
+                    span.name = f"http {scope['method']} {route}"
+
+
+def current_span():
+    """The active span, or a no-op span when tracing is off or no span is open."""
+    return _current_span.get() or _NOOP_SPAN
+
+
+def tracing_stats() -> Dict[str, Any]:
+    with tracer._lock:
+        open_traces = len(tracer._traces)
+    return {
+        "exporter": TRACE_EXPORTER,
+        "exported_traces": tracer.exported,
+        "open_traces": open_traces,
+        "dropped_spans": tracer.dropped_spans,
+    }
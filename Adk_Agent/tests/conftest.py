@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# Tests import the package as Adk_Agent.*, like the API backends
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
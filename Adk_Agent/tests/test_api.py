@@ -0,0 +1,102 @@
+import pandas as pd
+import pytest
+
+from Adk_Agent.data_access import registry as registry_module
+
+INVOICE_AMOUNTS = [1200, 800, 2500, 500]
+
+
+@pytest.fixture(autouse=True)
+def data_dir(tmp_path, monkeypatch):
+    """Registry over a small data dir (customers and invoices only)."""
+    pd.DataFrame({
+        "customer_id": ["CUST00001", "CUST00002"],
+        "customer_name": ["Customer 1", "Customer 2"],
+        "segment": ["SMB", "Enterprise"],
+        "region": ["North", "South"],
+    }).to_excel(tmp_path / "crm_customers_20000.xlsx", index=False)
+    dates = pd.date_range("2024-01-01", periods=len(INVOICE_AMOUNTS), freq="D")
+    pd.DataFrame({
+        "invoice_id": [f"INV{i:06d}" for i in range(1, len(INVOICE_AMOUNTS) + 1)],
+        "customer_id": ["CUST00001", "CUST00002"] * (len(INVOICE_AMOUNTS) // 2),
+        "invoice_date": dates,
+        "invoice_amount": INVOICE_AMOUNTS,
+        "payment_status": "Paid",
+        "due_date": dates + pd.Timedelta(days=30),
+    }).to_excel(tmp_path / "erp_invoices_22000.xlsx", index=False)
+    fresh = registry_module.DatasetRegistry(tmp_path)
+    for name in registry_module.registry.names():
+        fresh.register(registry_module.registry._specs[name])
+    monkeypatch.setattr(registry_module, "registry", fresh)
+    return tmp_path
+
+
+EXPECTED_AOV = round(sum(INVOICE_AMOUNTS) / len(INVOICE_AMOUNTS), 2)
+
+
+def test_aov_flask():
+    from Adk_Agent.api.backend import app
+
+    response = app.test_client().get("/api/metrics/aov")
+    assert response.status_code == 200
+    assert response.get_json() == {"average_order_value": EXPECTED_AOV}
+
+
+def test_aov_fastapi():
+    pytest.importorskip("google.adk")
+    from fastapi.testclient import TestClient
+    from Adk_Agent.api.fastapi_backend import app
+
+    response = TestClient(app).get("/api/metrics/aov")
+    assert response.status_code == 200
+    assert response.json() == {"average_order_value": EXPECTED_AOV}
+
+
+@pytest.fixture
+def risks(tmp_path, monkeypatch):
+    """Risk store in `tmp_path` holding 3 ACTIVE and 3 RESOLVED risks."""
+    from Adk_Agent.services import risk_engine
+    from Adk_Agent.services.risk_store import RiskStore
+
+    store = RiskStore(tmp_path / "risks.db")
+    monkeypatch.setattr(risk_engine, "risk_store", store)
+    store.append([
+        {"risk_id": f"R{i}", "risk_type": "REVENUE", "severity": "HIGH", "description": "",
+         "timestamp": f"2024-01-0{i}T00:00:00Z", "status": "ACTIVE" if i <= 3 else "RESOLVED"}
+        for i in range(1, 7)
+    ])
+    yield store
+    store.close()
+
+
+@pytest.mark.parametrize("query", ["limit=abc", "limit=0", "limit=1001", "cursor=not-a-cursor"])
+def test_flask_rejects_invalid_paging(risks, query):
+    from Adk_Agent.api.backend import app
+
+    response = app.test_client().get(f"/api/risks/all?{query}")
+    assert response.status_code == 400
+
+
+def test_flask_pages_with_the_cursor(risks):
+    from Adk_Agent.api.backend import app
+
+    client = app.test_client()
+    first = client.get("/api/risks/all?limit=4").get_json()
+    second = client.get(f"/api/risks/all?limit=4&cursor={first['next_cursor']}").get_json()
+    assert [r["risk_id"] for r in first["risks"] + second["risks"]] == ["R6", "R5", "R4", "R3", "R2", "R1"]
+    assert second["next_cursor"] is None
+
+
+def test_fastapi_pages_active_risks_past_the_cap(risks, monkeypatch):
+    pytest.importorskip("google.adk")
+    from fastapi.testclient import TestClient
+    from Adk_Agent.api import fastapi_backend
+
+    monkeypatch.setattr(fastapi_backend, "MAX_PAGE_SIZE", 2)
+    client = TestClient(fastapi_backend.app)
+    first = client.get("/risks").json()
+    assert [r["risk_id"] for r in first["active_risks"]] == ["R3", "R2"]
+    second = client.get(f"/risks?active_cursor={first['active_next_cursor']}").json()
+    assert [r["risk_id"] for r in second["active_risks"]] == ["R1"]
+    assert second["active_next_cursor"] is None
+    assert client.get("/risks?limit=abc").status_code == 422
@@ -0,0 +1,197 @@
+import os
+
+import pandas as pd
+import pytest
+
+from Adk_Agent.data_access import registry as registry_module
+from Adk_Agent.data_access.incremental import DELTAS_DIRNAME, ingest_incoming
+from Adk_Agent.data_access.streaming import AGGREGATES_DIRNAME
+
+CUSTOMERS_FILE = "crm_customers_20000.xlsx"
+INVOICES_FILE = "erp_invoices_22000.xlsx"
+
+
+def _customers() -> pd.DataFrame:
+    return pd.DataFrame({
+        "customer_id": [f"CUST{i:05d}" for i in range(1, 11)],
+        "customer_name": [f"Customer {i}" for i in range(1, 11)],
+        "segment": ["SMB", "Enterprise"] * 5,
+        "industry": "Retail",
+        "region": ["North", "South", "East", "West", "North"] * 2,
+        "signup_date": pd.Timestamp("2023-01-01"),
+        "last_order_date": pd.Timestamp("2024-02-01"),
+        "status": "Active",
+        "lifetime_value": 1000,
+    })
+
+
+def _invoices(ids, start="2024-01-01") -> pd.DataFrame:
+    dates = pd.date_range(start, periods=len(ids), freq="D")
+    return pd.DataFrame({
+        "invoice_id": ids,
+        "customer_id": [f"CUST{i % 10 + 1:05d}" for i in range(len(ids))],
+        "invoice_date": dates,
+        "invoice_amount": [1000 + 37 * i for i in range(len(ids))],
+        "payment_status": ["Paid", "Paid", "Overdue"] * (len(ids) // 3) + ["Paid"] * (len(ids) % 3),
+        "due_date": dates + pd.Timedelta(days=30),
+    })
+
+
+BASE = _invoices([f"INV{i:06d}" for i in range(1, 61)])  # 2024-01-01 .. 2024-02-29
+
+
+def _write_workbooks(root, invoices: pd.DataFrame):
+    root.mkdir(parents=True, exist_ok=True)
+    _customers().to_excel(root / CUSTOMERS_FILE, index=False)
+    target = root / INVOICES_FILE
+    previous = target.stat().st_mtime_ns if target.exists() else 0
+    invoices.to_excel(target, index=False)
+    # A rewrite within the same mtime tick must still read as a new source version
+    os.utime(target, ns=(previous + 10**9, previous + 10**9))
+
+
+def _merge(base: pd.DataFrame, *batches: pd.DataFrame) -> pd.DataFrame:
+    merged = base.set_index("invoice_id")
+    for batch in batches:
+        batch = batch.set_index("invoice_id")
+        merged = pd.concat([merged.drop(batch.index, errors="ignore"), batch])
+    return merged.reset_index()
+
+
+def _install(monkeypatch, root) -> registry_module.DatasetRegistry:
+    """Fresh registry over `root` with the production table specs."""
+    fresh = registry_module.DatasetRegistry(root)
+    for name in registry_module.registry.names():
+        fresh.register(registry_module.registry._specs[name])
+    monkeypatch.setattr(registry_module, "registry", fresh)
+    return fresh
+
+
+def _aggregates(registry) -> dict:
+    rollup = registry.aggregate("invoices", "rollup").table.sort_index()
+    spend = registry.aggregate("invoices", "spend").sort_index()
+    watermark = registry.aggregate("invoices", "watermark")
+    return {
+        "rollup": rollup.astype("float64"),
+        "spend": spend,
+        "watermark": (watermark["date"], watermark["key_id"], watermark["rows"]),
+    }
+
+
+def _recompute(monkeypatch, root, invoices: pd.DataFrame) -> dict:
+    """Aggregates of a full ingestion of `invoices` in a separate data dir."""
+    _write_workbooks(root, invoices)
+    return _aggregates(_install(monkeypatch, root))
+
+
+def _assert_same(actual: dict, expected: dict):
+    pd.testing.assert_frame_equal(actual["rollup"], expected["rollup"])
+    pd.testing.assert_series_equal(actual["spend"], expected["spend"], check_names=False)
+    assert actual["watermark"] == expected["watermark"]
+
+
+def _segments(root):
+    return sorted((root / DELTAS_DIRNAME).glob("*.parquet")) if (root / DELTAS_DIRNAME).exists() else []
+
+
+@pytest.fixture
+def data_dir(tmp_path):
+    root = tmp_path / "data"
+    _write_workbooks(root, BASE)
+    return root
+
+
+NEW = _invoices(["INV000061", "INV000062", "INV040000"], start="2024-03-01")
+
+
+def test_new_rows_from_the_drop_folder(monkeypatch, tmp_path, data_dir):
+    expected = _recompute(monkeypatch, tmp_path / "full", _merge(BASE, NEW))
+    registry = _install(monkeypatch, data_dir)
+    registry.ensure("invoices")
+    incoming = data_dir / "incoming" / "invoices"
+    incoming.mkdir(parents=True)
+    NEW.to_csv(incoming / "batch.csv", index=False)
+
+    results = ingest_incoming()
+
+    assert results["invoices"][0]["new"] == 3
+    assert (incoming / "processed" / "batch.csv").exists()
+    assert len(_segments(data_dir)) == 1
+    actual = _aggregates(registry)
+    _assert_same(actual, expected)
+    assert actual["watermark"] == (pd.Timestamp("2024-03-03"), "INV040000", 63)
+
+
+def test_unchanged_resend_stores_nothing(monkeypatch, data_dir):
+    registry = _install(monkeypatch, data_dir)
+    registry.append("invoices", [NEW])
+    before = _aggregates(registry)
+
+    summary = registry.append("invoices", [NEW])
+
+    assert (summary["new"], summary["changed"], summary["unchanged"]) == (0, 0, 3)
+    assert summary["segments"] == []
+    assert len(_segments(data_dir)) == 1
+    _assert_same(_aggregates(registry), before)
+
+
+def test_in_window_change_matches_a_full_recompute(monkeypatch, tmp_path, data_dir):
+    changed = BASE[BASE["invoice_id"].isin(["INV000058", "INV000060"])].copy()
+    changed["invoice_amount"] += 5000
+    changed["payment_status"] = "Overdue"
+    changed["customer_id"] = "CUST00003"
+    expected = _recompute(monkeypatch, tmp_path / "full", _merge(BASE, changed))
+    registry = _install(monkeypatch, data_dir)
+
+    summary = registry.append("invoices", [changed])
+
+    assert (summary["new"], summary["changed"]) == (0, 2)
+    _assert_same(_aggregates(registry), expected)
+
+
+def test_out_of_window_change_is_skipped(monkeypatch, data_dir):
+    registry = _install(monkeypatch, data_dir)
+    before = _aggregates(registry)
+    old = BASE[BASE["invoice_id"] == "INV000005"].copy()
+    old["invoice_amount"] += 5000
+
+    summary = registry.append("invoices", [old])
+
+    assert (summary["skipped"], summary["changed"], summary["segments"]) == (1, 0, [])
+    _assert_same(_aggregates(registry), before)
+
+
+@pytest.mark.parametrize("saved_state", [True, False], ids=["restored", "replayed"])
+def test_restart_with_deltas(monkeypatch, tmp_path, data_dir, saved_state):
+    changed = BASE[BASE["invoice_id"] == "INV000059"].copy()
+    changed["invoice_amount"] = 1
+    merged = _merge(BASE, NEW, changed)
+    expected = _recompute(monkeypatch, tmp_path / "full", merged)
+    registry = _install(monkeypatch, data_dir)
+    registry.append("invoices", [NEW])
+    registry.append("invoices", [changed])
+    if not saved_state:
+        for state in (data_dir / ".cache" / AGGREGATES_DIRNAME).glob("*.parquet"):
+            state.unlink()
+
+    restarted = _install(monkeypatch, data_dir)
+
+    _assert_same(_aggregates(restarted), expected)
+    frame = restarted.get("invoices")
+    assert len(frame) == len(merged)
+    assert frame["invoice_amount"].sum() == merged["invoice_amount"].sum()
+
+
+def test_new_source_workbook_drops_old_deltas(monkeypatch, tmp_path, data_dir):
+    registry = _install(monkeypatch, data_dir)
+    registry.append("invoices", [NEW])
+    assert len(_segments(data_dir)) == 1
+
+    export = _invoices([f"INV{i:06d}" for i in range(1, 71)])
+    expected = _recompute(monkeypatch, tmp_path / "full", export)
+    _write_workbooks(data_dir, export)
+    registry = _install(monkeypatch, data_dir)
+
+    _assert_same(_aggregates(registry), expected)
+    assert _segments(data_dir) == []
+    assert registry.aggregate("invoices", "watermark")["rows"] == 70
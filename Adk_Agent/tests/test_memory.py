@@ -0,0 +1,111 @@
+import json
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+from Adk_Agent.services import memory
+
+REPO_ROOT = Path(__file__).parent.parent.parent
+
+WRITER = """
+import json, sys, time
+from pathlib import Path
+from Adk_Agent.services.memory import MemoryService
+
+root, writer, count = Path(sys.argv[1]), sys.argv[2], int(sys.argv[3])
+while not (root / "go").exists():
+    time.sleep(0.005)
+service = MemoryService(root / "memory.json", root / "memory.journal", root / "memory.lock")
+for i in range(count):
+    service.set_preference(f"{writer}.{i}", i)
+    service.log_risk_reference(f"{writer}-{i}", "test")
+    if i % 3 == 0:
+        service.flush()
+service.flush()
+print(json.dumps(service.stats()))
+"""
+
+
+def _service(root: Path) -> memory.MemoryService:
+    return memory.MemoryService(root / "memory.json", root / "memory.journal", root / "memory.lock")
+
+
+def _journal_lines(root: Path) -> int:
+    path = root / "memory.journal"
+    return len(path.read_bytes().splitlines()) if path.exists() else 0
+
+
+def test_concurrent_writers_lose_no_entries(tmp_path):
+    count, compact_every = 40, 25
+    env = {
+        **os.environ,
+        "PYTHONPATH": str(REPO_ROOT),
+        "MEMORY_COMPACT_EVERY": str(compact_every),
+        "MEMORY_FLUSH_INTERVAL_SECONDS": "3600",  # flush only when the writer asks
+    }
+    writers = [f"w{n}" for n in range(3)]
+    procs = [
+        subprocess.Popen(
+            [sys.executable, "-c", WRITER, str(tmp_path), writer, str(count)],
+            env=env, cwd=tmp_path, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True,
+        )
+        for writer in writers
+    ]
+    time.sleep(0.5)
+    (tmp_path / "go").touch()
+    stats = []
+    for proc in procs:
+        out, err = proc.communicate(timeout=60)
+        assert proc.returncode == 0, err
+        stats.append(json.loads(out.strip().splitlines()[-1]))
+
+    # 2 entries per iteration: the shared journal was compacted by the writers
+    assert sum(s["compactions"] for s in stats) >= 1
+    assert (tmp_path / "memory.json").exists()
+    assert _journal_lines(tmp_path) < compact_every
+
+    prefs = _service(tmp_path).get_preferences()
+    assert prefs == {f"{w}.{i}": i for w in writers for i in range(count)}
+    references = _service(tmp_path).recent_risk_references(limit=memory.MAX_RISK_REFERENCES)
+    assert len(references) == memory.MAX_RISK_REFERENCES
+    assert len({r["risk_id"] for r in references}) == len(references)  # none applied twice
+
+
+def test_compaction_resets_the_journal(tmp_path, monkeypatch):
+    monkeypatch.setattr(memory, "COMPACT_EVERY", 5)
+    service = _service(tmp_path)
+    for i in range(4):
+        service.set_preference(f"k{i}", i)
+    service.flush()
+    assert _journal_lines(tmp_path) == 4
+    assert not (tmp_path / "memory.json").exists()
+
+    service.set_preference("k4", 4)
+    service.flush()
+    assert service.stats()["compactions"] == 1
+    assert _journal_lines(tmp_path) == 0
+    saved = json.loads((tmp_path / "memory.json").read_text())
+    assert saved["preferences"] == {f"k{i}": i for i in range(5)}
+
+
+def test_other_writer_compaction_is_detected(tmp_path, monkeypatch):
+    monkeypatch.setattr(memory, "COMPACT_EVERY", 3)
+    first, second = _service(tmp_path), _service(tmp_path)
+    first.set_preference("a", 1)
+    first.flush()
+    second.set_preference("b", 2)
+    second.flush()  # reads "a", appends "b"
+    assert second.get_preferences() == {"a": 1, "b": 2}
+
+    second.set_preference("c", 3)
+    second.flush()  # third journal entry: compacts into memory.json
+    assert _journal_lines(tmp_path) == 0
+
+    # The journal `first` read was replaced: it rereads memory.json instead of
+    # replaying from its stale offset, and its own entry is not applied twice
+    first.set_preference("d", 4)
+    first.flush()
+    assert first.get_preferences() == {"a": 1, "b": 2, "c": 3, "d": 4}
+    assert _service(tmp_path).get_preferences() == {"a": 1, "b": 2, "c": 3, "d": 4}
@@ -0,0 +1,90 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from Adk_Agent.services import risk_engine
+from Adk_Agent.services.risk_store import RiskStore
+
+
+@pytest.fixture(autouse=True)
+def store(tmp_path, monkeypatch):
+    store = RiskStore(tmp_path / "risks.db")
+    monkeypatch.setattr(risk_engine, "risk_store", store)
+    monkeypatch.setattr(risk_engine, "_open_fingerprints", None)
+    yield store
+    store.close()
+
+
+def _snapshot(revenue_change_pct=None, churn_rate_pct=None):
+    metrics = {}
+    if revenue_change_pct is not None:
+        metrics["revenue"] = {"alert": True, "revenue_change_pct": revenue_change_pct}
+    if churn_rate_pct is not None:
+        metrics["customers"] = {"alert": True, "churn_rate_pct": churn_rate_pct, "inactive_count": 10}
+    return {"metrics": metrics}
+
+
+def _generate(at=None, **signals):
+    risks = risk_engine.generate_risks_from_monitoring(_snapshot(**signals))
+    if at is not None:
+        ts = at.isoformat() + "Z"
+        for risk in risks:
+            risk["risk_id"] = f"{risk['risk_type']}_{ts}"
+            risk["timestamp"] = risk["last_seen"] = ts
+    return risks
+
+
+def _active():
+    return risk_engine.get_active_risks()
+
+
+def test_repeated_risk_updates_the_open_risk():
+    first = risk_engine.store_risks(_generate(revenue_change_pct=-18, churn_rate_pct=45))
+    again = risk_engine.store_risks(_generate(revenue_change_pct=-18.5, churn_rate_pct=45))
+
+    assert len(first) == 2
+    assert again == []
+    active = {r["risk_type"]: r for r in _active()}
+    assert len(active) == 2
+    assert active["REVENUE"]["occurrences"] == 2
+    assert active["REVENUE"]["metrics"]["revenue_change_pct"] == -18.5
+
+
+def test_band_change_supersedes_the_open_risk_of_the_type():
+    first = risk_engine.store_risks(_generate(revenue_change_pct=-18, churn_rate_pct=45))
+    crossed = risk_engine.store_risks(_generate(revenue_change_pct=-21, churn_rate_pct=45))
+
+    assert [r["risk_type"] for r in crossed] == ["REVENUE"]
+    active = _active()
+    assert len(active) == 2
+    assert {r["risk_id"] for r in active} == {crossed[0]["risk_id"], first[1]["risk_id"]}
+    old = risk_engine.risk_store.query(where="risk_id = ?", params=(first[0]["risk_id"],))[0]
+    assert old["status"] == "RESOLVED"
+    assert old["resolution_reason"] == f"Superseded by {crossed[0]['risk_id']}"
+
+    # The superseded fingerprint no longer matches: going back opens a fresh risk
+    back = risk_engine.store_risks(_generate(revenue_change_pct=-18, churn_rate_pct=45))
+    assert len(back) == 1
+    assert len(_active()) == 2
+
+
+def test_expired_window_replaces_the_open_risk():
+    then = datetime.utcnow() - timedelta(hours=risk_engine.DEDUP_WINDOW_HOURS + 1)
+    old = risk_engine.store_risks(_generate(at=then, revenue_change_pct=-18))
+    new = risk_engine.store_risks(_generate(revenue_change_pct=-18))
+
+    assert len(new) == 1
+    assert [r["risk_id"] for r in _active()] == [new[0]["risk_id"]]
+    assert risk_engine.risk_store.count(status="RESOLVED") == 1
+    assert new[0]["risk_id"] != old[0]["risk_id"]
+
+
+def test_resolved_risk_is_reopened_as_a_new_risk():
+    first = risk_engine.store_risks(_generate(churn_rate_pct=45))
+    risk_engine.resolve_risk(first[0]["risk_id"])
+    assert _active() == []
+
+    reopened = risk_engine.store_risks(_generate(churn_rate_pct=45))
+    assert len(reopened) == 1
+    assert [r["risk_id"] for r in _active()] == [reopened[0]["risk_id"]]
+    assert risk_engine.risk_store.count(status="RESOLVED") == 1
@@ -0,0 +1,57 @@
+import asyncio
+import contextvars
+
+from Adk_Agent.services.tool_output import collect_visuals, compact_output
+
+KPI = {"type": "kpi", "title": "Revenue", "value": 1234.5678}
+TREND = {"type": "trend", "points": list(range(50))}
+
+
+@compact_output()
+def _tool():
+    return {"revenue": 1234.5678, "visual": KPI, "visuals": [TREND]}
+
+
+@compact_output(drop=("visual", "visuals"))
+def _history_tool():
+    return {"payload": {"x": 1}, "visual": KPI}
+
+
+def _in_fresh_context(fn):
+    return contextvars.copy_context().run(fn)
+
+
+def test_visuals_pass_through_without_a_collector():
+    result = _in_fresh_context(_tool)
+    assert result == {"revenue": 1234.57, "visual": KPI, "visuals": [TREND]}
+
+
+def test_visuals_go_to_the_collector_not_the_model():
+    def run():
+        visuals = collect_visuals()
+        return _tool(), visuals
+
+    result, visuals = _in_fresh_context(run)
+    assert result == {"revenue": 1234.57}
+    assert visuals == [KPI, TREND]
+
+
+def test_dropped_visuals_are_not_collected():
+    def run():
+        visuals = collect_visuals()
+        return _history_tool(), visuals
+
+    result, visuals = _in_fresh_context(run)
+    assert result == {"payload": {"x": 1}}
+    assert visuals == []
+
+
+def test_tools_run_in_tasks_and_threads_reach_the_collector():
+    async def stream():
+        visuals = collect_visuals()
+        results = await asyncio.gather(asyncio.to_thread(_tool), asyncio.create_task(asyncio.to_thread(_tool)))
+        return results, visuals
+
+    results, visuals = asyncio.run(stream())
+    assert all("visual" not in r and "visuals" not in r for r in results)
+    assert sorted(v["type"] for v in visuals) == ["kpi", "kpi", "trend", "trend"]
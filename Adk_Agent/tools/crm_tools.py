@@ -1,11 +1,23 @@
 from google.adk.tools.function_tool import FunctionTool
 from ..data_access.crm_data import inactive_customers, segment_summary, top_customers
 from ..services.memory import log_insight
+from ..services.tool_cache import memoize_tool
+from ..services.tool_output import compact_output, CUSTOMER_FIELDS
+from ..services.tracing import traced
 
+@traced("tool.customer_health")
+@compact_output(projections={"top_customers": CUSTOMER_FIELDS})
 def _customer_health(days: int = 30):
     """
     Returns customer inactivity and segment distribution, plus top customers.
     """
+    insight = _customer_insight(days)
+    log_insight("customers", insight)
+    return insight
+
+
+@memoize_tool
+def _customer_insight(days: int):
     customers = inactive_customers(days=days)
     segments = segment_summary(customers)
     top = top_customers(5)
@@ -15,8 +27,6 @@ def _customer_health(days: int = 30):
         "segment_distribution": segments,
         "top_customers": top,
     }
-
-    log_insight("customers", insight)
     return insight
 
 customer_health = FunctionTool(_customer_health)
@@ -5,7 +5,12 @@ from ..data_access.erp_data import (
     payment_cycle_health,
 )
 from ..services.memory import log_insight
+from ..services.tool_cache import memoize_tool
+from ..services.tool_output import compact_output
+from ..services.tracing import traced
 
+@traced("tool.finance_health")
+@compact_output()
 def _finance_health():
     """
     Provides finance and payment cycle health.
@@ -13,6 +18,13 @@ def _finance_health():
     - Revenue trends
     - Payment cycle anomalies and overdue invoices
     """
+    insight = _finance_insight()
+    log_insight("finance", insight)
+    return insight
+
+
+@memoize_tool
+def _finance_insight():
     kpis = compute_finance_kpis()
     anomaly = detect_finance_anomaly(kpis)
     payment = payment_cycle_health()
@@ -41,8 +53,6 @@ def _finance_health():
         "explanation": " ".join(explanation) if explanation else "Finance metrics appear healthy.",
         "recommendations": recs,
     }
-
-    log_insight("finance", insight)
     return insight
 
 finance_health = FunctionTool(_finance_health)
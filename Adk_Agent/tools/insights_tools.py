@@ -1,6 +1,11 @@
 from google.adk.tools.function_tool import FunctionTool
 from ..services.memory import recent_insights
+from ..services.tool_output import compact_output
+from ..services.tracing import traced
 
+# Past payloads are context for the model; their visuals are not re-rendered
+@traced("tool.recent_insights")
+@compact_output(drop=("visual", "visuals"))
 def _recent_insights_tool(limit: int = 10):
     """Fetch recent insights logged by the agent across domains."""
     return recent_insights(limit)
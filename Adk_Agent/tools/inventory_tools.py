@@ -5,7 +5,12 @@ from ..data_access.inventory_data import (
     low_stock_alerts,
 )
 from ..services.memory import log_insight
+from ..services.tool_cache import memoize_tool
+from ..services.tool_output import compact_output
+from ..services.tracing import traced
 
+@traced("tool.inventory_health")
+@compact_output()
 def _inventory_health():
     """
     Provides inventory health metrics and alerts.
@@ -13,6 +18,13 @@ def _inventory_health():
     - Days inventory outstanding
     - Low stock warnings for critical SKUs
     """
+    insight = _inventory_insight()
+    log_insight("inventory", insight)
+    return insight
+
+
+@memoize_tool
+def _inventory_insight():
     kpis = compute_inventory_kpis()
     anomaly = detect_inventory_anomaly(kpis)
     low_stock = low_stock_alerts()
@@ -40,8 +52,6 @@ def _inventory_health():
         "explanation": " ".join(explanation),
         "recommendations": recs,
     }
-
-    log_insight("inventory", insight)
     return insight
 
 inventory_health = FunctionTool(_inventory_health)
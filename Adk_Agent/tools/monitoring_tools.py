@@ -3,19 +3,30 @@ Tool for the agent to access monitoring snapshot and active risks.
 This allows the LLM to reason about current business health + risks.
 """
 from google.adk.tools.function_tool import FunctionTool
-from ..services.monitoring_engine import compute_monitoring_snapshot
+from ..services.snapshot_cache import get_monitoring_snapshot
 from ..services.risk_engine import get_active_risks, generate_risks_from_monitoring, store_risks
 from ..services.memory import log_risk_reference
 from ..services.visualization import create_kpi_visual, create_risk_list_visual
+from ..services.tool_cache import memoize_tool
+from ..services.tool_output import compact_output, RISK_FIELDS
+from ..services.tracing import traced
 
 
+@traced("tool.monitoring_snapshot")
+@compact_output()
 def _get_monitoring_snapshot():
     """
     Retrieve the current business health snapshot from the monitoring engine.
     Shows revenue, customer, finance, and inventory metrics + alerts.
     Includes visualization specs for dashboard rendering.
     """
-    snapshot = compute_monitoring_snapshot()
+    return _snapshot_with_visuals()
+
+
+# Degraded snapshots are retried on the next call rather than memoized
+@memoize_tool(cache_if=lambda snapshot: "degraded" not in snapshot)
+def _snapshot_with_visuals():
+    snapshot = get_monitoring_snapshot()
     
     # Add visualization specs for key metrics
     metrics = snapshot.get("metrics", {})
@@ -48,6 +59,8 @@ def _get_monitoring_snapshot():
     return snapshot
 
 
+@traced("tool.active_risks")
+@compact_output(projections={"risks": RISK_FIELDS})
 def _get_active_risks():
     """
     Retrieve all currently active business risks.
@@ -71,16 +84,17 @@ def _get_active_risks():
     return {"risks": risks, "count": 0}
 
 
+@traced("tool.check_risks")
+@compact_output(projections={"risks": RISK_FIELDS})
 def _check_and_generate_risks():
     """
     Generate new risks from current monitoring state if conditions warrant.
     Stores generated risks for future reference.
     """
-    snapshot = compute_monitoring_snapshot()
-    new_risks = generate_risks_from_monitoring(snapshot)
+    snapshot = get_monitoring_snapshot()
+    new_risks = store_risks(generate_risks_from_monitoring(snapshot))
     
     if new_risks:
-        store_risks(new_risks)
         # Log to agent memory
         for risk in new_risks:
             log_risk_reference(
@@ -0,0 +1,44 @@
+from collections import Counter
+from google.adk.tools.function_tool import FunctionTool
+from ..data_access.overview_data import compute_business_overview
+from ..services.risk_engine import get_active_risks
+from ..services.memory import log_insight
+from ..services.tool_cache import memoize_tool
+from ..services.tool_output import compact_output, CUSTOMER_FIELDS
+from ..services.tracing import traced
+
+SEVERITY_ORDER = {"HIGH": 0, "MEDIUM": 1, "LOW": 2}
+
+
+@traced("tool.business_overview")
+@compact_output(projections={"top_customers": CUSTOMER_FIELDS})
+def _business_overview():
+    """
+    PREFERRED for broad questions such as "how is the business doing?" or
+    "give me an overview". Returns revenue, customer, finance and inventory
+    KPIs with anomaly flags, plus a summary of active risks, in one call.
+    Use the domain tools only when more detail on one area is needed.
+    """
+    overview = _overview_kpis()
+
+    risks = get_active_risks()
+    risks.sort(key=lambda r: SEVERITY_ORDER.get(r.get("severity"), 3))
+    overview["risks"] = {
+        "active_count": len(risks),
+        "by_severity": dict(Counter(r.get("severity", "UNKNOWN") for r in risks)),
+        "top": [
+            {k: r.get(k) for k in ("risk_id", "risk_type", "severity", "description")}
+            for r in risks[:5]
+        ],
+    }
+
+    log_insight("overview", overview)
+    return overview
+
+
+@memoize_tool
+def _overview_kpis():
+    return compute_business_overview()
+
+
+business_overview = FunctionTool(_business_overview)
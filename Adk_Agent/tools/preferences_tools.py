@@ -1,10 +1,13 @@
 from google.adk.tools.function_tool import FunctionTool
 from ..services.memory import get_preferences, set_preference
+from ..services.tracing import traced
 
+@traced("tool.get_preferences")
 def _get_preferences_tool():
     """Return current user/business preferences stored in memory."""
     return get_preferences()
 
+@traced("tool.set_preferences")
 def _set_preferences_tool(key: str, value: str):
     """Update a preference (e.g., focus area, alert cadence)."""
     return set_preference(key, value)
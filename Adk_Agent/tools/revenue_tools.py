@@ -6,8 +6,13 @@ from ..data_access.revenue_data import (
 )
 from ..data_access.crm_data import top_customers
 from ..services.memory import log_insight
+from ..services.tool_cache import memoize_tool
+from ..services.tool_output import compact_output
 from ..services.visualization import create_kpi_visual, create_trend_visual
+from ..services.tracing import traced
 
+@traced("tool.revenue_health")
+@compact_output()
 def _revenue_health():
     """
     REQUIRED for answering questions about:
@@ -18,6 +23,16 @@ def _revenue_health():
 
     Returns KPIs, anomaly flags, causal hints, recommendations, and optional visualization specs.
     """
+    insight = _revenue_insight()
+
+    # Persist insight to memory
+    log_insight("revenue", insight)
+
+    return insight
+
+
+@memoize_tool
+def _revenue_insight():
     kpis = compute_revenue_kpis()
     anomaly = detect_revenue_anomaly(kpis)
     signals = supporting_signals()
@@ -64,10 +79,6 @@ def _revenue_health():
         "recommendations": recs,
         "visual": visual  # Include visualization spec
     }
-
-    # Persist insight to memory
-    log_insight("revenue", insight)
-
     return insight
 
 revenue_health = FunctionTool(_revenue_health)
@@ -23,6 +23,9 @@ const ChatInterface = () => {
     const [messages, setMessages] = useState(initialMessages);
     const [inputValue, setInputValue] = useState('');
     const [isThinking, setIsThinking] = useState(false);
+    const [toolStatus, setToolStatus] = useState(null);
+    // One conversation session per mounted chat, so the agent keeps context
+    const sessionIdRef = useRef(crypto.randomUUID());
     const messagesEndRef = useRef(null);
     const inputWrapperRef = useRef(null);
 
@@ -37,6 +40,18 @@ const ChatInterface = () => {
 
 
 
+    // Parse one server-sent event block ("event: x\ndata: {...}") into { name, data }
+    const parseSseEvent = (block) => {
+        let name = 'message';
+        const dataLines = [];
+        for (const line of block.split('\n')) {
+            if (line.startsWith('event:')) name = line.slice(6).trim();
+            else if (line.startsWith('data:')) dataLines.push(line.slice(5).trim());
+        }
+        if (dataLines.length === 0) return null; // keep-alive comment
+        return { name, data: JSON.parse(dataLines.join('\n')) };
+    };
+
     const handleSend = async () => {
         if (!inputValue.trim()) return;
 
@@ -50,30 +65,70 @@ const ChatInterface = () => {
         setMessages(prev => [...prev, newUserMsg]);
         setInputValue('');
         setIsThinking(true);
+        setToolStatus(null);
+
+        const agentMsgId = Date.now() + 1;
+        // Create the agent bubble on the first token, then update it in place
+        const updateAgentMsg = (update) => {
+            setIsThinking(false);
+            setMessages(prev => {
+                const existing = prev.find(m => m.id === agentMsgId);
+                if (!existing) {
+                    const base = {
+                        id: agentMsgId,
+                        sender: 'agent',
+                        content: '',
+                        timestamp: new Date().toLocaleTimeString([], { hour: '2-digit', minute: '2-digit' })
+                    };
+                    return [...prev, { ...base, ...update(base) }];
+                }
+                return prev.map(m => (m.id === agentMsgId ? { ...m, ...update(m) } : m));
+            });
+        };
 
         try {
-            const resp = await fetch('/agent/query', {
+            const resp = await fetch('/agent/query/stream', {
                 method: 'POST',
                 headers: { 'Content-Type': 'application/json' },
-                body: JSON.stringify({ question: newUserMsg.content })
+                body: JSON.stringify({ question: newUserMsg.content, session_id: sessionIdRef.current })
             });
 
             if (!resp.ok) {
                 throw new Error(`Agent API error: ${resp.status}`);
             }
 
-            const data = await resp.json();
-
-            const agentText = (data && data.text) ? data.text : 'Sorry — I could not generate a response.';
-
-            const agentMsg = {
-                id: Date.now() + 1,
-                sender: 'agent',
-                content: agentText,
-                timestamp: new Date().toLocaleTimeString([], { hour: '2-digit', minute: '2-digit' })
+            const reader = resp.body.getReader();
+            const decoder = new TextDecoder();
+            let buffer = '';
+            let receivedText = false;
+
+            const handleEvent = ({ name, data }) => {
+                if (name === 'tool_call') {
+                    setToolStatus(`Running ${data.name}…`);
+                } else if (name === 'tool_result') {
+                    setToolStatus(`Finished ${data.name}`);
+                } else if (name === 'token') {
+                    receivedText = true;
+                    updateAgentMsg(m => ({ content: m.content + data.text }));
+                } else if (name === 'done') {
+                    const agentText = data.text || (receivedText ? '' : 'Sorry — I could not generate a response.');
+                    updateAgentMsg(m => ({ content: agentText || m.content, visuals: data.visuals || [] }));
+                } else if (name === 'error') {
+                    throw new Error(data.detail);
+                }
             };
 
-            setMessages(prev => [...prev, agentMsg]);
+            while (true) {
+                const { value, done } = await reader.read();
+                if (done) break;
+                buffer += decoder.decode(value, { stream: true });
+                let boundary;
+                while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+                    const event = parseSseEvent(buffer.slice(0, boundary));
+                    buffer = buffer.slice(boundary + 2);
+                    if (event) handleEvent(event);
+                }
+            }
         } catch (err) {
             const errMsg = {
                 id: Date.now() + 2,
@@ -84,6 +139,7 @@ const ChatInterface = () => {
             setMessages(prev => [...prev, errMsg]);
         } finally {
             setIsThinking(false);
+            setToolStatus(null);
         }
     };
 
@@ -134,6 +190,7 @@ const ChatInterface = () => {
                                 <span className="dot"></span>
                                 <span className="dot"></span>
                                 <span className="dot"></span>
+                                {toolStatus && <span className="thinking-status">{toolStatus}</span>}
                             </div>
                         </motion.div>
                     )}